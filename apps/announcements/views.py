@@ -2,14 +2,14 @@ from django.shortcuts import redirect
 from django.views.generic import ListView, View
 from django.db.models import Sum, Count, Q
 from apps.announcements.models import Announcement
-from core.views import LoginRequiredMixinView
+from core.views import LoginRequiredMixinView, ReplicaReadMixin
 from apps.employees.models import EmployeeSetting
 from apps.sales.models import SalesOrder, SalesInvoice
 from apps.manufacturing.models import ManufacturingOrder
 from apps.inventory.services import StockService
 from apps.payrolls.models import Payroll
 
-class AnnouncementListView(LoginRequiredMixinView, ListView):
+class AnnouncementListView(LoginRequiredMixinView, ReplicaReadMixin, ListView):
     model = Announcement
     template_name = "announcement_list.html"
     context_object_name = "announcements"
@@ -46,9 +46,7 @@ class AnnouncementListView(LoginRequiredMixinView, ListView):
         context['pending_invoices'] = SalesInvoice.objects.filter(
             state__in=['draft', 'sent']
         ).count()
-        context['overdue_invoices'] = SalesInvoice.objects.filter(
-            state='overdue'
-        ).count()
+        context['overdue_invoices'] = SalesInvoice.objects.past_due().count()
 
         # Payroll Summary
         context['pending_payrolls'] = Payroll.objects.filter(
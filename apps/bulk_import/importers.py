@@ -0,0 +1,562 @@
+"""
+Bulk CSV/JSONL importers
+
+Rows are parsed and validated in chunks of `chunk_size`; foreign keys are
+resolved through maps loaded once per import, and each chunk is written with
+a single bulk_create (an upsert where the model has a natural key). Invalid
+rows are collected in ImportResult.errors and skipped, never aborting the
+rest of the import.
+"""
+import csv
+import json
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.utils import generate_ids, next_references
+from apps.inventory.models import Location, StockQuant
+from apps.inventory.services import StockValuationService
+from apps.inventory.signals import stock_changed
+from apps.products.models import (
+    COST_METHOD_CHOICES, PRODUCT_TYPE_CHOICES, Category, Product, ProductBarcode, UnitOfMeasure,
+)
+from apps.products.services import BarcodeService
+from apps.sales.models import CUSTOMER_TYPE_CHOICES, Customer
+from apps.vendors.models import PAYMENT_TERM_CHOICES, VENDOR_RATING_CHOICES, Vendor, VendorProduct
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'ya'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'tidak'}
+
+
+def read_rows(fileobj, file_format):
+    """Yield (row_number, dict) from a CSV or JSONL text stream"""
+    if file_format == 'csv':
+        reader = csv.DictReader(fileobj)
+        for row_number, row in enumerate(reader, start=2):
+            yield row_number, row
+    elif file_format == 'jsonl':
+        for row_number, line in enumerate(fileobj, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = e
+            if not isinstance(row, (dict, ValueError)):
+                row = ValueError('Expected a JSON object')
+            yield row_number, row
+    else:
+        raise ValueError(f'Unsupported import format: {file_format}')
+
+
+def detect_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class ImportResult:
+    """Counts and row-level errors of one import run"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, str(message)))
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'errors': [{'row': row, 'error': error} for row, error in self.errors],
+        }
+
+
+class BaseImporter:
+    """
+    Subclasses implement parse_row() to turn a row dict into an unsaved
+    instance (raising ValueError for invalid rows). Models with a natural key
+    set unique_fields and are upserted on it. Importers that number rows
+    without a key (numbered = True) write those rows after all the others,
+    so a number can't take a key that a later row of the file supplies.
+    """
+    model = None
+    fields = []
+    unique_fields = []
+    numbered = False
+
+    def __init__(self, actor=None, chunk_size=2000):
+        self.actor = actor
+        self.chunk_size = chunk_size
+        self.result = ImportResult()
+        self.columns = None
+        self.seen_keys = set()
+        self.unnumbered = []
+
+    # Value parsing helpers
+
+    def text(self, row, name, required=False, max_length=None):
+        value = row.get(name)
+        value = '' if value is None else str(value).strip()
+        if required and not value:
+            raise ValueError(f'{name} is required')
+        if max_length and len(value) > max_length:
+            raise ValueError(f'{name} is longer than {max_length} characters')
+        return value
+
+    def decimal(self, row, name, default=None):
+        value = self.text(row, name)
+        if not value:
+            return default
+        try:
+            return Decimal(value.replace(',', ''))
+        except InvalidOperation:
+            raise ValueError(f'{name}: invalid number "{value}"')
+
+    def integer(self, row, name, default=None):
+        value = self.text(row, name)
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f'{name}: invalid integer "{value}"')
+
+    def boolean(self, row, name, default=None):
+        value = self.text(row, name).lower()
+        if not value:
+            return default
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise ValueError(f'{name}: invalid boolean "{value}"')
+
+    def choice(self, row, name, choices, default=None):
+        value = self.text(row, name)
+        if not value:
+            return default
+        valid = {str(key) for key, _ in choices}
+        if value not in valid:
+            raise ValueError(f'{name}: "{value}" is not one of {", ".join(sorted(valid))}')
+        return value
+
+    def lookup(self, mapping, row, name, required=False):
+        value = self.text(row, name, required=required)
+        if not value:
+            return None
+        try:
+            return mapping[value.lower()]
+        except KeyError:
+            raise ValueError(f'{name}: unknown "{value}"')
+
+    # Pipeline
+
+    def load_maps(self):
+        """Preload lookup maps used by parse_row()"""
+
+    def parse_row(self, row):
+        raise NotImplementedError
+
+    def prepare_chunk(self, objs):
+        """Fill in values that need one query per chunk (e.g. references)"""
+
+    def assign_references(self, objs, field, prefix, width):
+        """Number the objs that have no `field` value, skipping ones used in this chunk"""
+        missing = [obj for obj in objs if not getattr(obj, field)]
+        if not missing:
+            return
+        taken = {getattr(obj, field) for obj in objs if getattr(obj, field)}
+        references = next_references(self.model.objects, field, prefix, width, len(missing) + len(taken))
+        references = [reference for reference in references if reference not in taken]
+        for obj, reference in zip(missing, references):
+            setattr(obj, field, reference)
+
+    def get_update_fields(self):
+        # Only overwrite the columns present in the input, so a partial file
+        # (e.g. just internal_reference + list_price) leaves other fields alone
+        return [f for f in self.fields if f in self.columns and f not in self.unique_fields] + ['updated_at']
+
+    def run(self, rows):
+        self.load_maps()
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.process_chunk(chunk)
+        for start in range(0, len(self.unnumbered), self.chunk_size):
+            self.write_chunk(self.unnumbered[start:start + self.chunk_size])
+        return self.result
+
+    def process_chunk(self, chunk):
+        parsed = []
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                self.result.add_error(row_number, row)
+                continue
+            if self.columns is None:
+                self.columns = set(row)
+            try:
+                obj = self.parse_row(row)
+                key = self.natural_key(obj)
+                if key is not None:
+                    if key in self.seen_keys:
+                        raise ValueError('duplicate of an earlier row')
+                    self.seen_keys.add(key)
+            except ValueError as e:
+                self.result.add_error(row_number, e)
+                continue
+            obj.actor = self.actor
+            if self.numbered and key is None:
+                self.unnumbered.append((row_number, obj))
+            else:
+                parsed.append((row_number, obj))
+        self.write_chunk(parsed)
+
+    def write_chunk(self, parsed):
+        if not parsed:
+            return
+        objs = [obj for _, obj in parsed]
+        for obj, pk in zip(objs, generate_ids(len(objs))):
+            obj.id = pk
+
+        try:
+            with transaction.atomic():
+                self.prepare_chunk(objs)
+                self.write(objs)
+        except DatabaseError:
+            # Find the offending rows one by one instead of failing the chunk
+            for row_number, obj in parsed:
+                try:
+                    with transaction.atomic():
+                        self.prepare_chunk([obj])
+                        self.write([obj])
+                except DatabaseError as e:
+                    self.result.add_error(row_number, e)
+
+    def natural_key(self, obj):
+        if not self.unique_fields:
+            return None
+        key = tuple(getattr(obj, self.model._meta.get_field(f).attname) for f in self.unique_fields)
+        return None if None in key or '' in key else key
+
+    def existing_keys(self, objs):
+        """Natural keys of objs that are already in the database"""
+        field = self.model._meta.get_field(self.unique_fields[0])
+        values = {getattr(obj, field.attname) for obj in objs}
+        lookups = [self.model._meta.get_field(f).attname for f in self.unique_fields]
+        return set(
+            self.model.objects.filter(**{f'{field.attname}__in': values}).values_list(*lookups)
+        )
+
+    def write(self, objs):
+        if not self.unique_fields:
+            self.model.objects.bulk_create(objs)
+            self.result.created += len(objs)
+            return
+
+        existing = self.existing_keys(objs)
+        updated = sum(1 for obj in objs if self.natural_key(obj) in existing)
+        self.model.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=self.unique_fields,
+            update_fields=self.get_update_fields(),
+        )
+        self.result.created += len(objs) - updated
+        self.result.updated += updated
+
+
+class ProductImporter(BaseImporter):
+    """
+    Columns: internal_reference, name, barcode, description, category, uom,
+    purchase_uom, product_type, cost_method, standard_price, list_price,
+    can_be_purchased, can_be_sold, reorder_point, reorder_qty, is_active.
+    category is matched by name, uom/purchase_uom by symbol or name. Rows
+    without internal_reference get the next PROD-xxxxx number.
+    """
+    model = Product
+    unique_fields = ['internal_reference']
+    fields = [
+        'name', 'barcode', 'description', 'category', 'uom', 'purchase_uom',
+        'product_type', 'cost_method', 'standard_price', 'list_price',
+        'can_be_purchased', 'can_be_sold', 'reorder_point', 'reorder_qty', 'is_active',
+    ]
+
+    def load_maps(self):
+        self.categories = {name.lower(): pk for pk, name in Category.objects.values_list('id', 'name')}
+        self.uoms = {}
+        for pk, name, symbol in UnitOfMeasure.objects.values_list('id', 'name', 'symbol'):
+            self.uoms[name.lower()] = pk
+            self.uoms[symbol.lower()] = pk
+
+    def parse_row(self, row):
+        return Product(
+            internal_reference=self.text(row, 'internal_reference', max_length=50) or None,
+            name=self.text(row, 'name', required=True, max_length=255),
+            barcode=self.text(row, 'barcode', max_length=50) or None,
+            description=self.text(row, 'description'),
+            category_id=self.lookup(self.categories, row, 'category'),
+            uom_id=self.lookup(self.uoms, row, 'uom', required=True),
+            purchase_uom_id=self.lookup(self.uoms, row, 'purchase_uom'),
+            product_type=self.choice(row, 'product_type', PRODUCT_TYPE_CHOICES, 'stockable'),
+            cost_method=self.choice(row, 'cost_method', COST_METHOD_CHOICES, 'average'),
+            standard_price=self.decimal(row, 'standard_price', Decimal('0.00')),
+            list_price=self.decimal(row, 'list_price', Decimal('0.00')),
+            can_be_purchased=self.boolean(row, 'can_be_purchased', True),
+            can_be_sold=self.boolean(row, 'can_be_sold', True),
+            reorder_point=self.decimal(row, 'reorder_point', Decimal('0.00')),
+            reorder_qty=self.decimal(row, 'reorder_qty', Decimal('0.00')),
+            is_active=self.boolean(row, 'is_active', True),
+        )
+
+    numbered = True
+
+    def prepare_chunk(self, objs):
+        self.assign_references(objs, 'internal_reference', 'PROD-', 5)
+
+    def write(self, objs):
+        # The upsert sends no post_save, so drop the cached scans of the old
+        # and new barcodes (and the packaging ones, which carry name and
+        # price) here, once the chunk is committed
+        references = [obj.internal_reference for obj in objs]
+        codes = {obj.barcode for obj in objs}
+        codes.update(Product.objects.filter(internal_reference__in=references).values_list('barcode', flat=True))
+        codes.update(ProductBarcode.objects.filter(
+            product__internal_reference__in=references
+        ).values_list('barcode', flat=True))
+        super().write(objs)
+        transaction.on_commit(lambda: BarcodeService.invalidate(*codes))
+
+
+class VendorImporter(BaseImporter):
+    """
+    Columns: code, name, company_name, email, phone, website, street, street2,
+    city, state, zip_code, country, tax_id, payment_term, rating, notes,
+    is_active. Rows without code get the next VND-xxxx number.
+    """
+    model = Vendor
+    unique_fields = ['code']
+    fields = [
+        'name', 'company_name', 'email', 'phone', 'website', 'street', 'street2',
+        'city', 'state', 'zip_code', 'country', 'tax_id', 'payment_term', 'rating',
+        'notes', 'is_active',
+    ]
+
+    def parse_row(self, row):
+        rating = self.integer(row, 'rating', 3)
+        if rating not in dict(VENDOR_RATING_CHOICES):
+            raise ValueError('rating: must be between 1 and 5')
+        return Vendor(
+            code=self.text(row, 'code', max_length=20) or None,
+            name=self.text(row, 'name', required=True, max_length=255),
+            company_name=self.text(row, 'company_name', max_length=255),
+            email=self.text(row, 'email', max_length=254),
+            phone=self.text(row, 'phone', max_length=20),
+            website=self.text(row, 'website', max_length=200),
+            street=self.text(row, 'street', max_length=255),
+            street2=self.text(row, 'street2', max_length=255),
+            city=self.text(row, 'city', max_length=100),
+            state=self.text(row, 'state', max_length=100),
+            zip_code=self.text(row, 'zip_code', max_length=20),
+            country=self.text(row, 'country', max_length=100) or 'Indonesia',
+            tax_id=self.text(row, 'tax_id', max_length=50),
+            payment_term=self.choice(row, 'payment_term', PAYMENT_TERM_CHOICES, 'net30'),
+            rating=rating,
+            notes=self.text(row, 'notes'),
+            is_active=self.boolean(row, 'is_active', True),
+        )
+
+    numbered = True
+
+    def prepare_chunk(self, objs):
+        self.assign_references(objs, 'code', 'VND-', 4)
+
+
+class VendorProductImporter(BaseImporter):
+    """
+    Columns: vendor (code), product (internal_reference), vendor_product_code,
+    vendor_product_name, price, currency, min_qty, lead_time_days,
+    is_preferred, is_active. Upserted on (vendor, product).
+    """
+    model = VendorProduct
+    unique_fields = ['vendor', 'product']
+    fields = [
+        'vendor_product_code', 'vendor_product_name', 'price', 'currency', 'min_qty',
+        'lead_time_days', 'is_preferred', 'is_active',
+    ]
+
+    def load_maps(self):
+        self.vendors = {code.lower(): pk for pk, code in Vendor.objects.exclude(code=None).values_list('id', 'code')}
+        self.products = {
+            ref.lower(): pk
+            for pk, ref in Product.objects.exclude(internal_reference=None).values_list('id', 'internal_reference')
+        }
+
+    def parse_row(self, row):
+        lead_time_days = self.integer(row, 'lead_time_days', 1)
+        if lead_time_days < 0:
+            raise ValueError('lead_time_days: must not be negative')
+        return VendorProduct(
+            vendor_id=self.lookup(self.vendors, row, 'vendor', required=True),
+            product_id=self.lookup(self.products, row, 'product', required=True),
+            vendor_product_code=self.text(row, 'vendor_product_code', max_length=50),
+            vendor_product_name=self.text(row, 'vendor_product_name', max_length=255),
+            price=self.decimal(row, 'price', Decimal('0.00')),
+            currency=self.text(row, 'currency', max_length=3) or 'IDR',
+            min_qty=self.decimal(row, 'min_qty', Decimal('1.00')),
+            lead_time_days=lead_time_days,
+            is_preferred=self.boolean(row, 'is_preferred', False),
+            is_active=self.boolean(row, 'is_active', True),
+        )
+
+    def write(self, objs):
+        if 'is_preferred' not in self.columns:
+            super().write(objs)
+            return
+        # The upsert skips VendorProduct.save(), which keeps one preferred
+        # vendor per product: the last preferred row of a product wins, and
+        # one UPDATE clears the product's other preferred rows
+        preferred = {obj.product_id: obj.vendor_id for obj in objs if obj.is_preferred}
+        for obj in objs:
+            if obj.is_preferred and preferred[obj.product_id] != obj.vendor_id:
+                obj.is_preferred = False
+        super().write(objs)
+        if preferred:
+            keep = Q()
+            for product_id, vendor_id in preferred.items():
+                keep |= Q(product_id=product_id, vendor_id=vendor_id)
+            VendorProduct.objects.filter(
+                product_id__in=list(preferred), is_preferred=True
+            ).exclude(keep).update(is_preferred=False)
+
+    def existing_keys(self, objs):
+        vendor_ids = {obj.vendor_id for obj in objs}
+        product_ids = {obj.product_id for obj in objs}
+        return set(
+            VendorProduct.objects.filter(
+                vendor_id__in=vendor_ids, product_id__in=product_ids
+            ).values_list('vendor_id', 'product_id')
+        )
+
+
+class CustomerImporter(BaseImporter):
+    """
+    Columns: name, customer_type, email, phone, mobile, address, city,
+    company_name, tax_id, notes, is_active. Customers have no natural key,
+    so every valid row creates a new customer.
+    """
+    model = Customer
+
+    def parse_row(self, row):
+        return Customer(
+            name=self.text(row, 'name', required=True, max_length=255),
+            customer_type=self.choice(row, 'customer_type', CUSTOMER_TYPE_CHOICES, 'individual'),
+            email=self.text(row, 'email', max_length=254),
+            phone=self.text(row, 'phone', max_length=20),
+            mobile=self.text(row, 'mobile', max_length=20),
+            address=self.text(row, 'address'),
+            city=self.text(row, 'city', max_length=100),
+            company_name=self.text(row, 'company_name', max_length=255),
+            tax_id=self.text(row, 'tax_id', max_length=50),
+            notes=self.text(row, 'notes'),
+            is_active=self.boolean(row, 'is_active', True),
+        )
+
+
+class OpeningStockImporter(BaseImporter):
+    """
+    Columns: product (internal_reference), location (WAREHOUSE/LOCATION code,
+    as shown in the stock list), quantity, unit_cost. Sets the on-hand
+    quantity of the product at that internal location; unit_cost defaults to
+    the product's standard price.
+    """
+    model = StockQuant
+
+    def load_maps(self):
+        self.products = {}
+        self.standard_prices = {}
+        for pk, ref, price in Product.objects.exclude(internal_reference=None).values_list(
+            'id', 'internal_reference', 'standard_price'
+        ):
+            self.products[ref.lower()] = pk
+            self.standard_prices[pk] = price
+        self.locations = {}
+        for pk, code, warehouse_code in Location.objects.filter(location_type='internal').values_list(
+            'id', 'code', 'warehouse__code'
+        ):
+            self.locations[(f'{warehouse_code}/{code}' if warehouse_code else code).lower()] = pk
+
+    def parse_row(self, row):
+        product_id = self.lookup(self.products, row, 'product', required=True)
+        quantity = self.decimal(row, 'quantity')
+        if quantity is None:
+            raise ValueError('quantity is required')
+        if quantity < 0:
+            raise ValueError('quantity: must not be negative')
+        return StockQuant(
+            product_id=product_id,
+            location_id=self.lookup(self.locations, row, 'location', required=True),
+            quantity=quantity,
+            unit_cost=self.decimal(row, 'unit_cost', self.standard_prices[product_id]),
+        )
+
+    def natural_key(self, obj):
+        return (obj.product_id, obj.location_id)
+
+    def write(self, objs):
+        # StockQuant has no unique constraint on (product, location), so
+        # match existing quants here and split into update and insert
+        existing = {}
+        for pk, product_id, location_id in StockQuant.objects.filter(
+            product_id__in={obj.product_id for obj in objs},
+            location_id__in={obj.location_id for obj in objs},
+        ).order_by('incoming_date').values_list('id', 'product_id', 'location_id'):
+            existing.setdefault((product_id, location_id), pk)
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for obj in objs:
+            pk = existing.get(self.natural_key(obj))
+            if pk is None:
+                to_create.append(obj)
+            else:
+                obj.id = pk
+                obj.updated_at = now
+                to_update.append(obj)
+
+        StockQuant.objects.bulk_create(to_create)
+        StockQuant.objects.bulk_update(to_update, ['quantity', 'unit_cost', 'actor', 'updated_at'])
+        StockValuationService.reset(objs)
+        changes = defaultdict(set)
+        for obj in objs:
+            changes[obj.location_id].add(obj.product_id)
+        stock_changed.send(sender=StockQuant, changes=dict(changes))
+        self.result.created += len(to_create)
+        self.result.updated += len(to_update)
+
+
+IMPORTERS = {
+    'products': ProductImporter,
+    'vendors': VendorImporter,
+    'vendor_products': VendorProductImporter,
+    'customers': CustomerImporter,
+    'opening_stock': OpeningStockImporter,
+}
+
+
+def import_file(kind, fileobj, file_format='csv', actor=None, chunk_size=2000):
+    """Run the importer for `kind` over a text stream and return its ImportResult"""
+    try:
+        importer_class = IMPORTERS[kind]
+    except KeyError:
+        raise ValueError(f'Unknown import type: {kind}')
+    importer = importer_class(actor=actor, chunk_size=chunk_size)
+    return importer.run(read_rows(fileobj, file_format))
@@ -0,0 +1,68 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bulk_import.importers import IMPORTERS, detect_format, import_file
+from apps.bulk_import.tasks import bulk_import_task
+
+
+class Command(BaseCommand):
+    help = 'Import products, vendors, vendor products, customers or opening stock from CSV/JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--actor', help='Username recorded as the actor of imported rows')
+        parser.add_argument('--errors', help='Write row-level errors to this CSV file')
+        parser.add_argument('--queue', action='store_true', help='Run in the huey worker instead')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+
+        actor = None
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+            if actor is None:
+                raise CommandError(f'Unknown user: {options["actor"]}')
+
+        if options['queue']:
+            bulk_import_task(
+                options['kind'], path, file_format,
+                actor_id=actor.pk if actor else None, chunk_size=options['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ Queued {options["kind"]} import of {path}'))
+            return
+
+        start = time.perf_counter()
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as fileobj:
+                result = import_file(
+                    options['kind'], fileobj, file_format, actor=actor, chunk_size=options['chunk_size']
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {result.created} created, {result.updated} updated in {elapsed:.1f}s'
+        ))
+        if not result.errors:
+            return
+
+        self.stdout.write(self.style.WARNING(f'  {len(result.errors)} rows skipped'))
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as fileobj:
+                writer = csv.writer(fileobj)
+                writer.writerow(['row', 'error'])
+                writer.writerows(result.errors)
+            self.stdout.write(f'  Errors written to {options["errors"]}')
+        else:
+            for row_number, error in result.errors[:20]:
+                self.stdout.write(f'    row {row_number}: {error}')
+            if len(result.errors) > 20:
+                self.stdout.write('    ... use --errors to write the full list')
@@ -0,0 +1,14 @@
+from django.contrib.auth.models import User
+from huey.contrib.djhuey import task
+
+from .importers import detect_format, import_file
+
+
+@task()
+def bulk_import_task(kind, path, file_format=None, actor_id=None, chunk_size=2000):
+    actor = User.objects.filter(pk=actor_id).first() if actor_id else None
+    with open(path, newline='', encoding='utf-8-sig') as fileobj:
+        result = import_file(
+            kind, fileobj, file_format or detect_format(path), actor=actor, chunk_size=chunk_size
+        )
+    return result.as_dict()
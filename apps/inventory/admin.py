@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    Warehouse, Location, StockQuant, StockMove, 
+    Warehouse, Location, StockQuant, StockValuationLayer, ProductCost, StockMove, 
     StockPicking, StockPickingLine, StockAdjustment, StockAdjustmentLine
 )
 
@@ -26,6 +26,22 @@ class StockQuantAdmin(admin.ModelAdmin):
     search_fields = ('product__name', 'product__internal_reference')
 
 
+@admin.register(StockValuationLayer)
+class StockValuationLayerAdmin(admin.ModelAdmin):
+    list_display = ('product', 'location', 'incoming_date', 'quantity', 'remaining_quantity', 'unit_cost')
+    list_filter = ('location__warehouse', 'location')
+    search_fields = ('product__name', 'product__internal_reference')
+    list_select_related = ('product', 'location__warehouse')
+
+
+@admin.register(ProductCost)
+class ProductCostAdmin(admin.ModelAdmin):
+    list_display = ('product', 'warehouse', 'quantity', 'value', 'average_cost', 'updated_at')
+    list_filter = ('warehouse',)
+    search_fields = ('product__name', 'product__internal_reference')
+    list_select_related = ('product', 'warehouse')
+
+
 @admin.register(StockMove)
 class StockMoveAdmin(admin.ModelAdmin):
     list_display = ('reference', 'product', 'location_src', 'location_dest', 'quantity', 'quantity_done', 'state')
@@ -6,3 +6,5 @@ class InventoryConfig(AppConfig):
     name = 'apps.inventory'
     verbose_name = 'Inventory'
 
+    def ready(self):
+        from . import signals  # noqa: F401
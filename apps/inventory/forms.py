@@ -1,4 +1,5 @@
 from django import forms
+from core.widgets import RemoteSelect
 from .models import Warehouse, Location, StockPicking, StockPickingLine, StockAdjustment, StockAdjustmentLine
 
 
@@ -94,7 +95,7 @@ class StockPickingLineForm(forms.ModelForm):
         model = StockPickingLine
         fields = ['product', 'quantity']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'type': 'stockable'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'quantity': forms.NumberInput(attrs={
@@ -144,7 +145,7 @@ class StockAdjustmentLineForm(forms.ModelForm):
         model = StockAdjustmentLine
         fields = ['product', 'counted_qty']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'type': 'stockable'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'counted_qty': forms.NumberInput(attrs={
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services import ProductCostService
+from apps.inventory.tasks import rebuild_product_costs_task
+
+
+class Command(BaseCommand):
+    help = 'Recompute the quantity and stock value of every product per warehouse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='store_true', help='Run in the huey worker instead')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            rebuild_product_costs_task()
+            self.stdout.write(self.style.SUCCESS('✓ Queued product cost rebuild'))
+            return
+
+        start = time.perf_counter()
+        rows = ProductCostService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {rows} product cost rows written in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:16
+
+import core.utils
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('products', '0003_productbarcode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuationLayer',
+            fields=[
+                ('id', models.CharField(default=core.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.DecimalField(decimal_places=2, help_text='Quantity received', max_digits=12)),
+                ('remaining_quantity', models.DecimalField(decimal_places=2, help_text='Quantity not consumed yet', max_digits=12)),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('incoming_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_layers', to='inventory.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_layers', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'location', 'incoming_date'],
+                'indexes': [models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['product', 'location', 'incoming_date'], name='inventory_svl_open_fifo_idx')],
+            },
+        ),
+    ]
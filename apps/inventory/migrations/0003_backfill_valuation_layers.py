@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def backfill_layers(apps, schema_editor):
+    """One opening layer per internal quant of a FIFO product, at the quant's cost and date"""
+    StockQuant = apps.get_model('inventory', 'StockQuant')
+    StockValuationLayer = apps.get_model('inventory', 'StockValuationLayer')
+
+    quants = StockQuant.objects.filter(
+        product__cost_method='fifo',
+        location__location_type='internal',
+        quantity__gt=0,
+    ).values_list('product_id', 'location_id', 'quantity', 'unit_cost', 'incoming_date')
+    batch = []
+    for product_id, location_id, quantity, unit_cost, incoming_date in quants.iterator(chunk_size=2000):
+        batch.append(StockValuationLayer(
+            product_id=product_id,
+            location_id=location_id,
+            quantity=quantity,
+            remaining_quantity=quantity,
+            unit_cost=unit_cost,
+            incoming_date=incoming_date,
+        ))
+        if len(batch) >= 2000:
+            StockValuationLayer.objects.bulk_create(batch)
+            batch = []
+    StockValuationLayer.objects.bulk_create(batch)
+
+
+def remove_layers(apps, schema_editor):
+    apps.get_model('inventory', 'StockValuationLayer').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stockvaluationlayer'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_layers, remove_layers),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:19
+
+import core.utils
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_backfill_valuation_layers'),
+        ('products', '0003_productbarcode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCost',
+            fields=[
+                ('id', models.CharField(default=core.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='costs', to='products.product')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_costs', to='inventory.warehouse')),
+            ],
+            options={
+                'ordering': ['product', 'warehouse'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'warehouse'), name='productcost_product_warehouse_unique')],
+            },
+        ),
+    ]
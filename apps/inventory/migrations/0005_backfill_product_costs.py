@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+
+def backfill_costs(apps, schema_editor):
+    """ProductCost rows from the current quants and FIFO layers, as ProductCostService.rebuild writes them"""
+    StockQuant = apps.get_model('inventory', 'StockQuant')
+    StockValuationLayer = apps.get_model('inventory', 'StockValuationLayer')
+    ProductCost = apps.get_model('inventory', 'ProductCost')
+
+    layers = {
+        (product_id, warehouse_id): value
+        for product_id, warehouse_id, value in StockValuationLayer.objects.filter(
+            location__location_type='internal', location__warehouse__isnull=False, remaining_quantity__gt=0,
+        ).order_by().values('product_id', 'location__warehouse_id').annotate(
+            total_value=Sum(F('remaining_quantity') * F('unit_cost'))
+        ).values_list('product_id', 'location__warehouse_id', 'total_value')
+    }
+    quants = StockQuant.objects.filter(
+        location__location_type='internal', location__warehouse__isnull=False,
+    ).order_by().values(
+        'product_id', 'location__warehouse_id', 'product__cost_method'
+    ).annotate(
+        total_quantity=Sum('quantity'),
+        total_value=Sum(Case(
+            When(quantity__gt=0, then=F('quantity') * F('unit_cost')),
+            default=Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=16, decimal_places=2),
+        )),
+    ).values_list('product_id', 'location__warehouse_id', 'product__cost_method', 'total_quantity', 'total_value')
+
+    rows = []
+    for product_id, warehouse_id, cost_method, quantity, value in quants:
+        if cost_method == 'fifo':
+            value = layers.get((product_id, warehouse_id))
+        rows.append(ProductCost(
+            product_id=product_id,
+            warehouse_id=warehouse_id,
+            quantity=quantity or Decimal('0.00'),
+            value=(value or Decimal('0.00')).quantize(Decimal('0.01')),
+        ))
+    ProductCost.objects.bulk_create(rows, batch_size=2000)
+
+
+def remove_costs(apps, schema_editor):
+    apps.get_model('inventory', 'ProductCost').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_productcost'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_costs, remove_costs),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from decimal import Decimal
+from django.utils import timezone
 
 from core.models import BaseModel
 from apps.products.models import Product
@@ -154,6 +155,102 @@ class StockQuant(BaseModel):
         return self.quantity * self.unit_cost
 
 
+class StockValuationLayer(BaseModel):
+    """
+    One receipt of a FIFO-costed product at an internal location
+
+    Outgoing stock consumes `remaining_quantity` oldest first; the stock's
+    value is the sum of remaining_quantity * unit_cost over open layers.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='valuation_layers'
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='valuation_layers'
+    )
+    quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text='Quantity received'
+    )
+    remaining_quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text='Quantity not consumed yet'
+    )
+    unit_cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    incoming_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['product', 'location', 'incoming_date']
+        indexes = [
+            # Open layers in FIFO order; consumed layers are never scanned again
+            models.Index(
+                fields=['product', 'location', 'incoming_date'],
+                name='inventory_svl_open_fifo_idx',
+                condition=models.Q(remaining_quantity__gt=0)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} @ {self.location}: {self.remaining_quantity}/{self.quantity} @ {self.unit_cost}"
+
+
+class ProductCost(BaseModel):
+    """
+    On-hand quantity and stock value of a product in a warehouse
+
+    Derived from the quants (and FIFO layers) at the warehouse's internal
+    locations and kept current by ProductCostService.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='costs'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='product_costs'
+    )
+    quantity = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    value = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+
+    class Meta:
+        ordering = ['product', 'warehouse']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'warehouse'],
+                name='productcost_product_warehouse_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} @ {self.warehouse.code}: {self.value}"
+
+    @property
+    def average_cost(self):
+        if self.quantity <= 0:
+            return Decimal('0.00')
+        return (self.value / self.quantity).quantize(Decimal('0.01'))
+
+
 class StockMove(BaseModel):
     """Stock movement record"""
     reference = models.CharField(max_length=50, blank=True)
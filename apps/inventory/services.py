@@ -1,14 +1,30 @@
 """
 Stock calculation and business logic services
 """
+import threading
+from collections import defaultdict
 from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Sum, F
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from .models import StockQuant, StockMove, Location
+from core.instrumentation import record_cache_hit, record_cache_miss
+from core.metrics import RESERVATION_FAILURES, instrument_service
 
+from .models import Location, ProductCost, StockMove, StockQuant, StockValuationLayer, Warehouse
+from .signals import stock_changed
 
+_pending_costs = threading.local()
+
+
+def _valuation_key(warehouse_id):
+    return f'stock-valuation:v1:{warehouse_id or "all"}'
+
+
+@instrument_service
 class StockService:
     """Service class for stock operations"""
     
@@ -113,8 +129,130 @@ class StockService:
                 quant.unit_cost = (old_value + new_value) / quant.quantity
         
         quant.save()
+        if quantity > 0:
+            StockValuationService.receive(product, location, quantity, unit_cost)
+        elif quantity < 0:
+            StockValuationService.consume(location, {product: -quantity})
+        StockService._stock_changed(location, [product.pk])
         return quant
     
+    @staticmethod
+    def _lock_quants(location, products):
+        """{product id: [quants]} at `location`, locked, oldest first"""
+        quants = defaultdict(list)
+        for quant in StockQuant.objects.filter(
+            product__in=list(products),
+            location=location
+        ).select_for_update().order_by('incoming_date', 'pk'):
+            quants[quant.product_id].append(quant)
+        return quants
+    
+    @staticmethod
+    def _add_to_quants(**changes):
+        """Add {quant pk: amount} to each named field of the quants, in one UPDATE"""
+        changes = {field: amounts for field, amounts in changes.items() if amounts}
+        if not changes:
+            return
+        StockQuant.objects.filter(pk__in=set().union(*changes.values())).update(
+            **{
+                field: Case(
+                    *[When(pk=pk, then=F(field) + Value(amount)) for pk, amount in amounts.items()],
+                    default=F(field),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+                for field, amounts in changes.items()
+            },
+            updated_at=timezone.now()
+        )
+    
+    @staticmethod
+    def _stock_changed(location, product_ids):
+        if location.location_type == 'internal':
+            stock_changed.send(sender=StockQuant, changes={location.pk: set(product_ids)})
+    
+    @staticmethod
+    @transaction.atomic
+    def deduct_stock(location, quantities, reserved=False):
+        """
+        Remove several products from a location in one batch
+        
+        Args:
+            location: Location instance
+            quantities: {Product: quantity to remove}
+            reserved: the quantities were reserved earlier (reserve_stock_many);
+                release the reservation as the stock leaves
+        
+        The quants are locked in one query and every product must have the
+        quantity available, else ValueError is raised and nothing changes.
+        Each quantity is taken from the oldest quants first, and all quants
+        are updated with a single UPDATE.
+        """
+        quants = StockService._lock_quants(location, quantities)
+        
+        taken = defaultdict(Decimal)
+        released = defaultdict(Decimal)
+        for product, quantity in quantities.items():
+            product_quants = quants[product.pk]
+            available = sum(q.available_quantity for q in product_quants)
+            if reserved:
+                available += sum(q.reserved_quantity for q in product_quants)
+            if available < quantity:
+                raise ValueError(f"Insufficient stock for {product.name}. Available: {available}")
+            
+            remaining = quantity
+            if reserved:
+                for quant in product_quants:
+                    release = min(quant.reserved_quantity, remaining)
+                    if release > 0:
+                        taken[quant.pk] += release
+                        released[quant.pk] += release
+                        remaining -= release
+            for quant in product_quants:
+                if remaining <= 0:
+                    break
+                take = min(quant.available_quantity, remaining)
+                if take > 0:
+                    taken[quant.pk] += take
+                    remaining -= take
+        
+        StockService._add_to_quants(
+            quantity={pk: -amount for pk, amount in taken.items()},
+            reserved_quantity={pk: -amount for pk, amount in released.items()}
+        )
+        StockValuationService.consume(location, quantities)
+        StockService._stock_changed(location, [product.pk for product in quantities])
+    
+    @staticmethod
+    @transaction.atomic
+    def reserve_stock_many(location, quantities):
+        """
+        Reserve several products at a location in one batch
+        
+        Like reserve_stock for each product, but with one locking query and
+        one UPDATE. Raises ValueError naming the first product short of
+        stock; nothing is reserved then.
+        """
+        quants = StockService._lock_quants(location, quantities)
+        
+        reserve = defaultdict(Decimal)
+        for product, quantity in quantities.items():
+            available = sum(q.available_quantity for q in quants[product.pk])
+            if available < quantity:
+                RESERVATION_FAILURES.inc()
+                raise ValueError(f"Insufficient stock for {product.name}. Available: {available}")
+            
+            remaining = quantity
+            for quant in quants[product.pk]:
+                if remaining <= 0:
+                    break
+                amount = min(quant.available_quantity, remaining)
+                if amount > 0:
+                    reserve[quant.pk] += amount
+                    remaining -= amount
+        
+        StockService._add_to_quants(reserved_quantity=reserve)
+        StockService._stock_changed(location, [product.pk for product in quantities])
+    
     @staticmethod
     @transaction.atomic
     def reserve_stock(product, location, quantity):
@@ -137,6 +275,7 @@ class StockService:
         available = sum(q.available_quantity for q in quants)
         
         if available < quantity:
+            RESERVATION_FAILURES.inc()
             return False
         
         remaining = quantity
@@ -149,6 +288,7 @@ class StockService:
             quant.save()
             remaining -= reserve
         
+        StockService._stock_changed(location, [product.pk])
         return True
     
     @staticmethod
@@ -172,6 +312,8 @@ class StockService:
             quant.reserved_quantity -= release
             quant.save()
             remaining -= release
+        
+        StockService._stock_changed(location, [product.pk])
     
     @staticmethod
     @transaction.atomic
@@ -185,6 +327,11 @@ class StockService:
         if move.state == 'done':
             raise ValueError("Move already processed")
         
+        # FIFO stock keeps the cost of the layers it leaves
+        unit_cost = move.unit_price
+        if not unit_cost and StockValuationService.is_valued(move.product, move.location_src):
+            unit_cost = StockValuationService.fifo_cost(move.product, move.location_src, move.quantity_done)
+        
         # Remove from source
         StockService.update_stock(
             move.product,
@@ -197,7 +344,7 @@ class StockService:
             move.product,
             move.location_dest,
             move.quantity_done,
-            unit_cost=move.unit_price
+            unit_cost=unit_cost
         )
         
         # Update move
@@ -205,6 +352,27 @@ class StockService:
         move.date_done = timezone.now()
         move.save()
     
+    @staticmethod
+    def with_available(products, warehouse=None):
+        """
+        Annotate `available` on a Product queryset: unreserved quantity at
+        internal locations (of `warehouse`), 0 for products without quants
+        """
+        quants = StockQuant.objects.filter(
+            product=OuterRef('pk'),
+            location__location_type='internal'
+        )
+        if warehouse:
+            quants = quants.filter(location__warehouse=warehouse)
+        
+        available = quants.order_by().values('product').annotate(
+            total=Sum(F('quantity') - F('reserved_quantity'))
+        ).values('total')
+        return products.annotate(available=Coalesce(
+            Subquery(available, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Value(Decimal('0.00'))
+        ))
+    
     @staticmethod
     def get_low_stock_products(warehouse=None):
         """
@@ -212,39 +380,337 @@ class StockService:
         """
         from apps.products.models import Product
         
-        products = Product.objects.filter(
+        products = StockService.with_available(Product.objects.filter(
             is_active=True,
             product_type='stockable',
             reorder_point__gt=0
-        )
+        ), warehouse=warehouse).filter(available__lte=F('reorder_point'))
         
-        low_stock = []
-        for product in products:
-            stock = StockService.get_stock_level(product, warehouse=warehouse)
-            if stock['available'] <= product.reorder_point:
-                low_stock.append({
-                    'product': product,
-                    'available': stock['available'],
-                    'reorder_point': product.reorder_point,
-                    'reorder_qty': product.reorder_qty
-                })
-        
-        return low_stock
+        return [
+            {
+                'product': product,
+                'available': product.available,
+                'reorder_point': product.reorder_point,
+                'reorder_qty': product.reorder_qty
+            }
+            for product in products
+        ]
     
     @staticmethod
     def get_stock_valuation(warehouse=None):
         """
         Get total stock valuation
+        
+        FIFO products are valued by their open valuation layers, the others
+        by quantity times the quant's unit cost. Read from the ProductCost
+        totals (ProductCostService), not from the quants.
         """
-        quants = StockQuant.objects.filter(
-            location__location_type='internal',
-            quantity__gt=0
+        return ProductCostService.valuation(warehouse)
+
+
+@instrument_service
+class StockValuationService:
+    """
+    FIFO valuation layers
+
+    Every receipt of a product with cost_method 'fifo' at an internal
+    location opens a StockValuationLayer; stock leaving the location
+    consumes the open layers oldest first. Consumption locks and reads only
+    the open layers of the products involved (partial index
+    inventory_svl_open_fifo_idx) and writes them back with one UPDATE.
+    """
+    
+    @staticmethod
+    def is_valued(product, location):
+        return product.cost_method == 'fifo' and location.location_type == 'internal'
+    
+    @staticmethod
+    def receive(product, location, quantity, unit_cost=None):
+        """Open a layer for `quantity` received at `location`"""
+        if quantity <= 0 or not StockValuationService.is_valued(product, location):
+            return None
+        return StockValuationLayer.objects.create(
+            product=product,
+            location=location,
+            quantity=quantity,
+            remaining_quantity=quantity,
+            unit_cost=unit_cost or product.standard_price
         )
+    
+    @staticmethod
+    def _open_layers(location, product_ids, lock=False):
+        """{product id: [open layers]} at `location`, oldest first"""
+        layers = StockValuationLayer.objects.filter(
+            product_id__in=list(product_ids),
+            location=location,
+            remaining_quantity__gt=0
+        ).order_by('product_id', 'incoming_date', 'pk')
+        if lock:
+            layers = layers.select_for_update()
+        by_product = defaultdict(list)
+        for layer in layers:
+            by_product[layer.product_id].append(layer)
+        return by_product
+    
+    @staticmethod
+    def _take(layers, quantity):
+        """[(layer, amount)] taking `quantity` from `layers` oldest first, and the quantity left over"""
+        taken = []
+        for layer in layers:
+            if quantity <= 0:
+                break
+            amount = min(layer.remaining_quantity, quantity)
+            taken.append((layer, amount))
+            quantity -= amount
+        return taken, quantity
+    
+    @staticmethod
+    def fifo_cost(product, location, quantity):
+        """Unit cost of the next `quantity` to leave `location`, without consuming it"""
+        if quantity <= 0:
+            return product.standard_price
+        layers = StockValuationService._open_layers(location, [product.pk])[product.pk]
+        taken, missing = StockValuationService._take(layers, quantity)
+        value = sum(amount * layer.unit_cost for layer, amount in taken) + missing * product.standard_price
+        return (value / quantity).quantize(Decimal('0.01'))
+    
+    @staticmethod
+    def consume(location, quantities):
+        """
+        Consume the open layers for stock leaving `location`; call inside
+        the transaction that moves the stock
         
-        if warehouse:
-            quants = quants.filter(location__warehouse=warehouse)
+        Args:
+            location: Location instance
+            quantities: {Product: quantity leaving}; products not valued
+                FIFO are ignored
+        
+        Returns:
+            {product id: value consumed}. Quantity beyond the open layers
+            (stock from before layers were kept) is valued at the
+            product's standard price.
+        """
+        products = {
+            product: quantity for product, quantity in quantities.items()
+            if quantity > 0 and StockValuationService.is_valued(product, location)
+        }
+        if not products:
+            return {}
+        
+        layers = StockValuationService._open_layers(location, [product.pk for product in products], lock=True)
+        remaining = {}
+        values = {}
+        for product, quantity in products.items():
+            taken, missing = StockValuationService._take(layers[product.pk], quantity)
+            for layer, amount in taken:
+                remaining[layer.pk] = layer.remaining_quantity - amount
+            values[product.pk] = sum(amount * layer.unit_cost for layer, amount in taken) + missing * product.standard_price
+        
+        if remaining:
+            StockValuationLayer.objects.filter(pk__in=list(remaining)).update(
+                remaining_quantity=Case(
+                    *[When(pk=pk, then=Value(quantity)) for pk, quantity in remaining.items()],
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                ),
+                updated_at=timezone.now()
+            )
+        return values
+    
+    @staticmethod
+    @transaction.atomic
+    def reset(quants):
+        """
+        Replace the open layers of FIFO products with one layer per quant
+        
+        For stock set to an absolute quantity (opening stock import):
+        `quants` are StockQuant instances carrying product_id, location_id,
+        quantity and unit_cost.
+        """
+        from apps.products.models import Product
+        
+        fifo = set(Product.objects.filter(
+            pk__in={quant.product_id for quant in quants},
+            cost_method='fifo'
+        ).values_list('pk', flat=True))
+        quants = [quant for quant in quants if quant.product_id in fifo]
+        if not quants:
+            return
         
-        return quants.aggregate(
-            total_value=Sum(F('quantity') * F('unit_cost'))
-        )['total_value'] or Decimal('0.00')
+        pairs = {(quant.product_id, quant.location_id) for quant in quants}
+        closing = [
+            pk for pk, product_id, location_id in StockValuationLayer.objects.filter(
+                product_id__in={product_id for product_id, _ in pairs},
+                location_id__in={location_id for _, location_id in pairs},
+                remaining_quantity__gt=0
+            ).values_list('pk', 'product_id', 'location_id')
+            if (product_id, location_id) in pairs
+        ]
+        StockValuationLayer.objects.filter(pk__in=closing).update(
+            remaining_quantity=Decimal('0.00'),
+            updated_at=timezone.now()
+        )
+        StockValuationLayer.objects.bulk_create([
+            StockValuationLayer(
+                product_id=quant.product_id,
+                location_id=quant.location_id,
+                quantity=quant.quantity,
+                remaining_quantity=quant.quantity,
+                unit_cost=quant.unit_cost,
+                actor=quant.actor
+            )
+            for quant in quants if quant.quantity > 0
+        ], batch_size=1000)
+
 
+@instrument_service
+class ProductCostService:
+    """
+    Keep ProductCost, the quantity and value of every product per
+    warehouse, up to date
+
+    Stock changes (inventory.signals.stock_changed) are collected during
+    the transaction and, once it commits, only the changed products in the
+    changed warehouses are recomputed: two aggregate queries (quants, FIFO
+    layers) and one upsert. Valuation totals per warehouse are cached and
+    deleted with every refresh. Stock at internal locations outside any
+    warehouse has no ProductCost row; it is aggregated directly into the
+    all-warehouses total.
+    """
+    
+    @staticmethod
+    def mark_stale(changes):
+        """Queue {location id: product ids} for a refresh when the transaction commits"""
+        pending = getattr(_pending_costs, 'changes', None)
+        if pending is None:
+            pending = _pending_costs.changes = defaultdict(set)
+        for location_id, product_ids in changes.items():
+            pending[location_id].update(product_ids)
+        transaction.on_commit(ProductCostService.flush)
+    
+    @staticmethod
+    def flush():
+        """Refresh what mark_stale queued; later callbacks of the same commit find nothing left"""
+        changes = getattr(_pending_costs, 'changes', None)
+        _pending_costs.changes = None
+        if changes:
+            ProductCostService.refresh(changes)
+    
+    @staticmethod
+    def refresh(changes):
+        """Recompute the changed products in the warehouses of the changed locations; returns rows written"""
+        warehouses = dict(Location.objects.filter(
+            pk__in=list(changes),
+            location_type='internal'
+        ).values_list('pk', 'warehouse_id'))
+        targets = {
+            (product_id, warehouses[location_id])
+            for location_id, product_ids in changes.items() if warehouses.get(location_id)
+            for product_id in product_ids
+        }
+        if not targets:
+            if warehouses:
+                # Only locations outside any warehouse, counted in the overall total
+                ProductCostService.invalidate([])
+            return 0
+        
+        warehouse_ids = {warehouse_id for _, warehouse_id in targets}
+        totals = ProductCostService._totals(Q(
+            product_id__in={product_id for product_id, _ in targets},
+            location__warehouse_id__in=warehouse_ids
+        ))
+        rows = ProductCostService._write({key: totals.get(key, (Decimal('0.00'), Decimal('0.00'))) for key in targets})
+        ProductCostService.invalidate(warehouse_ids)
+        return rows
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        """Recompute every product in every warehouse"""
+        ProductCost.objects.all().delete()
+        rows = ProductCostService._write(ProductCostService._totals(Q()))
+        ProductCostService.invalidate(Warehouse.objects.values_list('pk', flat=True))
+        return rows
+    
+    @staticmethod
+    def _totals(condition):
+        """{(product id, warehouse id): (quantity, value)} over the warehouses' internal locations"""
+        layers = {
+            (product_id, warehouse_id): value
+            for product_id, warehouse_id, value in StockValuationLayer.objects.filter(
+                condition,
+                location__location_type='internal',
+                location__warehouse__isnull=False,
+                remaining_quantity__gt=0
+            ).order_by().values('product_id', 'location__warehouse_id').annotate(
+                total_value=Sum(F('remaining_quantity') * F('unit_cost'))
+            ).values_list('product_id', 'location__warehouse_id', 'total_value')
+        }
+        
+        totals = {}
+        for product_id, warehouse_id, cost_method, quantity, value in StockQuant.objects.filter(
+            condition,
+            location__location_type='internal',
+            location__warehouse__isnull=False
+        ).order_by().values('product_id', 'location__warehouse_id', 'product__cost_method').annotate(
+            total_quantity=Sum('quantity'),
+            total_value=Sum(Case(
+                When(quantity__gt=0, then=F('quantity') * F('unit_cost')),
+                default=Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=16, decimal_places=2)
+            ))
+        ).values_list('product_id', 'location__warehouse_id', 'product__cost_method', 'total_quantity', 'total_value'):
+            key = (product_id, warehouse_id)
+            if cost_method == 'fifo':
+                value = layers.get(key)
+            totals[key] = (quantity or Decimal('0.00'), (value or Decimal('0.00')).quantize(Decimal('0.01')))
+        return totals
+    
+    @staticmethod
+    def _write(totals):
+        rows = [
+            ProductCost(product_id=product_id, warehouse_id=warehouse_id, quantity=quantity, value=value)
+            for (product_id, warehouse_id), (quantity, value) in totals.items()
+        ]
+        ProductCost.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['product', 'warehouse'],
+            update_fields=['quantity', 'value', 'updated_at']
+        )
+        return len(rows)
+    
+    @staticmethod
+    def invalidate(warehouse_ids):
+        cache.delete_many([_valuation_key(None)] + [_valuation_key(pk) for pk in warehouse_ids])
+    
+    @staticmethod
+    def valuation(warehouse=None):
+        """Total stock value, of one warehouse or of all of them"""
+        key = _valuation_key(warehouse.pk if warehouse else None)
+        value = cache.get(key)
+        if value is not None:
+            record_cache_hit()
+            return value
+        
+        record_cache_miss()
+        costs = ProductCost.objects.all()
+        if warehouse:
+            costs = costs.filter(warehouse=warehouse)
+        value = costs.aggregate(total_value=Sum('value'))['total_value'] or Decimal('0.00')
+        if not warehouse:
+            value += ProductCostService._unassigned_value()
+        cache.set(key, value, getattr(settings, 'STOCK_VALUATION_CACHE_TIMEOUT', 3600))
+        return value
+    
+    @staticmethod
+    def _unassigned_value():
+        """Value of the stock at internal locations that belong to no warehouse"""
+        unassigned = Q(location__location_type='internal', location__warehouse__isnull=True)
+        value = StockQuant.objects.filter(unassigned, quantity__gt=0).exclude(
+            product__cost_method='fifo'
+        ).aggregate(total_value=Sum(F('quantity') * F('unit_cost')))['total_value'] or Decimal('0.00')
+        value += StockValuationLayer.objects.filter(
+            unassigned, product__cost_method='fifo', remaining_quantity__gt=0
+        ).aggregate(total_value=Sum(F('remaining_quantity') * F('unit_cost')))['total_value'] or Decimal('0.00')
+        return value.quantize(Decimal('0.01'))
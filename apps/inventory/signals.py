@@ -0,0 +1,13 @@
+from django.dispatch import Signal, receiver
+
+# Sent after quants at internal locations change, by StockService and the
+# stock importer. `changes` is {location id: {product id, ...}}; receivers
+# run inside the caller's transaction.
+stock_changed = Signal()
+
+
+@receiver(stock_changed)
+def refresh_product_costs(sender, changes, **kwargs):
+    from .services import ProductCostService
+
+    ProductCostService.mark_stale(changes)
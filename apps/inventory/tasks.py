@@ -0,0 +1,15 @@
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, task
+
+from .services import ProductCostService
+
+
+@task()
+def rebuild_product_costs_task():
+    return ProductCostService.rebuild()
+
+
+@db_periodic_task(crontab(hour='3', minute='30'))
+def nightly_product_cost_rebuild():
+    # Catches quants changed outside StockService (admin, seed and load scripts)
+    return ProductCostService.rebuild()
@@ -2,10 +2,11 @@ from django.urls import path
 from .views import (
     WarehouseListView, WarehouseCreateView, WarehouseUpdateView, WarehouseDeleteView,
     LocationListView, LocationCreateView, LocationUpdateView, LocationDeleteView,
-    StockListView, StockMoveListView,
+    StockListView, StockMoveListView, StockMoveExportView,
     StockPickingListView, StockPickingDetailView, StockPickingCreateView, StockPickingUpdateView,
     StockPickingValidateView, StockPickingLineCreateView,
     StockAdjustmentListView, StockAdjustmentCreateView, StockAdjustmentDetailView,
+    location_choices,
 )
 
 urlpatterns = [
@@ -24,6 +25,7 @@ urlpatterns = [
     # Stock
     path('stock/', StockListView.as_view(), name='stock-list'),
     path('stock/moves/', StockMoveListView.as_view(), name='stock-move-list'),
+    path('stock/moves/export/', StockMoveExportView.as_view(), name='stock-move-export'),
     
     # Stock Pickings
     path('pickings/', StockPickingListView.as_view(), name='picking-list'),
@@ -37,5 +39,8 @@ urlpatterns = [
     path('adjustments/', StockAdjustmentListView.as_view(), name='adjustment-list'),
     path('adjustments/create/', StockAdjustmentCreateView.as_view(), name='adjustment-create'),
     path('adjustments/<str:pk>/', StockAdjustmentDetailView.as_view(), name='adjustment-detail'),
+
+    # API
+    path('api/locations/choices/', location_choices, name='location-choices-api'),
 ]
 
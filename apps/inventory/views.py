@@ -4,8 +4,13 @@ from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect
 from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
 
-from core.views import LoginRequiredMixinView
+from core.exports import ExportMixin
+from core.instrumentation import query_budget
+from core.pagination import keyset_page
+from core.views import LoginRequiredMixinView, ReplicaReadMixin, read_from_replica
 from apps.employees.models import EmployeeSetting
 from .models import Warehouse, Location, StockQuant, StockMove, StockPicking, StockPickingLine, StockAdjustment
 from .forms import WarehouseForm, LocationForm, StockPickingForm, StockPickingLineForm, StockAdjustmentForm
@@ -22,7 +27,7 @@ class BaseContextMixin:
 
 
 # Warehouse Views
-class WarehouseListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class WarehouseListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Warehouse
     template_name = "inventory/warehouse_list.html"
     context_object_name = "warehouses"
@@ -88,7 +93,7 @@ class WarehouseDeleteView(LoginRequiredMixinView, BaseContextMixin, DeleteView):
 
 
 # Location Views
-class LocationListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class LocationListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Location
     template_name = "inventory/location_list.html"
     context_object_name = "locations"
@@ -134,7 +139,7 @@ class LocationDeleteView(LoginRequiredMixinView, BaseContextMixin, DeleteView):
 
 
 # Stock Views
-class StockListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class StockListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     template_name = "inventory/stock_list.html"
     context_object_name = "stock_items"
     
@@ -161,11 +166,12 @@ class StockListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return context
 
 
-class StockMoveListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class StockMoveListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = StockMove
     template_name = "inventory/stock_move_list.html"
     context_object_name = "moves"
     paginate_by = 50
+    query_budget = 10
     
     def get_queryset(self):
         queryset = StockMove.objects.select_related(
@@ -183,8 +189,28 @@ class StockMoveListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
+class StockMoveExportView(ExportMixin, StockMoveListView):
+    export_filename = 'stock-moves'
+    export_fields = [
+        ('Reference', 'reference'),
+        ('Product Code', 'product__internal_reference'),
+        ('Product', 'product__name'),
+        ('From', 'location_src__code'),
+        ('To', 'location_dest__code'),
+        ('Quantity', 'quantity'),
+        ('Quantity Done', 'quantity_done'),
+        ('Unit Price', 'unit_price'),
+        ('Type', 'move_type'),
+        ('State', 'state'),
+        ('Origin', 'origin'),
+        ('Scheduled Date', 'scheduled_date'),
+        ('Date Done', 'date_done'),
+        ('Created', 'created_at'),
+    ]
+
+
 # Stock Picking Views
-class StockPickingListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class StockPickingListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = StockPicking
     template_name = "inventory/picking_list.html"
     context_object_name = "pickings"
@@ -205,7 +231,7 @@ class StockPickingListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class StockPickingDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class StockPickingDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = StockPicking
     template_name = "inventory/picking_detail.html"
     context_object_name = "picking"
@@ -306,7 +332,7 @@ class StockPickingLineCreateView(LoginRequiredMixinView, BaseContextMixin, Creat
 
 
 # Stock Adjustment Views
-class StockAdjustmentListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class StockAdjustmentListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = StockAdjustment
     template_name = "inventory/adjustment_list.html"
     context_object_name = "adjustments"
@@ -329,7 +355,7 @@ class StockAdjustmentCreateView(LoginRequiredMixinView, BaseContextMixin, Create
         return reverse('adjustment-detail', kwargs={'pk': self.object.pk})
 
 
-class StockAdjustmentDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class StockAdjustmentDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = StockAdjustment
     template_name = "inventory/adjustment_detail.html"
     context_object_name = "adjustment"
@@ -339,3 +365,24 @@ class StockAdjustmentDetailView(LoginRequiredMixinView, BaseContextMixin, Detail
         context['lines'] = self.object.lines.select_related('product', 'product__uom')
         return context
 
+
+
+# API Views
+@query_budget(3)
+@require_http_methods(["GET"])
+@login_required(login_url='/login/')
+@read_from_replica
+def location_choices(request):
+    """Active locations for remote pickers; ?type=internal, ?q= code or name"""
+    queryset = Location.objects.filter(is_active=True).select_related('warehouse')
+    location_type = request.GET.get('type')
+    if location_type:
+        queryset = queryset.filter(location_type=location_type)
+    search = request.GET.get('q', '').strip()
+    if search:
+        queryset = queryset.filter(models.Q(code__icontains=search) | models.Q(name__icontains=search))
+
+    return keyset_page(request, queryset, ('name', 'pk'), lambda location: {
+        'id': location.pk,
+        'text': str(location),
+    })
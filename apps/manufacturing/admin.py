@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BillOfMaterials, BOMLine, ManufacturingOrder, ManufacturingOrderLine
+from .models import BillOfMaterials, BOMAvailability, BOMLine, ManufacturingOrder, ManufacturingOrderLine
 
 
 class BOMLineInline(admin.TabularInline):
@@ -15,6 +15,14 @@ class BillOfMaterialsAdmin(admin.ModelAdmin):
     inlines = [BOMLineInline]
 
 
+@admin.register(BOMAvailability)
+class BOMAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ('bom', 'location', 'max_quantity', 'updated_at')
+    list_filter = ('location',)
+    search_fields = ('bom__reference', 'bom__product__name')
+    list_select_related = ('bom__product', 'location__warehouse')
+
+
 class ManufacturingOrderLineInline(admin.TabularInline):
     model = ManufacturingOrderLine
     extra = 0
@@ -6,3 +6,6 @@ class ManufacturingConfig(AppConfig):
     name = 'apps.manufacturing'
     verbose_name = 'Manufacturing'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,4 +1,5 @@
 from django import forms
+from core.widgets import RemoteSelect
 from .models import BillOfMaterials, BOMLine, ManufacturingOrder
 from apps.products.models import Product
 from apps.inventory.models import Location
@@ -9,7 +10,7 @@ class BOMForm(forms.ModelForm):
         model = BillOfMaterials
         fields = ['product', 'reference', 'quantity', 'bom_type', 'ready_time', 'is_active', 'notes']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'sellable': '1'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'reference': forms.TextInput(attrs={
@@ -52,7 +53,7 @@ class BOMLineForm(forms.ModelForm):
         model = BOMLine
         fields = ['product', 'quantity', 'uom', 'notes']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'type': 'stockable,consumable'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'quantity': forms.NumberInput(attrs={
@@ -84,10 +85,10 @@ class ManufacturingOrderForm(forms.ModelForm):
         fields = ['product', 'bom', 'quantity', 'source_location', 'destination_location', 
                   'scheduled_date', 'priority', 'origin', 'notes']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'sellable': '1'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
-            'bom': forms.Select(attrs={
+            'bom': RemoteSelect('bom-choices-api', forward=['product'], attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'quantity': forms.NumberInput(attrs={
@@ -95,10 +96,10 @@ class ManufacturingOrderForm(forms.ModelForm):
                 'step': '0.01',
                 'min': '0.01'
             }),
-            'source_location': forms.Select(attrs={
+            'source_location': RemoteSelect('location-choices-api', params={'type': 'internal'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
-            'destination_location': forms.Select(attrs={
+            'destination_location': RemoteSelect('location-choices-api', params={'type': 'internal'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'scheduled_date': forms.DateTimeInput(attrs={
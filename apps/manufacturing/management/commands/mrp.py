@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.models import Warehouse
+from apps.manufacturing.mrp import run_mrp, write_proposals
+
+
+class Command(BaseCommand):
+    help = 'Plan manufacturing and purchase orders for all open demand (MRP)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', help='Warehouse code; plan only its stock, orders and demand')
+        parser.add_argument('--output', help='Write the proposals to this CSV file')
+
+    def handle(self, *args, **options):
+        warehouse = None
+        if options['warehouse']:
+            warehouse = Warehouse.objects.filter(code=options['warehouse']).first()
+            if warehouse is None:
+                raise CommandError(f'Unknown warehouse: {options["warehouse"]}')
+
+        start = time.perf_counter()
+        plan = run_mrp(warehouse=warehouse)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {plan.products} products planned in {elapsed:.1f}s: '
+            f'{len(plan.manufacture)} MOs and {len(plan.purchase)} POs proposed'
+        ))
+        if options['output']:
+            with open(options['output'], 'w', newline='') as fileobj:
+                write_proposals(plan, fileobj)
+            self.stdout.write(f'  Proposals written to {options["output"]}')
+        else:
+            for proposal in plan.proposals[:20]:
+                source = f'BOM {proposal.bom_id}' if proposal.bom_id else f'vendor {proposal.vendor_id}'
+                late = '  LATE' if proposal.late else ''
+                self.stdout.write(
+                    f'  {proposal.kind:<11} {proposal.product_id}  {proposal.quantity}  '
+                    f'start {proposal.start_date}, need {proposal.need_date}  ({source}){late}'
+                )
+            if len(plan.proposals) > 20:
+                self.stdout.write('    ... use --output to write the full list')
+
+        if plan.unsourced:
+            self.stdout.write(self.style.WARNING(
+                f'  {len(plan.unsourced)} short products have no BOM and no active vendor'
+            ))
+        if plan.cyclic:
+            self.stdout.write(self.style.WARNING(
+                f'  {len(plan.cyclic)} products skipped: their BOMs form a cycle'
+            ))
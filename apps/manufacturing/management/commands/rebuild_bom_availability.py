@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.manufacturing.services import BOMAvailabilityService, KitService
+from apps.manufacturing.tasks import rebuild_bom_availability_task
+
+
+class Command(BaseCommand):
+    help = 'Recompute the producible quantity of every active BOM at every internal location'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='store_true', help='Run in the huey worker instead')
+
+    def handle(self, *args, **options):
+        # Reload the BOM structure too, e.g. after editing BOMs with raw SQL
+        KitService.invalidate()
+
+        if options['queue']:
+            rebuild_bom_availability_task()
+            self.stdout.write(self.style.SUCCESS('✓ Queued BOM availability rebuild'))
+            return
+
+        start = time.perf_counter()
+        rows = BOMAvailabilityService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {rows} BOM availability rows written in {time.perf_counter() - start:.1f}s'
+        ))
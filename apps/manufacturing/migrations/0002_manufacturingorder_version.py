@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manufacturing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manufacturingorder',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:08
+
+import core.utils
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('manufacturing', '0002_manufacturingorder_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BOMAvailability',
+            fields=[
+                ('id', models.CharField(default=core.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('max_quantity', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Units of the product the available components can make', max_digits=14)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('bom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='manufacturing.billofmaterials')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bom_availability', to='inventory.location')),
+            ],
+            options={
+                'verbose_name': 'BOM Availability',
+                'verbose_name_plural': 'BOM Availability',
+                'constraints': [models.UniqueConstraint(fields=('location', 'bom'), name='bomavailability_location_bom_unique')],
+            },
+        ),
+    ]
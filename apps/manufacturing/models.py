@@ -2,7 +2,7 @@ from django.db import models
 from decimal import Decimal
 from django.utils import timezone
 
-from core.models import BaseModel
+from core.models import BaseModel, VersionedModel
 from apps.products.models import Product, UnitOfMeasure
 from apps.inventory.models import Location
 
@@ -83,6 +83,8 @@ class BillOfMaterials(BaseModel):
     @property
     def component_count(self):
         """Number of components in this BOM"""
+        if 'lines' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.lines.all())
         return self.lines.count()
 
 
@@ -139,7 +141,42 @@ class BOMLine(BaseModel):
         return self.quantity * self.product.standard_price
 
 
-class ManufacturingOrder(BaseModel):
+class BOMAvailability(BaseModel):
+    """
+    How much of a BOM's product its components in stock can make at a location
+
+    Maintained by BOMAvailabilityService from stock changes; there is no row
+    when the location holds none of the components.
+    """
+    bom = models.ForeignKey(
+        BillOfMaterials,
+        on_delete=models.CASCADE,
+        related_name='availability'
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='bom_availability'
+    )
+    max_quantity = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Units of the product the available components can make'
+    )
+
+    class Meta:
+        verbose_name = 'BOM Availability'
+        verbose_name_plural = 'BOM Availability'
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'bom'], name='bomavailability_location_bom_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.bom} @ {self.location}: {self.max_quantity}"
+
+
+class ManufacturingOrder(VersionedModel):
     """Manufacturing Order / Work Order for production"""
     
     reference = models.CharField(max_length=50, unique=True, blank=True)
@@ -0,0 +1,356 @@
+"""
+Material requirements planning
+
+Plans what to manufacture and what to buy for all open demand in one pass.
+Every stockable product gets a slot in flat arrays (stdlib `array`, one
+float per product for on-hand, reserved, gross demand and scheduled
+receipts, one day number for the earliest need). Nine aggregated queries
+fill them; nothing after that touches the database except the vendor
+lookup for the products that end up being bought.
+
+Demand is the undelivered quantity of confirmed sales orders (kits are
+exploded into their components) plus the unconsumed components of open
+manufacturing orders. Supply is the stock at internal locations, the
+unreceived quantity of open purchase orders and the unproduced quantity of
+open manufacturing orders. Reserved stock is already promised, so a
+product's demand counts as at least what is reserved of it.
+
+Products are netted in low-level-code order (each product after every
+product whose BOM uses it), so a proposed manufacturing order adds its
+component requirements, dated at its start, before those components are
+netted. Start and order dates are offset from the need date by the BOM's
+ready time or the vendor's lead time.
+
+Netting is single-bucket: all open supply counts against all open demand,
+and a shortage is dated at its earliest demand.
+"""
+import csv
+import math
+from array import array
+from datetime import date
+from decimal import ROUND_UP, Decimal
+
+from django.db.models import F, Min, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BOMLine, ManufacturingOrder, ManufacturingOrderLine
+from .services import KitService
+from apps.inventory.models import StockQuant
+from apps.products.models import Product
+from apps.purchasing.models import POLine
+from apps.purchasing.services import OPEN_PO_STATES
+from apps.sales.models import SalesOrderLine
+from apps.vendors.models import VendorProduct
+
+OPEN_SO_STATES = ('confirmed', 'processing', 'ready')
+OPEN_MO_STATES = ('draft', 'confirmed', 'in_progress')
+
+NO_DATE = 2 ** 31 - 1
+EPSILON = 1e-6
+MINUTES_PER_DAY = 24 * 60
+
+
+def zeros(n):
+    return array('d', bytes(8 * n))
+
+
+def to_quantity(value):
+    """Float array value to a Decimal quantity, rounded up to 0.01"""
+    return Decimal(repr(round(value, 6))).quantize(Decimal('0.01'), rounding=ROUND_UP)
+
+
+class Proposal:
+    """A manufacturing order or purchase order the plan asks for"""
+    __slots__ = ('kind', 'product_id', 'quantity', 'need_date', 'start_date', 'late', 'bom_id', 'vendor_product')
+
+    def __init__(self, kind, product_id, quantity, need_date, start_date, late, bom_id=None, vendor_product=None):
+        self.kind = kind
+        self.product_id = product_id
+        self.quantity = quantity
+        self.need_date = need_date
+        self.start_date = start_date
+        self.late = late
+        self.bom_id = bom_id
+        self.vendor_product = vendor_product
+
+    @property
+    def vendor_id(self):
+        return self.vendor_product.vendor_id if self.vendor_product else None
+
+
+class MRPPlan:
+    def __init__(self, products):
+        self.products = products
+        self.manufacture = []
+        self.purchase = []
+        self.unsourced = []
+        self.cyclic = []
+
+    @property
+    def proposals(self):
+        return self.manufacture + self.purchase
+
+    def as_dict(self):
+        return {
+            'products': self.products,
+            'manufacture': len(self.manufacture),
+            'purchase': len(self.purchase),
+            'unsourced': len(self.unsourced),
+            'cyclic': len(self.cyclic),
+        }
+
+
+class MRPEngine:
+    """
+    Demand and supply of every stockable product, indexed by array slot
+
+        plan = MRPEngine.load(warehouse).plan()
+    """
+
+    def __init__(self, product_ids, purchasable, today):
+        self.today = today
+        self.ids = list(product_ids)
+        self.index = {pk: i for i, pk in enumerate(self.ids)}
+        self.purchasable = purchasable
+        n = len(self.ids)
+        self.on_hand = zeros(n)
+        self.reserved = zeros(n)
+        self.demand = zeros(n)
+        self.receipts = zeros(n)
+        self.need = array('l', [NO_DATE]) * n
+        # slot: (bom id, lead days, [(component slot, quantity per unit)])
+        self.recipes = {}
+
+    @classmethod
+    def load(cls, warehouse=None, today=None):
+        today = today or timezone.localdate()
+        rows = Product.objects.filter(is_active=True, product_type='stockable').order_by().values_list(
+            'pk', 'can_be_purchased'
+        )
+        ids = []
+        purchasable = set()
+        for i, (pk, can_be_purchased) in enumerate(rows.iterator(chunk_size=10000)):
+            ids.append(pk)
+            if can_be_purchased:
+                purchasable.add(i)
+        engine = cls(ids, purchasable, today)
+        engine._load_stock(warehouse)
+        engine._load_sales(warehouse)
+        engine._load_purchases(warehouse)
+        engine._load_production(warehouse)
+        engine._load_recipes()
+        return engine
+
+    def _add_demand(self, product_id, quantity, day):
+        i = self.index.get(product_id)
+        if i is None or quantity <= 0:
+            return
+        self.demand[i] += quantity
+        if day < self.need[i]:
+            self.need[i] = day
+
+    def _load_stock(self, warehouse):
+        quants = StockQuant.objects.filter(location__location_type='internal')
+        if warehouse:
+            quants = quants.filter(location__warehouse=warehouse)
+        rows = quants.order_by().values('product_id').annotate(
+            on_hand=Sum('quantity'), reserved=Sum('reserved_quantity')
+        ).values_list('product_id', 'on_hand', 'reserved')
+        for product_id, on_hand, reserved in rows:
+            i = self.index.get(product_id)
+            if i is not None:
+                self.on_hand[i] = float(on_hand or 0)
+                self.reserved[i] = float(reserved or 0)
+
+    def _load_sales(self, warehouse):
+        lines = SalesOrderLine.objects.filter(
+            sales_order__state__in=OPEN_SO_STATES,
+            quantity__gt=F('quantity_delivered')
+        )
+        if warehouse:
+            lines = lines.filter(sales_order__source_location__warehouse=warehouse)
+        rows = lines.order_by().values('product_id').annotate(
+            remaining=Sum(F('quantity') - F('quantity_delivered')),
+            need_date=Min(Coalesce('sales_order__expected_date', 'sales_order__date'))
+        ).values_list('product_id', 'remaining', 'need_date')
+
+        kits = KitService.kit_components()
+        today = self.today.toordinal()
+        for product_id, remaining, need_date in rows:
+            day = need_date.toordinal() if need_date else today
+            kit = kits.get(product_id)
+            if kit is None:
+                self._add_demand(product_id, float(remaining), day)
+                continue
+            for component_id, per_unit in kit.items():
+                self._add_demand(component_id, float(remaining * per_unit), day)
+
+    def _load_purchases(self, warehouse):
+        lines = POLine.objects.filter(
+            purchase_order__state__in=OPEN_PO_STATES,
+            quantity__gt=F('quantity_received')
+        )
+        if warehouse:
+            lines = lines.filter(purchase_order__delivery_location__warehouse=warehouse)
+        rows = lines.order_by().values('product_id').annotate(
+            remaining=Sum(F('quantity') - F('quantity_received'))
+        ).values_list('product_id', 'remaining')
+        for product_id, remaining in rows:
+            i = self.index.get(product_id)
+            if i is not None:
+                self.receipts[i] += float(remaining)
+
+    def _load_production(self, warehouse):
+        orders = ManufacturingOrder.objects.filter(
+            state__in=OPEN_MO_STATES,
+            quantity__gt=F('quantity_produced')
+        )
+        if warehouse:
+            orders = orders.filter(destination_location__warehouse=warehouse)
+        rows = orders.order_by().values('product_id').annotate(
+            remaining=Sum(F('quantity') - F('quantity_produced'))
+        ).values_list('product_id', 'remaining')
+        for product_id, remaining in rows:
+            i = self.index.get(product_id)
+            if i is not None:
+                self.receipts[i] += float(remaining)
+
+        lines = ManufacturingOrderLine.objects.filter(
+            manufacturing_order__state__in=OPEN_MO_STATES,
+            quantity_required__gt=F('quantity_consumed')
+        )
+        if warehouse:
+            lines = lines.filter(manufacturing_order__source_location__warehouse=warehouse)
+        rows = lines.order_by().values('product_id').annotate(
+            remaining=Sum(F('quantity_required') - F('quantity_consumed')),
+            need_date=Min('manufacturing_order__scheduled_date')
+        ).values_list('product_id', 'remaining', 'need_date')
+        today = self.today.toordinal()
+        for product_id, remaining, need_date in rows:
+            day = timezone.localdate(need_date).toordinal() if need_date else today
+            self._add_demand(product_id, float(remaining), day)
+
+    def _load_recipes(self):
+        rows = BOMLine.objects.filter(
+            bom__bom_type='normal',
+            bom__is_active=True,
+            bom__quantity__gt=0
+        ).order_by('bom__product_id', 'bom__created_at', 'bom_id').values_list(
+            'bom_id', 'bom__product_id', 'bom__quantity', 'bom__ready_time', 'product_id', 'quantity'
+        )
+
+        # The oldest active BOM of a product wins, as for kits
+        chosen = {}
+        for bom_id, product_id, bom_quantity, ready_time, component_id, quantity in rows.iterator(chunk_size=10000):
+            i = self.index.get(product_id)
+            if i is None or chosen.setdefault(i, bom_id) != bom_id:
+                continue
+            if i not in self.recipes:
+                self.recipes[i] = (bom_id, math.ceil(ready_time / MINUTES_PER_DAY), [])
+            j = self.index.get(component_id)
+            if j is not None and j != i:
+                self.recipes[i][2].append((j, float(quantity / bom_quantity)))
+
+    def low_level_order(self):
+        """
+        Product slots, every product after all products whose BOM uses it,
+        and the slots left over because their BOMs form a cycle
+        """
+        parents = array('l', [0]) * len(self.ids)
+        for _, _, components in self.recipes.values():
+            for j, _ in components:
+                parents[j] += 1
+
+        order = [i for i in range(len(self.ids)) if parents[i] == 0]
+        position = 0
+        while position < len(order):
+            recipe = self.recipes.get(order[position])
+            position += 1
+            if recipe is None:
+                continue
+            for j, _ in recipe[2]:
+                parents[j] -= 1
+                if parents[j] == 0:
+                    order.append(j)
+
+        cyclic = [i for i in range(len(self.ids)) if parents[i] > 0]
+        return order, cyclic
+
+    def plan(self):
+        """Net every product and return the MRPPlan"""
+        plan = MRPPlan(len(self.ids))
+        order, cyclic = self.low_level_order()
+        plan.cyclic = [self.ids[i] for i in cyclic]
+        today = self.today.toordinal()
+
+        purchases = []
+        for i in order:
+            committed = max(self.demand[i], self.reserved[i])
+            shortage = committed - self.on_hand[i] - self.receipts[i]
+            if shortage <= EPSILON:
+                continue
+            need = self.need[i] if self.need[i] != NO_DATE else today
+
+            recipe = self.recipes.get(i)
+            if recipe is None:
+                if i in self.purchasable:
+                    purchases.append((i, shortage, need))
+                else:
+                    plan.unsourced.append(self.ids[i])
+                continue
+
+            bom_id, lead_days, components = recipe
+            start = need - lead_days
+            plan.manufacture.append(Proposal(
+                'manufacture', self.ids[i], to_quantity(shortage), date.fromordinal(need),
+                date.fromordinal(max(start, today)), start < today, bom_id=bom_id
+            ))
+            for j, per_unit in components:
+                self.demand[j] += shortage * per_unit
+                if start < self.need[j]:
+                    self.need[j] = start
+
+        if purchases:
+            self._source(plan, purchases, today)
+        return plan
+
+    def _source(self, plan, purchases, today):
+        # One joined query; the first row per product is its vendor, as in ReplenishmentService
+        sources = {}
+        for vendor_product in VendorProduct.objects.filter(
+            product_id__in=[self.ids[i] for i, _, _ in purchases],
+            is_active=True,
+            vendor__is_active=True
+        ).order_by('product_id', '-is_preferred', 'lead_time_days', 'price', 'pk'):
+            sources.setdefault(vendor_product.product_id, vendor_product)
+
+        for i, shortage, need in purchases:
+            product_id = self.ids[i]
+            vendor_product = sources.get(product_id)
+            if vendor_product is None:
+                plan.unsourced.append(product_id)
+                continue
+            order_day = need - vendor_product.lead_time_days
+            plan.purchase.append(Proposal(
+                'purchase', product_id, max(to_quantity(shortage), vendor_product.min_qty),
+                date.fromordinal(need), date.fromordinal(max(order_day, today)), order_day < today,
+                vendor_product=vendor_product
+            ))
+
+
+def run_mrp(warehouse=None, today=None):
+    """Load, net and return the MRPPlan for all stockable products"""
+    return MRPEngine.load(warehouse=warehouse, today=today).plan()
+
+
+def write_proposals(plan, fileobj):
+    """Write the plan's proposals as CSV"""
+    writer = csv.writer(fileobj)
+    writer.writerow(['kind', 'product_id', 'quantity', 'need_date', 'start_date', 'late', 'bom_id', 'vendor_id', 'unit_price'])
+    for proposal in plan.proposals:
+        writer.writerow([
+            proposal.kind, proposal.product_id, proposal.quantity, proposal.need_date, proposal.start_date,
+            int(proposal.late), proposal.bom_id or '', proposal.vendor_id or '',
+            proposal.vendor_product.price if proposal.vendor_product else '',
+        ])
@@ -1,15 +1,50 @@
 """
 Manufacturing business logic services
 """
-from decimal import Decimal
+import threading
+from collections import defaultdict
+from decimal import ROUND_DOWN, Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 
-from .models import BillOfMaterials, BOMLine, ManufacturingOrder, ManufacturingOrderLine
-from apps.inventory.models import StockMove, Location
+from .models import BillOfMaterials, BOMAvailability, BOMLine, ManufacturingOrder, ManufacturingOrderLine
+from apps.inventory.models import StockMove, StockQuant, Location
 from apps.inventory.services import StockService
+from apps.products.models import Product
+from core.cache import LocalCache
+from core.instrumentation import record_cache_hit, record_cache_miss
+from core.metrics import instrument_service
 
+KIT_CACHE_KEY = 'kits:v1'
+AVAILABILITY_INDEX_KEY = 'bom-availability-index:v1'
 
+# BOM-derived lookups: a process-local copy (KIT_LOCAL_CACHE_TTL) in front of the shared cache
+_local_boms = LocalCache(maxsize=8, ttl=getattr(settings, 'KIT_LOCAL_CACHE_TTL', 30))
+
+_pending_availability = threading.local()
+
+
+def _cached(key, load):
+    value = _local_boms.get(key)
+    if value is not None:
+        record_cache_hit()
+        return value
+
+    value = cache.get(key)
+    if value is None:
+        record_cache_miss()
+        value = load()
+        cache.set(key, value, getattr(settings, 'KIT_CACHE_TIMEOUT', 3600))
+    else:
+        record_cache_hit()
+    _local_boms.set(key, value)
+    return value
+
+
+@instrument_service
 class BOMService:
     """Service class for BOM operations"""
     
@@ -66,6 +101,250 @@ class BOMService:
         return max_qty or Decimal('0')
 
 
+@instrument_service
+class KitService:
+    """
+    Explode kit (phantom) BOMs into their components
+    
+    A product with an active kit BOM is never stocked itself: selling it
+    takes the components out of stock. The component quantities per unit of
+    every kit, nested kits already flattened, are kept as one cached dict
+    (process-local LRU, then the shared cache), so exploding a sale is a
+    dict lookup. BOM and BOM line changes invalidate it
+    (apps.manufacturing.signals).
+    """
+    
+    @staticmethod
+    def kit_components():
+        """{kit product id: {component product id: quantity per kit unit}}"""
+        return _cached(KIT_CACHE_KEY, KitService._load)
+    
+    @staticmethod
+    def _load():
+        rows = BOMLine.objects.filter(
+            bom__bom_type='kit',
+            bom__is_active=True,
+            bom__quantity__gt=0
+        ).order_by('bom__product_id', 'bom__created_at', 'bom_id').values_list(
+            'bom_id', 'bom__product_id', 'bom__quantity', 'product_id', 'quantity'
+        )
+        
+        # The oldest active kit BOM of a product wins
+        direct = {}
+        chosen = {}
+        for bom_id, kit_id, bom_quantity, component_id, quantity in rows:
+            if chosen.setdefault(kit_id, bom_id) != bom_id:
+                continue
+            components = direct.setdefault(kit_id, defaultdict(Decimal))
+            components[component_id] += quantity / bom_quantity
+        
+        def flatten(kit_id, path):
+            flat = defaultdict(Decimal)
+            for component_id, quantity in direct[kit_id].items():
+                if component_id in direct and component_id not in path:
+                    for sub_id, sub_quantity in flatten(component_id, path | {component_id}).items():
+                        flat[sub_id] += quantity * sub_quantity
+                else:
+                    flat[component_id] += quantity
+            return dict(flat)
+        
+        return {kit_id: flatten(kit_id, {kit_id}) for kit_id in direct}
+    
+    @staticmethod
+    def explode(quantities):
+        """
+        The stock to take out for a sale
+        
+        Args:
+            quantities: {Product: quantity sold}
+        
+        Returns:
+            {Product: quantity} of stockable products: the components of the
+            kits sold, plus the other stockable products as they are
+        """
+        kits = KitService.kit_components()
+        result = defaultdict(Decimal)
+        components = defaultdict(Decimal)
+        for product, quantity in quantities.items():
+            kit = kits.get(product.pk)
+            if kit is None:
+                if product.product_type == 'stockable':
+                    result[product] += quantity
+                continue
+            for component_id, per_unit in kit.items():
+                components[component_id] += quantity * per_unit
+        
+        if components:
+            for product in Product.objects.filter(pk__in=list(components), product_type='stockable'):
+                result[product] += components[product.pk]
+        return dict(result)
+    
+    @staticmethod
+    def invalidate():
+        _local_boms.clear()
+        cache.delete_many([KIT_CACHE_KEY, AVAILABILITY_INDEX_KEY])
+
+
+@instrument_service
+class BOMAvailabilityService:
+    """
+    Keep BOMAvailability, the producible quantity of every active BOM per
+    internal location, up to date
+    
+    Stock changes (inventory.signals.stock_changed) are collected during
+    the transaction and, once it commits, only the BOMs using the changed
+    products are recomputed at the changed locations: a reverse index from
+    component to BOMs picks them, then one aggregate query and one upsert
+    refresh their rows. Only stockable components limit a BOM; nested kits
+    count through their own components.
+    """
+    
+    @staticmethod
+    def availability_index():
+        """{'boms': {bom id: (product id, {component id: quantity per unit})}, 'by_component': {component id: {bom ids}}}"""
+        return _cached(AVAILABILITY_INDEX_KEY, BOMAvailabilityService._load_index)
+    
+    @staticmethod
+    def _load_index():
+        kits = KitService.kit_components()
+        boms = {
+            bom_id: (product_id, quantity, defaultdict(Decimal))
+            for bom_id, product_id, quantity in BillOfMaterials.objects.filter(
+                is_active=True, quantity__gt=0
+            ).values_list('id', 'product_id', 'quantity')
+        }
+        for bom_id, component_id, quantity in BOMLine.objects.filter(
+            bom_id__in=list(boms)
+        ).values_list('bom_id', 'product_id', 'quantity'):
+            _, bom_quantity, components = boms[bom_id]
+            for sub_id, sub_quantity in kits.get(component_id, {component_id: Decimal('1')}).items():
+                components[sub_id] += quantity / bom_quantity * sub_quantity
+        
+        stockable = set(Product.objects.filter(
+            pk__in={component_id for _, _, components in boms.values() for component_id in components},
+            product_type='stockable'
+        ).values_list('pk', flat=True))
+        
+        index = {'boms': {}, 'by_component': defaultdict(set)}
+        for bom_id, (product_id, _, components) in boms.items():
+            components = {
+                component_id: quantity for component_id, quantity in components.items()
+                if component_id in stockable and quantity > 0
+            }
+            index['boms'][bom_id] = (product_id, components)
+            for component_id in components:
+                index['by_component'][component_id].add(bom_id)
+        index['by_component'] = dict(index['by_component'])
+        return index
+    
+    @staticmethod
+    def mark_stale(changes):
+        """Queue {location id: product ids} for a refresh when the transaction commits"""
+        pending = getattr(_pending_availability, 'changes', None)
+        if pending is None:
+            pending = _pending_availability.changes = defaultdict(set)
+        for location_id, product_ids in changes.items():
+            pending[location_id].update(product_ids)
+        transaction.on_commit(BOMAvailabilityService.flush)
+    
+    @staticmethod
+    def flush():
+        """Refresh what mark_stale queued; later callbacks of the same commit find nothing left"""
+        changes = getattr(_pending_availability, 'changes', None)
+        _pending_availability.changes = None
+        if changes:
+            BOMAvailabilityService.refresh(changes)
+    
+    @staticmethod
+    def refresh(changes):
+        """Recompute the BOMs using the changed products at the changed locations; returns rows written"""
+        index = BOMAvailabilityService.availability_index()
+        targets = {}
+        for location_id, product_ids in changes.items():
+            bom_ids = set()
+            for product_id in product_ids:
+                bom_ids |= index['by_component'].get(product_id, set())
+            if bom_ids:
+                targets[location_id] = bom_ids
+        if not targets:
+            return 0
+        return BOMAvailabilityService._write(targets, index)
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        """Recompute every active BOM at every internal location holding any of its components"""
+        index = BOMAvailabilityService.availability_index()
+        BOMAvailability.objects.all().delete()
+        location_ids = StockQuant.objects.filter(
+            product_id__in=list(index['by_component']),
+            location__location_type='internal'
+        ).order_by().values_list('location_id', flat=True).distinct()
+        bom_ids = {bom_id for bom_id, (_, components) in index['boms'].items() if components}
+        return BOMAvailabilityService._write({location_id: bom_ids for location_id in location_ids}, index)
+    
+    @staticmethod
+    def _write(targets, index):
+        components = {
+            component_id
+            for bom_ids in targets.values()
+            for bom_id in bom_ids
+            for component_id in index['boms'][bom_id][1]
+        }
+        available = defaultdict(Decimal)
+        for location_id, product_id, quantity in StockQuant.objects.filter(
+            location_id__in=list(targets),
+            product_id__in=list(components)
+        ).order_by().values('location_id', 'product_id').annotate(
+            available=Sum(F('quantity') - F('reserved_quantity'))
+        ).values_list('location_id', 'product_id', 'available'):
+            available[location_id, product_id] = quantity or Decimal('0')
+        
+        rows = []
+        for location_id, bom_ids in targets.items():
+            for bom_id in bom_ids:
+                _, bom_components = index['boms'][bom_id]
+                max_quantity = min(
+                    available[location_id, component_id] / quantity
+                    for component_id, quantity in bom_components.items()
+                )
+                rows.append(BOMAvailability(
+                    bom_id=bom_id,
+                    location_id=location_id,
+                    max_quantity=max(max_quantity, Decimal('0')).quantize(Decimal('0.01'), rounding=ROUND_DOWN),
+                ))
+        
+        BOMAvailability.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['location', 'bom'],
+            update_fields=['max_quantity', 'updated_at']
+        )
+        return len(rows)
+    
+    @staticmethod
+    def for_location(location_id):
+        """
+        {product id: producible quantity} at a location, from the table
+        
+        A product with several BOMs gets the best of them; None means no
+        stockable component limits it.
+        """
+        index = BOMAvailabilityService.availability_index()
+        stored = dict(BOMAvailability.objects.filter(location_id=location_id).values_list('bom_id', 'max_quantity'))
+        
+        products = {}
+        for bom_id, (product_id, components) in index['boms'].items():
+            quantity = stored.get(bom_id, Decimal('0.00')) if components else None
+            if product_id in products and (products[product_id] is None or (
+                    quantity is not None and products[product_id] >= quantity)):
+                continue
+            products[product_id] = quantity
+        return products
+
+
+@instrument_service
 class ManufacturingService:
     """Service class for Manufacturing Order operations"""
     
@@ -104,7 +383,7 @@ class ManufacturingService:
             raise ValueError("Manufacturing Order must be in draft state to confirm")
         
         mo.state = 'confirmed'
-        mo.save(update_fields=['state'])
+        mo.save_versioned(update_fields=['state'])
         return mo
     
     @staticmethod
@@ -115,7 +394,7 @@ class ManufacturingService:
         
         mo.state = 'in_progress'
         mo.date_started = timezone.now()
-        mo.save(update_fields=['state', 'date_started'])
+        mo.save_versioned(update_fields=['state', 'date_started'])
         return mo
     
     @staticmethod
@@ -172,6 +451,9 @@ class ManufacturingService:
             line.quantity_consumed = line.quantity_required
             line.save(update_fields=['quantity_consumed'])
         
+        # Claim the MO so a concurrent request can't consume the components twice
+        mo.save_versioned(update_fields=['updated_at'])
+        
         return mo
     
     @staticmethod
@@ -229,7 +511,7 @@ class ManufacturingService:
         
         # Update MO
         mo.quantity_produced += quantity_produced
-        mo.save(update_fields=['quantity_produced'])
+        mo.save_versioned(update_fields=['quantity_produced'])
         
         return mo
     
@@ -260,7 +542,7 @@ class ManufacturingService:
         # Mark as done
         mo.state = 'done'
         mo.date_finished = timezone.now()
-        mo.save(update_fields=['state', 'date_finished'])
+        mo.save_versioned(update_fields=['state', 'date_finished'])
         
         return mo
     
@@ -274,6 +556,6 @@ class ManufacturingService:
             raise ValueError("Cannot cancel Manufacturing Order with produced quantity")
         
         mo.state = 'cancelled'
-        mo.save(update_fields=['state'])
+        mo.save_versioned(update_fields=['state'])
         return mo
 
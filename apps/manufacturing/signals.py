@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.inventory.signals import stock_changed
+from .models import BillOfMaterials, BOMLine
+from .services import BOMAvailabilityService, KitService
+
+
+@receiver(post_save, sender=BillOfMaterials)
+@receiver(post_delete, sender=BillOfMaterials)
+@receiver(post_save, sender=BOMLine)
+@receiver(post_delete, sender=BOMLine)
+def invalidate_kits(sender, instance, **kwargs):
+    from .tasks import rebuild_bom_availability_task
+
+    # After commit, so no other process reloads the old BOMs into the cache
+    transaction.on_commit(KitService.invalidate)
+    transaction.on_commit(rebuild_bom_availability_task)
+
+
+@receiver(stock_changed)
+def refresh_bom_availability(sender, changes, **kwargs):
+    BOMAvailabilityService.mark_stale(changes)
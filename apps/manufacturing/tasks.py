@@ -0,0 +1,15 @@
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, task
+
+from .services import BOMAvailabilityService
+
+
+@task()
+def rebuild_bom_availability_task():
+    return BOMAvailabilityService.rebuild()
+
+
+@db_periodic_task(crontab(hour='3', minute='15'))
+def nightly_bom_availability_rebuild():
+    # Catches quants changed outside StockService (admin, seed and load scripts)
+    return BOMAvailabilityService.rebuild()
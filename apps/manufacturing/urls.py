@@ -4,6 +4,7 @@ from .views import (
     BOMLineCreateView, BOMLineUpdateView, BOMLineDeleteView,
     MOListView, MODetailView, MOCreateView, MOUpdateView,
     MOConfirmView, MOStartView, MOConsumeView, MOProduceView, MOCompleteView, MOCancelView,
+    bom_choices, bom_availability,
 )
 
 urlpatterns = [
@@ -32,5 +33,9 @@ urlpatterns = [
     path('manufacturing/<str:pk>/produce/', MOProduceView.as_view(), name='mo-produce'),
     path('manufacturing/<str:pk>/complete/', MOCompleteView.as_view(), name='mo-complete'),
     path('manufacturing/<str:pk>/cancel/', MOCancelView.as_view(), name='mo-cancel'),
+
+    # API
+    path('api/boms/choices/', bom_choices, name='bom-choices-api'),
+    path('api/boms/availability/', bom_availability, name='bom-availability-api'),
 ]
 
@@ -4,12 +4,17 @@ from django.views.generic import ListView, CreateView, UpdateView, DetailView, D
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
 
-from core.views import LoginRequiredMixinView
+from core.instrumentation import query_budget
+from core.pagination import keyset_page
+from core.views import LoginRequiredMixinView, ReplicaReadMixin, VersionedUpdateMixin, read_from_replica
 from apps.employees.models import EmployeeSetting
 from .models import BillOfMaterials, BOMLine, ManufacturingOrder, ManufacturingOrderLine
 from .forms import BOMForm, BOMLineForm, ManufacturingOrderForm, ProduceForm
-from .services import BOMService, ManufacturingService
+from .services import BOMAvailabilityService, BOMService, ManufacturingService
 
 
 class BaseContextMixin:
@@ -22,13 +27,14 @@ class BaseContextMixin:
 
 
 # BOM Views
-class BOMListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class BOMListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = BillOfMaterials
     template_name = "manufacturing/bom_list.html"
     context_object_name = "boms"
+    query_budget = 10
     
     def get_queryset(self):
-        queryset = BillOfMaterials.objects.select_related('product').prefetch_related('lines')
+        queryset = BillOfMaterials.objects.select_related('product__uom').prefetch_related('lines__product')
         
         active_only = self.request.GET.get('active', 'true')
         if active_only == 'true':
@@ -44,7 +50,7 @@ class BOMListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class BOMDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class BOMDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = BillOfMaterials
     template_name = "manufacturing/bom_detail.html"
     context_object_name = "bom"
@@ -137,7 +143,7 @@ class BOMLineDeleteView(LoginRequiredMixinView, View):
 
 
 # Manufacturing Order Views
-class MOListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class MOListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = ManufacturingOrder
     template_name = "manufacturing/mo_list.html"
     context_object_name = "orders"
@@ -156,7 +162,7 @@ class MOListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class MODetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class MODetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = ManufacturingOrder
     template_name = "manufacturing/mo_detail.html"
     context_object_name = "mo"
@@ -210,7 +216,7 @@ class MOCreateView(LoginRequiredMixinView, BaseContextMixin, CreateView):
         return reverse('mo-detail', kwargs={'pk': self.object.pk})
 
 
-class MOUpdateView(LoginRequiredMixinView, BaseContextMixin, UpdateView):
+class MOUpdateView(LoginRequiredMixinView, VersionedUpdateMixin, BaseContextMixin, UpdateView):
     model = ManufacturingOrder
     form_class = ManufacturingOrderForm
     template_name = "manufacturing/mo_form.html"
@@ -292,3 +298,49 @@ class MOCancelView(LoginRequiredMixinView, View):
             messages.error(request, str(e))
         return redirect('mo-detail', pk=pk)
 
+
+
+# API Views
+@query_budget(3)
+@require_http_methods(["GET"])
+@login_required(login_url='/login/')
+@read_from_replica
+def bom_choices(request):
+    """Active BOMs for remote pickers; ?product= narrows to one product, ?q= product name or BOM reference"""
+    queryset = BillOfMaterials.objects.filter(is_active=True).select_related('product')
+    product = request.GET.get('product')
+    if product:
+        queryset = queryset.filter(product_id=product)
+    search = request.GET.get('q', '').strip()
+    if search:
+        queryset = queryset.filter(models.Q(product__name__icontains=search) | models.Q(reference__icontains=search))
+
+    return keyset_page(request, queryset, ('product__name', 'pk'), lambda bom: {
+        'id': bom.pk,
+        'text': str(bom),
+    })
+
+
+@query_budget(7)
+@require_http_methods(["GET"])
+@login_required(login_url='/login/')
+def bom_availability(request):
+    """
+    Producible quantity of every product with an active BOM at ?location=
+
+    One read of the precomputed BOMAvailability table, so the POS can grey
+    out items it can't make; null means no stocked component limits it.
+    """
+    location = request.GET.get('location')
+    if not location:
+        return JsonResponse({'success': False, 'error': 'location is required'}, status=400)
+
+    products = BOMAvailabilityService.for_location(location)
+    return JsonResponse({
+        'success': True,
+        'location': location,
+        'products': {
+            product_id: None if quantity is None else float(quantity)
+            for product_id, quantity in products.items()
+        },
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, UnitOfMeasure, Product
+from .models import Category, UnitOfMeasure, Product, ProductBarcode
 
 
 @admin.register(Category)
@@ -18,6 +18,12 @@ class UnitOfMeasureAdmin(admin.ModelAdmin):
     ordering = ('category', 'name')
 
 
+class ProductBarcodeInline(admin.TabularInline):
+    model = ProductBarcode
+    fields = ('barcode', 'uom', 'quantity', 'is_active')
+    extra = 0
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = (
@@ -54,4 +60,5 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('is_active',)
         }),
     )
+    inlines = [ProductBarcodeInline]
 
@@ -6,3 +6,6 @@ class ProductsConfig(AppConfig):
     name = 'apps.products'
     verbose_name = 'Products'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
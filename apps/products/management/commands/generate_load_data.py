@@ -0,0 +1,459 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.utils import next_references
+from apps.products.models import Category, UnitOfMeasure, Product
+from apps.vendors.models import Vendor, VendorProduct
+from apps.inventory.models import Warehouse, Location, StockQuant, StockMove
+from apps.sales.models import Customer, InvoicePayment, SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine
+from apps.purchasing.models import PurchaseOrder, POLine
+from apps.manufacturing.models import BillOfMaterials, BOMLine
+from apps.manufacturing.services import BOMAvailabilityService, KitService
+from apps.inventory.services import ProductCostService
+
+TAX_RATE = Decimal('0.11')  # PPN 11%, as in compute_totals()
+CENT = Decimal('0.01')
+
+FIRST_NAMES = [
+    'Budi', 'Siti', 'Ahmad', 'Dewi', 'Rudi', 'Agus', 'Rina', 'Andi', 'Putri', 'Yusuf',
+    'Fitri', 'Hendra', 'Lestari', 'Bayu', 'Indah', 'Joko', 'Maya', 'Rizky', 'Sari', 'Wahyu',
+]
+LAST_NAMES = [
+    'Santoso', 'Rahayu', 'Wijaya', 'Lestari', 'Hermawan', 'Saputra', 'Kusuma', 'Pratama',
+    'Nugroho', 'Hidayat', 'Setiawan', 'Susanto', 'Gunawan', 'Purnomo', 'Halim',
+]
+CITIES = ['Jakarta', 'Bandung', 'Surabaya', 'Tangerang', 'Bekasi', 'Depok', 'Bogor', 'Semarang', 'Yogyakarta']
+PRODUCT_WORDS = [
+    'Kopi', 'Latte', 'Teh', 'Coklat', 'Roti', 'Kue', 'Susu', 'Gula', 'Sirup', 'Keju',
+    'Matcha', 'Vanilla', 'Karamel', 'Pandan', 'Aren', 'Mocha', 'Croissant', 'Donat',
+]
+PAYMENT_METHODS = ['cash', 'bank_transfer', 'credit_card', 'debit_card', 'e_wallet', 'qris']
+
+# Models whose auto_now/auto_now_add fields are switched off while generating,
+# listed in foreign key order (the order buffers are flushed in)
+GENERATED_MODELS = [
+    Vendor, Product, VendorProduct, BillOfMaterials, BOMLine, Customer,
+    SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine, InvoicePayment,
+    PurchaseOrder, POLine, StockMove, StockQuant,
+]
+
+
+@contextmanager
+def backdating(models):
+    """Let created_at/updated_at/date take the values we set instead of now()"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def money(value):
+    return value.quantize(CENT)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, referentially consistent synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--customers', type=int, default=10000)
+        parser.add_argument('--vendors', type=int, default=50)
+        parser.add_argument('--warehouses', type=int, default=2)
+        parser.add_argument('--bins', type=int, default=10, help='Bin locations per warehouse')
+        parser.add_argument('--orders-per-day', type=int, default=200)
+        parser.add_argument('--lines-per-order', type=int, default=3, help='Average sales order lines')
+        parser.add_argument('--purchases-per-day', type=int, default=5)
+        parser.add_argument('--months', type=int, default=6, help='Months of order history')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        # Ids get their own stream so a second run into the same database
+        # does not reproduce the ids of the first
+        self.id_rng = random.Random(f"{options['seed']}:{Product.objects.count()}")
+        self.chunk_size = options['chunk_size']
+        self.buffers = {model: [] for model in GENERATED_MODELS}
+        self.buffered = 0
+        self.counts = {model: 0 for model in GENERATED_MODELS}
+        self.net_stock = {}
+
+        self.stdout.write('🏭 Generating load test data...\n')
+        start = time.perf_counter()
+
+        with backdating(GENERATED_MODELS):
+            self.now = timezone.now()
+            self.history_start = self.now - timedelta(days=30 * options['months'])
+            self.create_master_data()
+            self.create_history()
+            self.create_quants()
+            self.flush()
+        self.rebuild_derived_tables()
+
+        elapsed = time.perf_counter() - start
+        for model, count in self.counts.items():
+            if count:
+                self.stdout.write(f'    {model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Load data generated in {elapsed:.1f}s'))
+
+    def rebuild_derived_tables(self):
+        # Everything above was bulk-inserted without signals
+        self.stdout.write('  Rebuilding BOM availability...')
+        KitService.invalidate()
+        rows = BOMAvailabilityService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'    ✓ {rows} BOM availability rows'))
+        self.stdout.write('  Rebuilding product costs...')
+        rows = ProductCostService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'    ✓ {rows} product cost rows'))
+
+    # Buffering
+
+    def new_id(self, when):
+        """ObjectId-shaped id whose timestamp matches the backdated created_at"""
+        return f'{int(when.timestamp()):08x}{self.id_rng.getrandbits(64):016x}'
+
+    def add(self, obj, when):
+        obj.id = self.new_id(when)
+        for name in ('created_at', 'updated_at'):
+            setattr(obj, name, when)
+        self.buffers[type(obj)].append(obj)
+        self.buffered += 1
+        return obj
+
+    def flush(self):
+        with transaction.atomic():
+            for model, objs in self.buffers.items():
+                if objs:
+                    model.objects.bulk_create(objs, batch_size=self.chunk_size)
+                    self.counts[model] += len(objs)
+                    objs.clear()
+        self.buffered = 0
+
+    def maybe_flush(self):
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def reference_counter(self, model, prefix, width):
+        first = next_references(model.objects, 'reference', prefix, width, 1)[0]
+        number = int(first[len(prefix):])
+        while True:
+            yield f'{prefix}{number:0{width}d}'
+            number += 1
+
+    def random_time(self, day):
+        """A moment during opening hours (07:00-22:00) on `day`"""
+        seconds = self.rng.randint(7 * 3600, 22 * 3600)
+        moment = timezone.make_aware(datetime.combine(day, dt_time()) + timedelta(seconds=seconds))
+        return min(moment, self.now)
+
+    # Master data
+
+    def create_master_data(self):
+        opts = self.options
+        rng = self.rng
+        when = self.history_start
+        self.stdout.write('  Creating master data...')
+
+        self.uom, _ = UnitOfMeasure.objects.get_or_create(
+            symbol='pcs', defaults={'name': 'Piece', 'category': 'unit', 'is_base_unit': True}
+        )
+        self.categories = []
+        for name in ['Beverages', 'Food', 'Raw Materials', 'Packaging']:
+            category, _ = Category.objects.get_or_create(name=name)
+            self.categories.append(category)
+        raw_category = self.categories[2]
+
+        self.vendors = []
+        codes = next_references(Vendor.objects, 'code', 'VND-', 4, opts['vendors'])
+        for code in codes:
+            name = f'{rng.choice(["PT", "CV", "UD"])} {rng.choice(LAST_NAMES)} {rng.choice(PRODUCT_WORDS)}'
+            self.vendors.append(self.add(Vendor(
+                code=code, name=name, city=rng.choice(CITIES),
+                payment_term=rng.choice(['cod', 'net7', 'net14', 'net30']),
+                rating=rng.randint(2, 5),
+            ), when))
+
+        # 70% sellable finished goods, 30% purchased raw materials
+        self.products = []
+        self.finished_goods = []
+        self.raw_materials = []
+        references = next_references(Product.objects, 'internal_reference', 'PROD-', 5, opts['products'])
+        for index, reference in enumerate(references):
+            is_raw = rng.random() < 0.3
+            cost = Decimal(rng.randrange(500, 200000, 500))
+            product = self.add(Product(
+                internal_reference=reference,
+                name=f'{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_WORDS)} {index + 1}',
+                category=raw_category if is_raw else rng.choice(self.categories),
+                uom=self.uom,
+                standard_price=cost,
+                list_price=Decimal(0) if is_raw else money(cost * Decimal(rng.uniform(1.5, 3.0))),
+                can_be_sold=not is_raw,
+                reorder_point=Decimal(rng.randrange(5, 100)),
+                reorder_qty=Decimal(rng.randrange(20, 500)),
+            ), when)
+            self.products.append(product)
+            (self.raw_materials if is_raw else self.finished_goods).append(product)
+        if not self.raw_materials:
+            self.raw_materials = self.products[:1]
+        if not self.finished_goods:
+            self.finished_goods = self.products[:1]
+
+        # Every raw material is supplied by 1-3 vendors, the first preferred
+        self.vendor_products = {vendor.id: [] for vendor in self.vendors}
+        for product in self.raw_materials:
+            for rank, vendor in enumerate(rng.sample(self.vendors, min(len(self.vendors), rng.randint(1, 3)))):
+                self.add(VendorProduct(
+                    vendor=vendor, product=product,
+                    price=money(product.standard_price * Decimal(rng.uniform(0.9, 1.1))),
+                    lead_time_days=rng.randint(1, 14),
+                    is_preferred=rank == 0,
+                ), when)
+                self.vendor_products[vendor.id].append(product)
+        self.supplying_vendors = [vendor for vendor in self.vendors if self.vendor_products[vendor.id]]
+
+        # Half of the finished goods are made from 2-5 raw materials
+        for product in self.finished_goods[::2]:
+            bom = self.add(BillOfMaterials(
+                product=product, reference=f'BOM-{product.internal_reference}',
+                ready_time=rng.randint(1, 15),
+            ), when)
+            for component in rng.sample(self.raw_materials, min(len(self.raw_materials), rng.randint(2, 5))):
+                self.add(BOMLine(
+                    bom=bom, product=component, quantity=Decimal(rng.randint(1, 500)) / 1000,
+                ), when)
+
+        self.customers = []
+        for index in range(opts['customers']):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            self.customers.append(self.add(Customer(
+                name=f'{first} {last}',
+                customer_type='company' if rng.random() < 0.1 else 'individual',
+                email=f'{first}.{last}.{index}@example.com'.lower(),
+                phone=f'08{rng.randint(10**9, 10**10 - 1)}',
+                city=rng.choice(CITIES),
+            ), when))
+
+        self.flush()
+        self.create_locations()
+        self.stdout.write(self.style.SUCCESS(
+            f'    ✓ {len(self.products)} Products, {len(self.vendors)} Vendors, {len(self.customers)} Customers'
+        ))
+
+    def create_locations(self):
+        # Few rows, so regular get_or_create keeps reruns idempotent
+        self.supplier_location, _ = Location.objects.get_or_create(
+            code='VENDOR', warehouse=None,
+            defaults={'name': 'Vendor Location', 'location_type': 'supplier'},
+        )
+        self.customer_location, _ = Location.objects.get_or_create(
+            code='CUSTOMER', warehouse=None,
+            defaults={'name': 'Customer Location', 'location_type': 'customer'},
+        )
+        self.warehouses = []
+        for index in range(1, self.options['warehouses'] + 1):
+            warehouse, _ = Warehouse.objects.get_or_create(
+                code=f'LD-WH{index:02d}', defaults={'name': f'Load Test Warehouse {index}'}
+            )
+            stock, _ = Location.objects.get_or_create(
+                warehouse=warehouse, code='STOCK',
+                defaults={'name': 'Stock', 'location_type': 'internal', 'is_default': True},
+            )
+            bins = [
+                Location.objects.get_or_create(
+                    warehouse=warehouse, code=f'BIN-{number:03d}',
+                    defaults={'name': f'Bin {number}', 'location_type': 'internal', 'parent': stock},
+                )[0]
+                for number in range(1, self.options['bins'] + 1)
+            ]
+            self.warehouses.append((warehouse, stock, bins or [stock]))
+
+    # Transactions
+
+    def create_history(self):
+        opts = self.options
+        self.so_refs = self.reference_counter(SalesOrder, 'SO-', 5)
+        self.inv_refs = self.reference_counter(SalesInvoice, 'INV-', 5)
+        self.po_refs = self.reference_counter(PurchaseOrder, 'PO-', 5)
+        self.move_refs = self.reference_counter(StockMove, 'SM-', 6)
+
+        today = timezone.localdate()
+        day = self.history_start.date()
+        while day <= today:
+            age = (today - day).days
+            for _ in range(self.daily_count(opts['purchases_per_day'])):
+                if self.supplying_vendors:
+                    self.create_purchase(day, age)
+                    self.maybe_flush()
+            for _ in range(self.daily_count(opts['orders_per_day'])):
+                self.create_sale(day, age)
+                self.maybe_flush()
+            if day.day == 1:
+                self.stdout.write(f'    {day:%Y-%m}...')
+            day += timedelta(days=1)
+        self.flush()
+
+    def daily_count(self, mean):
+        """Vary the daily volume by +/-50% around `mean`"""
+        return self.rng.randint(mean // 2, mean * 3 // 2) if mean else 0
+
+    def create_sale(self, day, age):
+        rng = self.rng
+        when = self.random_time(day)
+        customer = rng.choice(self.customers)
+        warehouse, stock, bins = rng.choice(self.warehouses)
+
+        if age > 3:
+            state = rng.choices(['done', 'delivered', 'cancelled'], [90, 5, 5])[0]
+        elif age > 0:
+            state = rng.choice(['processing', 'ready', 'delivered'])
+        else:
+            state = rng.choice(['draft', 'confirmed'])
+        delivered = state in ('delivered', 'done')
+
+        order = self.add(SalesOrder(
+            reference=next(self.so_refs), customer=customer, date=day, state=state,
+            source_location=stock,
+        ), when)
+
+        lines = []
+        count = max(1, round(rng.expovariate(1 / self.options['lines_per_order'])))
+        for product in rng.sample(self.finished_goods, min(count, len(self.finished_goods))):
+            quantity = Decimal(rng.randint(1, 5))
+            subtotal = money(quantity * product.list_price)
+            lines.append(self.add(SalesOrderLine(
+                sales_order=order, product=product, description=product.name,
+                quantity=quantity, unit_price=product.list_price, subtotal=subtotal,
+                quantity_delivered=quantity if delivered else Decimal(0),
+                quantity_invoiced=quantity if state == 'done' else Decimal(0),
+            ), when))
+            if delivered:
+                self.create_move(product, rng.choice(bins), self.customer_location, quantity, when, order.reference)
+
+        order.untaxed_amount = sum(line.subtotal for line in lines)
+        order.tax_amount = money(order.untaxed_amount * TAX_RATE)
+        order.total_amount = order.untaxed_amount + order.tax_amount
+
+        if state == 'done':
+            self.create_invoice(order, lines, day, age, when)
+
+    def create_invoice(self, order, lines, day, age, when):
+        rng = self.rng
+        due_date = day + timedelta(days=14 if order.customer.customer_type == 'company' else 0)
+        if age > 30 or rng.random() < 0.8:
+            state, amount_paid = 'paid', order.total_amount
+        elif rng.random() < 0.5:
+            state, amount_paid = 'partial', money(order.total_amount / 2)
+        else:
+            state, amount_paid = 'sent', Decimal(0)
+
+        invoice = self.add(SalesInvoice(
+            reference=next(self.inv_refs), customer=order.customer, sales_order=order,
+            date=day, due_date=due_date, state=state,
+            payment_date=day if state == 'paid' else None,
+            payment_method=rng.choice(PAYMENT_METHODS) if amount_paid else '',
+            untaxed_amount=order.untaxed_amount, tax_amount=order.tax_amount,
+            total_amount=order.total_amount, amount_paid=amount_paid,
+            amount_due=order.total_amount - amount_paid,
+        ), when)
+        for line in lines:
+            self.add(SalesInvoiceLine(
+                invoice=invoice, product=line.product, description=line.description,
+                quantity=line.quantity, unit_price=line.unit_price, subtotal=line.subtotal,
+            ), when)
+        if amount_paid:
+            self.add(InvoicePayment(
+                invoice=invoice, date=day, amount=amount_paid, payment_method=invoice.payment_method,
+            ), when)
+
+    def create_purchase(self, day, age):
+        rng = self.rng
+        when = self.random_time(day)
+        vendor = rng.choice(self.supplying_vendors)
+        warehouse, stock, bins = rng.choice(self.warehouses)
+
+        if age > 7:
+            state = rng.choices(['done', 'received', 'cancelled'], [85, 10, 5])[0]
+        else:
+            state = rng.choice(['draft', 'confirmed', 'sent'])
+        received = state in ('received', 'done')
+
+        po = self.add(PurchaseOrder(
+            reference=next(self.po_refs), vendor=vendor, date=day, state=state,
+            expected_date=day + timedelta(days=rng.randint(1, 14)), delivery_location=stock,
+        ), when)
+
+        untaxed = Decimal(0)
+        supplied = self.vendor_products[vendor.id]
+        for product in rng.sample(supplied, min(len(supplied), rng.randint(1, 5))):
+            quantity = Decimal(rng.randint(10, 500))
+            subtotal = money(quantity * product.standard_price)
+            untaxed += subtotal
+            self.add(POLine(
+                purchase_order=po, product=product, description=product.name,
+                quantity=quantity, unit_price=product.standard_price, subtotal=subtotal,
+                quantity_received=quantity if received else Decimal(0),
+                quantity_billed=quantity if state == 'done' else Decimal(0),
+            ), when)
+            if received:
+                self.create_move(product, self.supplier_location, stock, quantity, when, po.reference)
+
+        po.untaxed_amount = untaxed
+        po.tax_amount = money(untaxed * TAX_RATE)
+        po.total_amount = po.untaxed_amount + po.tax_amount
+        if state == 'done':
+            po.bill_reference = f'BILL-{po.reference}'
+            po.bill_date = day
+            po.bill_amount = po.total_amount
+
+    def create_move(self, product, source, dest, quantity, when, origin):
+        if source.location_type == 'supplier':
+            move_type = 'incoming'
+        elif dest.location_type == 'customer':
+            move_type = 'outgoing'
+        else:
+            move_type = 'internal'
+        self.add(StockMove(
+            reference=next(self.move_refs), product=product,
+            location_src=source, location_dest=dest,
+            quantity=quantity, quantity_done=quantity, unit_price=product.standard_price,
+            state='done', move_type=move_type, scheduled_date=when, date_done=when, origin=origin,
+        ), when)
+        for location, sign in ((source, -1), (dest, 1)):
+            if location.location_type == 'internal':
+                key = (product.id, location.id)
+                self.net_stock[key] = self.net_stock.get(key, 0) + sign * quantity
+
+    def create_quants(self):
+        """On-hand quantities: net of the generated moves, topped up where sales outran receipts"""
+        self.stdout.write('  Creating stock quants...')
+        when = self.now
+        products = {product.id: product for product in self.products}
+        for product in self.products:
+            for warehouse, stock, bins in self.warehouses:
+                self.net_stock.setdefault((product.id, stock.id), 0)
+
+        for (product_id, location_id), quantity in self.net_stock.items():
+            product = products[product_id]
+            if quantity <= 0:
+                quantity = product.reorder_point + self.rng.randint(0, 100)
+            self.add(StockQuant(
+                product=product, location_id=location_id, quantity=Decimal(quantity),
+                unit_cost=product.standard_price, incoming_date=when,
+            ), when)
+            self.maybe_flush()
@@ -14,6 +14,8 @@ from apps.sales.models import (
 )
 from apps.purchasing.models import RequestForQuotation, RFQLine, PurchaseOrder, POLine
 from apps.manufacturing.models import BillOfMaterials, BOMLine, ManufacturingOrder
+from apps.manufacturing.services import BOMAvailabilityService, KitService
+from apps.inventory.services import ProductCostService
 
 
 class Command(BaseCommand):
@@ -32,9 +34,20 @@ class Command(BaseCommand):
         self.create_bom()
         self.create_rfq_and_po()
         self.create_quotations_and_orders()
+        self.rebuild_derived_tables()
         
         self.stdout.write(self.style.SUCCESS('\n✅ Database seeded successfully!'))
 
+    def rebuild_derived_tables(self):
+        # Stock was written straight to StockQuant, without stock_changed
+        self.stdout.write('  Rebuilding BOM availability...')
+        KitService.invalidate()
+        rows = BOMAvailabilityService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'    ✓ {rows} BOM availability rows'))
+        self.stdout.write('  Rebuilding product costs...')
+        rows = ProductCostService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'    ✓ {rows} product cost rows'))
+
     def create_uom(self):
         self.stdout.write('  Creating Units of Measure...')
         
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:00
+
+import core.utils
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductBarcode',
+            fields=[
+                ('id', models.CharField(default=core.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('barcode', models.CharField(max_length=50)),
+                ('quantity', models.DecimalField(decimal_places=4, default=Decimal('1.0000'), help_text='Product units per scan', max_digits=12)),
+                ('is_active', models.BooleanField(default=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='barcodes', to='products.product')),
+                ('uom', models.ForeignKey(blank=True, help_text='Unit printed on the package, if not the product unit', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='barcodes', to='products.unitofmeasure', verbose_name='Packaging Unit')),
+            ],
+            options={
+                'ordering': ['product', 'barcode'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('barcode',), name='productbarcode_active_unique')],
+            },
+        ),
+    ]
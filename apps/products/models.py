@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from decimal import Decimal
 
@@ -76,6 +78,17 @@ PRODUCT_TYPE_CHOICES = (
     ('service', 'Service'),        # No stock, e.g. delivery fee
 )
 
+# Full-text search runs over these with the 'simple' configuration, so codes
+# and Indonesian names are tokenized as written
+PRODUCT_SEARCH_FIELDS = ('name', 'internal_reference', 'barcode')
+PRODUCT_SEARCH_CONFIG = 'simple'
+
+
+def product_search_vector():
+    """The tsvector expression behind product_search_idx; queries must use the same one"""
+    return SearchVector(*PRODUCT_SEARCH_FIELDS, config=PRODUCT_SEARCH_CONFIG)
+
+
 COST_METHOD_CHOICES = (
     ('standard', 'Standard Price'),
     ('average', 'Average Cost'),
@@ -168,6 +181,11 @@ class Product(BaseModel):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['barcode'], name='product_barcode_idx'),
+            GinIndex(product_search_vector(), name='product_search_idx'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='product_name_trgm_idx'),
+        ]
 
     def __str__(self):
         if self.internal_reference:
@@ -198,3 +216,45 @@ class Product(BaseModel):
         """Return the purchase UOM if set, otherwise the default UOM"""
         return self.purchase_uom or self.uom
 
+
+
+class ProductBarcode(BaseModel):
+    """
+    Additional barcode for a product, e.g. a supplier code or a packaging
+    unit (a box of 12 scans as quantity 12)
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='barcodes'
+    )
+    barcode = models.CharField(max_length=50)
+    uom = models.ForeignKey(
+        UnitOfMeasure,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='barcodes',
+        verbose_name='Packaging Unit',
+        help_text='Unit printed on the package, if not the product unit'
+    )
+    quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=Decimal('1.0000'),
+        help_text='Product units per scan'
+    )
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['product', 'barcode']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['barcode'],
+                condition=models.Q(is_active=True),
+                name='productbarcode_active_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.barcode} - {self.product.name}"
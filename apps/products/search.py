@@ -0,0 +1,94 @@
+"""
+Product search
+
+On PostgreSQL a search matches products when
+- the 'simple' tsvector over name, internal_reference and barcode matches
+  every term of the query as a prefix (product_search_idx), or
+- the name is trigram-similar to the query, which tolerates typos
+  (product_name_trgm_idx), or
+- one of its vendor product codes is (vendorproduct_code_trgm_idx).
+
+Results are ranked by full-text rank plus name similarity, with exact
+internal reference and barcode matches first. Other databases fall back to
+case-insensitive substring matching on the same columns.
+
+    products = search_products('kopi susu', Product.objects.filter(can_be_sold=True))
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from apps.vendors.models import VendorProduct
+from .models import PRODUCT_SEARCH_CONFIG, PRODUCT_SEARCH_FIELDS, Product, product_search_vector
+
+TERM_RE = re.compile(r'\w+')
+VENDOR_CODE_MATCH_LIMIT = 200
+
+
+def prefix_query(text):
+    """'kopi su' -> 'kopi:* & su:*'; None when there are no terms"""
+    terms = TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def exact_code_match(text):
+    return Q(internal_reference__iexact=text) | Q(barcode=text)
+
+
+def search_products(text, queryset=None):
+    """Products matching `text`, best match first"""
+    if queryset is None:
+        queryset = Product.objects.all()
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(text, queryset)
+    return _search_fallback(text, queryset)
+
+
+def _search_postgres(text, queryset):
+    # Vendor codes are looked up first: a subquery inside the OR below would
+    # turn the bitmap index scans into a sequential scan with a SubPlan filter
+    vendor_matches = list(VendorProduct.objects.filter(
+        vendor_product_code__trigram_word_similar=text
+    ).order_by().values_list('product_id', flat=True).distinct()[:VENDOR_CODE_MATCH_LIMIT])
+
+    match = Q(name__trigram_word_similar=text)
+    if vendor_matches:
+        match |= Q(pk__in=vendor_matches)
+    rank = TrigramWordSimilarity(text, 'name')
+
+    raw_query = prefix_query(text)
+    if raw_query:
+        tsquery = SearchQuery(raw_query, config=PRODUCT_SEARCH_CONFIG, search_type='raw')
+        queryset = queryset.annotate(search=product_search_vector())
+        match |= Q(search=tsquery)
+        rank = rank + SearchRank(F('search'), tsquery)
+
+    return queryset.filter(match).annotate(
+        rank=rank + Case(When(exact_code_match(text), then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+    ).order_by('-rank', 'name', 'pk')
+
+
+def _search_fallback(text, queryset):
+    match = Q()
+    for term in TERM_RE.findall(text) or [text]:
+        term_match = Q(pk__in=VendorProduct.objects.filter(
+            vendor_product_code__icontains=term
+        ).values('product_id'))
+        for field in PRODUCT_SEARCH_FIELDS:
+            term_match |= Q(**{f'{field}__icontains': term})
+        match &= term_match
+
+    return queryset.filter(match).annotate(rank=Case(
+        When(exact_code_match(text), then=Value(2.0)),
+        When(name__istartswith=text, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField()
+    )).order_by('-rank', 'name', 'pk')
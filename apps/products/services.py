@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import LocalCache
+from core.instrumentation import record_cache_hit, record_cache_miss
+from core.metrics import instrument_service
+from .models import Product, ProductBarcode
+
+# Unknown codes are cached too, briefly, so repeated bad scans skip the database
+NOT_FOUND = {}
+NOT_FOUND_TIMEOUT = 60
+
+_local = LocalCache(
+    maxsize=getattr(settings, 'BARCODE_LOCAL_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'BARCODE_LOCAL_CACHE_TTL', 30),
+)
+
+
+def _cache_key(code):
+    return f'barcode:v1:{code}'
+
+
+@instrument_service
+class BarcodeService:
+    """
+    Resolve scanned barcodes to product, unit and price
+
+    A scan is served from a process-local LRU, then the shared cache (Redis
+    when REDIS_CACHE_URL is set), then the database. Results, including
+    unknown codes, are cached as ready-to-send dicts; saves and deletes of
+    products and barcodes invalidate them (apps.products.signals).
+    """
+
+    @staticmethod
+    def resolve(code):
+        """The scan result for `code`, or None when no active product has it"""
+        return BarcodeService.resolve_many([code]).get(code)
+
+    @staticmethod
+    def resolve_many(codes):
+        """{code: scan result} for the codes that resolve"""
+        codes = {code.strip() for code in codes if code and code.strip()}
+        results = {}
+
+        missing = set()
+        for code in codes:
+            entry = _local.get(code)
+            if entry is None:
+                missing.add(code)
+            else:
+                record_cache_hit()
+                results[code] = entry
+
+        if missing:
+            keys = {_cache_key(code): code for code in missing}
+            for key, entry in cache.get_many(list(keys)).items():
+                record_cache_hit()
+                _local.set(keys[key], entry)
+                results[keys[key]] = entry
+                missing.discard(keys[key])
+
+        if missing:
+            for code in missing:
+                record_cache_miss()
+            loaded = BarcodeService._load(missing)
+            timeout = getattr(settings, 'BARCODE_CACHE_TIMEOUT', 3600)
+            cache.set_many({_cache_key(code): entry for code, entry in loaded.items() if entry}, timeout)
+            cache.set_many({_cache_key(code): entry for code, entry in loaded.items() if not entry}, NOT_FOUND_TIMEOUT)
+            for code, entry in loaded.items():
+                _local.set(code, entry)
+                results[code] = entry
+
+        return {code: entry for code, entry in results.items() if entry}
+
+    @staticmethod
+    def _load(codes):
+        entries = dict.fromkeys(codes, NOT_FOUND)
+        packaging = ProductBarcode.objects.filter(
+            barcode__in=codes, is_active=True, product__is_active=True
+        ).select_related('product__uom', 'uom')
+        for row in packaging:
+            entries[row.barcode] = BarcodeService._entry(row.barcode, row.product, row.uom, row.quantity)
+
+        rest = [code for code, entry in entries.items() if entry is NOT_FOUND]
+        if rest:
+            # Product.barcode isn't unique; the first active product by name wins
+            products = Product.objects.filter(
+                barcode__in=rest, is_active=True
+            ).select_related('uom').order_by('name', 'pk')
+            for product in products:
+                if entries[product.barcode] is NOT_FOUND:
+                    entries[product.barcode] = BarcodeService._entry(product.barcode, product, None, Decimal('1'))
+        return entries
+
+    @staticmethod
+    def _entry(code, product, uom, quantity):
+        uom = uom or product.uom
+        return {
+            'barcode': code,
+            'product_id': product.pk,
+            'name': product.name,
+            'internal_reference': product.internal_reference,
+            'product_type': product.product_type,
+            'uom_id': uom.pk,
+            'uom': uom.symbol,
+            'quantity': float(quantity),
+            'list_price': float(product.list_price * quantity),
+            'standard_price': float(product.standard_price * quantity),
+        }
+
+    @staticmethod
+    def invalidate(*codes):
+        codes = [code for code in codes if code]
+        for code in codes:
+            _local.delete(code)
+        if codes:
+            cache.delete_many([_cache_key(code) for code in codes])
+
+    @staticmethod
+    @transaction.atomic
+    def add_barcode(product, barcode, uom=None, quantity=Decimal('1'), user=None):
+        """Register another barcode for a product"""
+        barcode = (barcode or '').strip()
+        if not barcode:
+            raise ValueError("Barcode is required")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if ProductBarcode.objects.filter(barcode=barcode, is_active=True).exists() or \
+                Product.objects.filter(barcode=barcode, is_active=True).exclude(pk=product.pk).exists():
+            raise ValueError(f"Barcode {barcode} is already in use")
+
+        return ProductBarcode.objects.create(
+            product=product,
+            barcode=barcode,
+            uom=uom,
+            quantity=quantity,
+            actor=user,
+        )
@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Product, ProductBarcode, UnitOfMeasure
+from .services import BarcodeService
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=ProductBarcode)
+def remember_old_barcode(sender, instance, raw=False, **kwargs):
+    # A changed barcode must drop the cached result of the old one too
+    instance._old_barcode = None
+    if not raw and not instance._state.adding:
+        instance._old_barcode = sender.objects.filter(pk=instance.pk).values_list('barcode', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+def invalidate_product_barcodes(sender, instance, **kwargs):
+    # Packaging barcodes carry the product's name and price as well
+    codes = [
+        instance.barcode,
+        getattr(instance, '_old_barcode', None),
+        *ProductBarcode.objects.filter(product=instance).values_list('barcode', flat=True),
+    ]
+    # After commit, so no other process caches the old row again in between
+    transaction.on_commit(lambda: BarcodeService.invalidate(*codes))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductBarcode)
+@receiver(post_delete, sender=ProductBarcode)
+def invalidate_barcode(sender, instance, **kwargs):
+    codes = [instance.barcode, getattr(instance, '_old_barcode', None)]
+    transaction.on_commit(lambda: BarcodeService.invalidate(*codes))
+
+
+@receiver(post_save, sender=UnitOfMeasure)
+def invalidate_uom_barcodes(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    codes = [
+        *Product.objects.filter(uom=instance).exclude(barcode=None).values_list('barcode', flat=True),
+        *ProductBarcode.objects.filter(Q(uom=instance) | Q(product__uom=instance)).values_list('barcode', flat=True),
+    ]
+    transaction.on_commit(lambda: BarcodeService.invalidate(*codes))
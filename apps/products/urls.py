@@ -3,7 +3,7 @@ from .views import (
     CategoryListView, CategoryCreateView, CategoryUpdateView, CategoryDeleteView,
     UnitOfMeasureListView, UnitOfMeasureCreateView, UnitOfMeasureUpdateView, UnitOfMeasureDeleteView,
     ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView,
-    get_product_price,
+    get_product_price, product_autocomplete, barcode_scan,
 )
 
 urlpatterns = [
@@ -27,6 +27,8 @@ urlpatterns = [
     path('products/<str:pk>/delete/', ProductDeleteView.as_view(), name='product-delete'),
     
     # API
+    path('api/products/search/', product_autocomplete, name='product-autocomplete-api'),
+    path('api/barcodes/<str:code>/', barcode_scan, name='barcode-scan-api'),
     path('api/products/<str:product_id>/price/', get_product_price, name='product-price-api'),
 ]
 
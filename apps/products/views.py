@@ -1,3 +1,4 @@
+from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView
@@ -5,10 +6,14 @@ from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.shortcuts import redirect
 
-from core.views import LoginRequiredMixinView
+from core.instrumentation import query_budget
+from core.pagination import keyset_page
+from core.views import LoginRequiredMixinView, ReplicaReadMixin, read_from_replica
 from apps.employees.models import EmployeeSetting
 from .models import Category, UnitOfMeasure, Product
 from .forms import CategoryForm, UnitOfMeasureForm, ProductForm
+from .search import search_products
+from .services import BarcodeService
 
 
 class BaseContextMixin:
@@ -21,7 +26,7 @@ class BaseContextMixin:
 
 
 # Category Views
-class CategoryListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class CategoryListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Category
     template_name = "products/category_list.html"
     context_object_name = "categories"
@@ -47,7 +52,7 @@ class CategoryDeleteView(LoginRequiredMixinView, BaseContextMixin, DeleteView):
 
 
 # Unit of Measure Views
-class UnitOfMeasureListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class UnitOfMeasureListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = UnitOfMeasure
     template_name = "products/uom_list.html"
     context_object_name = "uoms"
@@ -73,22 +78,24 @@ class UnitOfMeasureDeleteView(LoginRequiredMixinView, BaseContextMixin, DeleteVi
 
 
 # Product Views
-class ProductListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class ProductListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Product
     template_name = "products/product_list.html"
     context_object_name = "products"
+    paginate_by = 50
+    query_budget = 10
     
     def get_queryset(self):
         queryset = Product.objects.select_related('category', 'uom').order_by('name')
         
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-        
         category = self.request.GET.get('category')
         if category:
             queryset = queryset.filter(category_id=category)
         
+        search = self.request.GET.get('search')
+        if search:
+            queryset = search_products(search, queryset)
+        
         return queryset
     
     def get_context_data(self, **kwargs):
@@ -97,7 +104,7 @@ class ProductListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return context
 
 
-class ProductDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class ProductDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = Product
     template_name = "products/product_detail.html"
     context_object_name = "product"
@@ -159,3 +166,54 @@ def get_product_price(request, product_id):
             'success': False,
             'error': str(e)
         }, status=500)
+
+
+@query_budget(4)
+@require_http_methods(["GET"])
+@login_required(login_url='/login/')
+@read_from_replica
+def product_autocomplete(request):
+    """
+    Ranked product search for line form pickers
+
+    ?q=         search text (name, code, barcode or vendor product code)
+    ?sellable=1 / ?purchasable=1 / ?type=stockable,consumable  narrow the products
+    ?cursor=    the `next` cursor of the previous page; ?limit= up to 50
+    """
+    queryset = Product.objects.filter(is_active=True).select_related('uom')
+    if request.GET.get('sellable') == '1':
+        queryset = queryset.filter(can_be_sold=True)
+    if request.GET.get('purchasable') == '1':
+        queryset = queryset.filter(can_be_purchased=True)
+    product_types = request.GET.get('type')
+    if product_types:
+        queryset = queryset.filter(product_type__in=product_types.split(','))
+
+    search = request.GET.get('q', '').strip()
+    if search:
+        queryset = search_products(search, queryset)
+        ordering = ('-rank', 'name', 'pk')
+    else:
+        ordering = ('name', 'pk')
+
+    return keyset_page(request, queryset, ordering, lambda product: {
+        'id': product.pk,
+        'text': str(product),
+        'name': product.name,
+        'internal_reference': product.internal_reference,
+        'barcode': product.barcode,
+        'uom': product.uom.symbol,
+        'list_price': float(product.list_price),
+        'standard_price': float(product.standard_price),
+    })
+
+
+@query_budget(4)
+@require_http_methods(["GET"])
+@login_required(login_url='/login/')
+def barcode_scan(request, code):
+    """Product, unit and price for a scanned barcode, served from cache"""
+    entry = BarcodeService.resolve(code)
+    if entry is None:
+        return JsonResponse({'success': False, 'error': 'Unknown barcode'}, status=404)
+    return JsonResponse({'success': True, **entry})
@@ -3,6 +3,7 @@ from .models import RequestForQuotation, RFQLine, PurchaseOrder, POLine
 from apps.vendors.models import Vendor
 from apps.products.models import Product
 from apps.inventory.models import Location
+from core.widgets import RemoteModelChoiceField, RemoteSelect
 from decimal import Decimal
 
 
@@ -34,7 +35,7 @@ class RFQLineForm(forms.ModelForm):
         model = RFQLine
         fields = ['product', 'description', 'quantity', 'unit_price']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'purchasable': '1'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'description': forms.TextInput(attrs={
@@ -97,7 +98,7 @@ class POLineForm(forms.ModelForm):
         model = POLine
         fields = ['product', 'description', 'quantity', 'unit_price']
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'purchasable': '1'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'description': forms.TextInput(attrs={
@@ -149,11 +150,13 @@ class ReceiveProductsForm(forms.Form):
 
 class ConvertRFQForm(forms.Form):
     """Form for converting RFQ to PO"""
-    delivery_location = forms.ModelChoiceField(
+    delivery_location = RemoteModelChoiceField(
         queryset=Location.objects.filter(is_active=True, location_type='internal'),
-        widget=forms.Select(attrs={
+        url_name='location-choices-api',
+        params={'type': 'internal'},
+        attrs={
             'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
-        })
+        }
     )
 
 
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.models import Warehouse
+from apps.purchasing.services import ReplenishmentService
+
+
+class Command(BaseCommand):
+    help = 'Create draft RFQs, one per vendor, for products at or below their reorder point'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warehouse', help='Warehouse code; count only its stock as available')
+        parser.add_argument('--actor', help='Username recorded as the actor of the RFQs')
+        parser.add_argument('--dry-run', action='store_true', help='Show the shortfalls, create nothing')
+
+    def handle(self, *args, **options):
+        warehouse = None
+        if options['warehouse']:
+            warehouse = Warehouse.objects.filter(code=options['warehouse']).first()
+            if warehouse is None:
+                raise CommandError(f'Unknown warehouse: {options["warehouse"]}')
+
+        actor = None
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+            if actor is None:
+                raise CommandError(f'Unknown user: {options["actor"]}')
+
+        if options['dry_run']:
+            for product in ReplenishmentService.shortfalls(warehouse):
+                self.stdout.write(
+                    f'{product.internal_reference or product.pk}  {product.name}: '
+                    f'available {product.available}, incoming {product.incoming}, '
+                    f'reorder point {product.reorder_point}'
+                )
+            return
+
+        rfqs, unsourced = ReplenishmentService.run(warehouse=warehouse, user=actor)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(rfqs)} RFQs created'))
+        for rfq in rfqs:
+            self.stdout.write(f'  {rfq.reference}  {rfq.vendor.name}  Rp {rfq.total_amount:,.0f}')
+        if unsourced:
+            self.stdout.write(self.style.WARNING(f'{len(unsourced)} products have no active vendor:'))
+            for product in unsourced:
+                self.stdout.write(f'  {product.internal_reference or product.pk}  {product.name}')
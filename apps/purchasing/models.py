@@ -2,7 +2,7 @@ from django.db import models
 from decimal import Decimal
 from django.utils import timezone
 
-from core.models import BaseModel
+from core.models import BaseModel, VersionedModel
 from apps.products.models import Product
 from apps.vendors.models import Vendor
 from apps.inventory.models import Location, StockPicking
@@ -154,7 +154,7 @@ class RFQLine(BaseModel):
         self.rfq.compute_totals()
 
 
-class PurchaseOrder(BaseModel):
+class PurchaseOrder(VersionedModel):
     """Purchase Order"""
     reference = models.CharField(max_length=50, unique=True, blank=True)
     vendor = models.ForeignKey(
@@ -1,15 +1,27 @@
 """
 Purchasing business logic services
 """
+from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from .models import RequestForQuotation, RFQLine, PurchaseOrder, POLine
 from apps.inventory.models import Location, StockPicking, StockPickingLine
 from apps.inventory.services import StockService
+from apps.products.models import Product
+from apps.vendors.models import Vendor, VendorProduct
+from core.metrics import instrument_service
+from core.utils import next_references
 
+# RFQs and POs whose products are already being bought
+OPEN_RFQ_STATES = ('draft', 'sent', 'received')
+OPEN_PO_STATES = ('draft', 'confirmed', 'sent', 'partially_received')
 
+
+@instrument_service
 class RFQService:
     """Service class for RFQ operations"""
     
@@ -81,6 +93,7 @@ class RFQService:
         return rfq
 
 
+@instrument_service
 class POService:
     """Service class for Purchase Order operations"""
     
@@ -91,7 +104,7 @@ class POService:
             raise ValueError("PO must be in draft state to confirm")
         
         po.state = 'confirmed'
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         return po
     
     @staticmethod
@@ -101,7 +114,7 @@ class POService:
             raise ValueError("PO must be confirmed to send")
         
         po.state = 'sent'
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         return po
     
     @staticmethod
@@ -149,7 +162,7 @@ class POService:
                 )
         
         po.picking = picking
-        po.save(update_fields=['picking'])
+        po.save_versioned(update_fields=['picking'])
         
         return picking
     
@@ -225,7 +238,7 @@ class POService:
         else:
             po.state = 'partially_received'
         
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         
         return po
     
@@ -236,7 +249,7 @@ class POService:
             raise ValueError("PO must be fully received before billing")
         
         po.state = 'billed'
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         return po
     
     @staticmethod
@@ -246,7 +259,7 @@ class POService:
             raise ValueError("PO must be billed before marking as done")
         
         po.state = 'done'
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         return po
     
     @staticmethod
@@ -264,7 +277,7 @@ class POService:
             po.bill_amount = bill_amount
         else:
             po.bill_amount = po.total_amount
-        po.save(update_fields=['state', 'bill_reference', 'bill_date', 'bill_amount'])
+        po.save_versioned(update_fields=['state', 'bill_reference', 'bill_date', 'bill_amount'])
         return po
 
     @staticmethod
@@ -276,7 +289,7 @@ class POService:
         po.state = 'done'
         po.payment_date = payment_date or timezone.now().date()
         po.payment_reference = payment_reference
-        po.save(update_fields=['state', 'payment_date', 'payment_reference'])
+        po.save_versioned(update_fields=['state', 'payment_date', 'payment_reference'])
         return po
 
     @staticmethod
@@ -286,10 +299,127 @@ class POService:
             raise ValueError("Cannot cancel PO that has been received or billed")
 
         po.state = 'cancelled'
-        po.save(update_fields=['state'])
+        po.save_versioned(update_fields=['state'])
         return po
 
 
 # Import models for F expression
 from django.db import models
 
+
+@instrument_service
+class ReplenishmentService:
+    """Turn products at or below their reorder point into RFQs"""
+    
+    @staticmethod
+    def shortfalls(warehouse=None):
+        """
+        Purchasable stockable products whose available stock plus open PO
+        quantities is at or below the reorder point, and that aren't on an
+        open RFQ yet, annotated with `available` and `incoming`
+        """
+        incoming = POLine.objects.filter(
+            product=OuterRef('pk'),
+            purchase_order__state__in=OPEN_PO_STATES,
+            quantity__gt=F('quantity_received')
+        ).order_by().values('product').annotate(
+            total=Sum(F('quantity') - F('quantity_received'))
+        ).values('total')
+        
+        products = StockService.with_available(Product.objects.filter(
+            is_active=True,
+            product_type='stockable',
+            can_be_purchased=True,
+            reorder_point__gt=0
+        ), warehouse=warehouse).annotate(incoming=Coalesce(
+            Subquery(incoming, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Value(Decimal('0.00'))
+        ))
+        return products.filter(
+            available__lte=F('reorder_point') - F('incoming')
+        ).exclude(
+            rfq_lines__rfq__state__in=OPEN_RFQ_STATES
+        )
+    
+    @staticmethod
+    @transaction.atomic
+    def run(warehouse=None, user=None):
+        """
+        Create one draft RFQ per vendor for the current shortfalls
+        
+        Each product goes to its preferred active vendor (else the one with
+        the shortest lead time, then the lowest price) for the larger of its
+        reorder quantity and its shortfall, at least the vendor's minimum.
+        Products already on an open RFQ are left alone, so running again
+        before the RFQs are handled creates nothing new.
+        
+        Returns:
+            (rfqs, unsourced): the RFQs created, and the short products no
+            active vendor supplies
+        """
+        products = {product.pk: product for product in ReplenishmentService.shortfalls(warehouse)}
+        if not products:
+            return [], []
+        
+        # One joined query; the first row per product is its vendor
+        sources = {}
+        for vendor_product in VendorProduct.objects.filter(
+            product_id__in=list(products),
+            is_active=True,
+            vendor__is_active=True
+        ).select_related('vendor').order_by('product_id', '-is_preferred', 'lead_time_days', 'price', 'pk'):
+            sources.setdefault(vendor_product.product_id, vendor_product)
+        unsourced = [product for pk, product in products.items() if pk not in sources]
+        
+        # Concurrent runs queue up on the vendors, then see each other's RFQs
+        list(Vendor.objects.filter(
+            pk__in={vendor_product.vendor_id for vendor_product in sources.values()}
+        ).order_by('pk').select_for_update())
+        taken = set(RFQLine.objects.filter(
+            product_id__in=list(sources),
+            rfq__state__in=OPEN_RFQ_STATES
+        ).values_list('product_id', flat=True))
+        
+        by_vendor = defaultdict(list)
+        for product_id, vendor_product in sources.items():
+            if product_id in taken:
+                continue
+            product = products[product_id]
+            shortfall = product.reorder_point - product.available - product.incoming
+            quantity = max(product.reorder_qty, shortfall, vendor_product.min_qty)
+            if quantity > 0:
+                by_vendor[vendor_product.vendor].append((product, vendor_product, quantity))
+        if not by_vendor:
+            return [], unsourced
+        
+        rfqs = []
+        lines = []
+        references = next_references(RequestForQuotation.objects, 'reference', 'RFQ-', 5, len(by_vendor))
+        for reference, (vendor, items) in zip(references, by_vendor.items()):
+            rfq = RequestForQuotation(
+                reference=reference,
+                vendor=vendor,
+                notes='Automatic replenishment',
+                actor=user
+            )
+            rfq_lines = [
+                RFQLine(
+                    rfq=rfq,
+                    product=product,
+                    description=vendor_product.vendor_product_name or product.name,
+                    quantity=quantity,
+                    unit_price=vendor_product.price,
+                    subtotal=(quantity * vendor_product.price).quantize(Decimal('0.01')),
+                    actor=user
+                )
+                for product, vendor_product, quantity in items
+            ]
+            lines.extend(rfq_lines)
+            rfq.untaxed_amount = sum(line.subtotal for line in rfq_lines)
+            rfq.tax_amount = (rfq.untaxed_amount * Decimal('0.11')).quantize(Decimal('0.01'))  # PPN 11%
+            rfq.total_amount = rfq.untaxed_amount + rfq.tax_amount
+            rfqs.append(rfq)
+        
+        RequestForQuotation.objects.bulk_create(rfqs)
+        RFQLine.objects.bulk_create(lines, batch_size=1000)
+        return rfqs, unsourced
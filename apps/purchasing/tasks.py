@@ -0,0 +1,13 @@
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task
+
+from .services import ReplenishmentService
+
+
+@db_periodic_task(crontab(hour='6', minute='0'))
+def replenishment_task():
+    rfqs, unsourced = ReplenishmentService.run()
+    return {
+        'rfqs': [rfq.reference for rfq in rfqs],
+        'unsourced': [product.pk for product in unsourced],
+    }
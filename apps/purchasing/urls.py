@@ -3,7 +3,7 @@ from .views import (
     RFQListView, RFQDetailView, RFQCreateView, RFQUpdateView,
     RFQLineCreateView, RFQLineUpdateView, RFQLineDeleteView,
     RFQSendView, RFQReceiveQuotationView, RFQConvertToPOView, RFQCancelView,
-    POListView, PODetailView, POCreateView, POUpdateView,
+    POListView, POExportView, PODetailView, POCreateView, POUpdateView,
     POLineCreateView, POLineDeleteView,
     POConfirmView, POSendView, POReceiveView, POMarkBilledView, POMarkDoneView, POCancelView,
 )
@@ -26,6 +26,7 @@ urlpatterns = [
     
     # Purchase Orders
     path('po/', POListView.as_view(), name='po-list'),
+    path('po/export/', POExportView.as_view(), name='po-export'),
     path('po/create/', POCreateView.as_view(), name='po-create'),
     path('po/<str:pk>/', PODetailView.as_view(), name='po-detail'),
     path('po/<str:pk>/edit/', POUpdateView.as_view(), name='po-update'),
@@ -6,7 +6,8 @@ from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
 from django.http import HttpResponseRedirect
 
-from core.views import LoginRequiredMixinView
+from core.exports import ExportMixin
+from core.views import LoginRequiredMixinView, ReplicaReadMixin, VersionedUpdateMixin
 from apps.employees.models import EmployeeSetting
 from .models import RequestForQuotation, RFQLine, PurchaseOrder, POLine
 from .forms import RFQForm, RFQLineForm, POForm, POLineForm, ReceiveProductsForm, ConvertRFQForm, POBillingForm, POPaymentForm
@@ -23,7 +24,7 @@ class BaseContextMixin:
 
 
 # RFQ Views
-class RFQListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class RFQListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = RequestForQuotation
     template_name = "purchasing/rfq_list.html"
     context_object_name = "rfqs"
@@ -38,7 +39,7 @@ class RFQListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class RFQDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class RFQDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = RequestForQuotation
     template_name = "purchasing/rfq_detail.html"
     context_object_name = "rfq"
@@ -172,13 +173,14 @@ class RFQCancelView(LoginRequiredMixinView, View):
 
 
 # Purchase Order Views
-class POListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class POListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = PurchaseOrder
     template_name = "purchasing/po_list.html"
     context_object_name = "pos"
+    query_budget = 10
     
     def get_queryset(self):
-        queryset = PurchaseOrder.objects.select_related('vendor').order_by('-created_at')
+        queryset = PurchaseOrder.objects.select_related('vendor').prefetch_related('lines').order_by('-created_at')
         
         state = self.request.GET.get('state')
         if state:
@@ -187,7 +189,26 @@ class POListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class PODetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class POExportView(ExportMixin, POListView):
+    export_filename = 'purchase-orders'
+    export_fields = [
+        ('Reference', 'reference'),
+        ('Date', 'date'),
+        ('Vendor', 'vendor__name'),
+        ('State', 'state'),
+        ('Expected Date', 'expected_date'),
+        ('Untaxed Amount', 'untaxed_amount'),
+        ('Tax', 'tax_amount'),
+        ('Total', 'total_amount'),
+        ('Bill Reference', 'bill_reference'),
+        ('Bill Date', 'bill_date'),
+        ('Bill Amount', 'bill_amount'),
+        ('Payment Date', 'payment_date'),
+        ('Payment Reference', 'payment_reference'),
+    ]
+
+
+class PODetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = PurchaseOrder
     template_name = "purchasing/po_detail.html"
     context_object_name = "po"
@@ -213,7 +234,7 @@ class POCreateView(LoginRequiredMixinView, BaseContextMixin, CreateView):
         return reverse('po-detail', kwargs={'pk': self.object.pk})
 
 
-class POUpdateView(LoginRequiredMixinView, BaseContextMixin, UpdateView):
+class POUpdateView(LoginRequiredMixinView, VersionedUpdateMixin, BaseContextMixin, UpdateView):
     model = PurchaseOrder
     form_class = POForm
     template_name = "purchasing/po_form.html"
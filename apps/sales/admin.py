@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Customer, SalesQuotation, SalesQuotationLine,
-    SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine
+    SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine, InvoicePayment
 )
 
 
@@ -20,6 +20,19 @@ class SalesInvoiceLineInline(admin.TabularInline):
     extra = 1
 
 
+class InvoicePaymentInline(admin.TabularInline):
+    # Payments change the invoice totals, so they are only recorded
+    # through SalesService.record_payment
+    model = InvoicePayment
+    extra = 0
+    fields = ('date', 'amount', 'payment_method', 'reference', 'source', 'actor')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('name', 'customer_type', 'phone', 'email', 'is_active')
@@ -48,4 +61,4 @@ class SalesInvoiceAdmin(admin.ModelAdmin):
     list_display = ('reference', 'customer', 'date', 'state', 'total_amount', 'amount_paid', 'amount_due')
     list_filter = ('state', 'date', 'payment_method')
     search_fields = ('reference', 'customer__name')
-    inlines = [SalesInvoiceLineInline]
+    inlines = [SalesInvoiceLineInline, InvoicePaymentInline]
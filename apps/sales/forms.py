@@ -1,4 +1,5 @@
 from django import forms
+from core.widgets import RemoteSelect
 from .models import (
     Customer, SalesQuotation, SalesQuotationLine,
     SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine
@@ -44,7 +45,7 @@ class SalesQuotationLineForm(forms.ModelForm):
         model = SalesQuotationLine
         fields = ['product', 'description', 'quantity', 'unit_price', 'discount_percent']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-input line-product'}),
+            'product': RemoteSelect('product-autocomplete-api', params={'sellable': '1'}, attrs={'class': 'form-input line-product'}),
             'description': forms.TextInput(attrs={'class': 'form-input'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01', 'min': '0.01'}),
             'unit_price': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
@@ -70,7 +71,7 @@ class SalesOrderLineForm(forms.ModelForm):
         model = SalesOrderLine
         fields = ['product', 'description', 'quantity', 'unit_price', 'discount_percent']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-input line-product'}),
+            'product': RemoteSelect('product-autocomplete-api', params={'sellable': '1'}, attrs={'class': 'form-input line-product'}),
             'description': forms.TextInput(attrs={'class': 'form-input'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01', 'min': '0.01'}),
             'unit_price': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
@@ -96,7 +97,7 @@ class SalesInvoiceLineForm(forms.ModelForm):
         model = SalesInvoiceLine
         fields = ['product', 'description', 'quantity', 'unit_price', 'discount_percent']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-input line-product'}),
+            'product': RemoteSelect('product-autocomplete-api', params={'sellable': '1'}, attrs={'class': 'form-input line-product'}),
             'description': forms.TextInput(attrs={'class': 'form-input'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01', 'min': '0.01'}),
             'unit_price': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
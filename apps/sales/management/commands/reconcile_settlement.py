@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sales.models import PAYMENT_METHOD_CHOICES
+from apps.sales.reconciliation import reconcile, write_exceptions
+from apps.sales.tasks import reconcile_settlement_task
+
+
+class Command(BaseCommand):
+    help = 'Match a QRIS/e-wallet/bank settlement CSV to open invoices and post the payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--method', default='qris', choices=[value for value, _ in PAYMENT_METHOD_CHOICES],
+            help='Payment method for lines without a payment_method column',
+        )
+        parser.add_argument('--date-tolerance', type=int, default=3,
+                            help='Days after the invoice date a settlement may match by amount')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--actor', help='Username recorded as the actor of the payments')
+        parser.add_argument('--exceptions', help='Write unmatched lines to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Match only, post nothing')
+        parser.add_argument('--queue', action='store_true', help='Run in the huey worker instead')
+
+    def handle(self, *args, **options):
+        path = options['path']
+
+        actor = None
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+            if actor is None:
+                raise CommandError(f'Unknown user: {options["actor"]}')
+
+        if options['queue']:
+            reconcile_settlement_task(
+                path, options['method'], options['date_tolerance'],
+                actor_id=actor.pk if actor else None, exceptions_path=options['exceptions'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ Queued reconciliation of {path}'))
+            return
+
+        start = time.perf_counter()
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as fileobj:
+                result = reconcile(
+                    fileobj, payment_method=options['method'], date_tolerance=options['date_tolerance'],
+                    chunk_size=options['chunk_size'], actor=actor, dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        verb = 'would be posted' if options['dry_run'] else 'posted'
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {result.matched} of {result.lines} lines {verb} (Rp {result.amount:,.0f}) in {elapsed:.1f}s'
+        ))
+        if not result.exceptions:
+            return
+
+        self.stdout.write(self.style.WARNING(f'  {len(result.exceptions)} exceptions'))
+        if options['exceptions']:
+            with open(options['exceptions'], 'w', newline='') as fileobj:
+                write_exceptions(result, fileobj)
+            self.stdout.write(f'  Exceptions written to {options["exceptions"]}')
+        else:
+            for row_number, transaction_id, reference, amount, date, reason in result.exceptions[:20]:
+                self.stdout.write(f'    row {row_number} {transaction_id or reference}: {reason}')
+            if len(result.exceptions) > 20:
+                self.stdout.write('    ... use --exceptions to write the full list')
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_salesorder_quotation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesinvoice',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-19 05:47
+
+import core.utils
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_salesinvoice_version_salesorder_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoicePayment',
+            fields=[
+                ('id', models.CharField(default=core.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('payment_method', models.CharField(blank=True, choices=[('cash', 'Cash'), ('bank_transfer', 'Bank Transfer'), ('credit_card', 'Credit Card'), ('debit_card', 'Debit Card'), ('e_wallet', 'E-Wallet'), ('qris', 'QRIS')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('source', models.CharField(choices=[('manual', 'Manual'), ('pos', 'Point of Sale'), ('bank', 'Bank Statement'), ('migrated', 'Migrated')], default='manual', max_length=20)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='sales.salesinvoice')),
+            ],
+            options={
+                'ordering': ['invoice', 'date', 'created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+def backfill_payments(apps, schema_editor):
+    """One migrated InvoicePayment per invoice that already has amount_paid"""
+    SalesInvoice = apps.get_model('sales', 'SalesInvoice')
+    InvoicePayment = apps.get_model('sales', 'InvoicePayment')
+
+    invoices = SalesInvoice.objects.filter(amount_paid__gt=0, payments__isnull=True).values_list(
+        'pk', 'amount_paid', 'payment_method', 'payment_reference', 'payment_date', 'date'
+    )
+    batch = []
+    for pk, amount_paid, method, reference, payment_date, date in invoices.iterator(chunk_size=2000):
+        batch.append(InvoicePayment(
+            invoice_id=pk,
+            amount=amount_paid,
+            payment_method=method,
+            reference=reference,
+            date=payment_date or date,
+            source='migrated',
+        ))
+        if len(batch) >= 2000:
+            InvoicePayment.objects.bulk_create(batch)
+            batch = []
+    InvoicePayment.objects.bulk_create(batch)
+
+
+def remove_migrated_payments(apps, schema_editor):
+    InvoicePayment = apps.get_model('sales', 'InvoicePayment')
+    InvoicePayment.objects.filter(source='migrated').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_invoicepayment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_payments, remove_migrated_payments),
+    ]
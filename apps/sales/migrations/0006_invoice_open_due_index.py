@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_backfill_invoice_payments'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesinvoice',
+            index=models.Index(condition=models.Q(('state__in', ['sent', 'partial'])), fields=['due_date'], name='sales_invoice_open_due_idx'),
+        ),
+    ]
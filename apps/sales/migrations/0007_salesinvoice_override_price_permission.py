@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_invoice_open_due_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='salesinvoice',
+            options={'ordering': ['-created_at'], 'permissions': [('override_price', 'Can change the price and discount of lines at checkout')]},
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from decimal import Decimal
 from django.utils import timezone
 
-from core.models import BaseModel
+from core.models import BaseModel, VersionedModel
 from apps.products.models import Product
 from apps.inventory.models import Location, StockPicking
 
@@ -43,6 +43,9 @@ INVOICE_STATE_CHOICES = (
     ('cancelled', 'Cancelled'),
 )
 
+# Invoices still waiting for payment
+OPEN_INVOICE_STATES = ('sent', 'partial', 'overdue')
+
 # Payment Methods
 PAYMENT_METHOD_CHOICES = (
     ('cash', 'Cash'),
@@ -53,6 +56,13 @@ PAYMENT_METHOD_CHOICES = (
     ('qris', 'QRIS'),
 )
 
+PAYMENT_SOURCE_CHOICES = (
+    ('manual', 'Manual'),
+    ('pos', 'Point of Sale'),
+    ('bank', 'Bank Statement'),
+    ('migrated', 'Migrated'),
+)
+
 
 class Customer(BaseModel):
     """Customer/Client for sales"""
@@ -251,7 +261,7 @@ class SalesQuotationLine(BaseModel):
         self.quotation.compute_totals()
 
 
-class SalesOrder(BaseModel):
+class SalesOrder(VersionedModel):
     """Sales Order"""
     reference = models.CharField(max_length=50, unique=True, blank=True)
     customer = models.ForeignKey(
@@ -441,7 +451,30 @@ class SalesOrderLine(BaseModel):
         return self.quantity - self.quantity_delivered
 
 
-class SalesInvoice(BaseModel):
+class SalesInvoiceQuerySet(models.QuerySet):
+    def past_due(self, today=None):
+        """Unpaid invoices whose due date has passed"""
+        return self.filter(
+            state__in=OPEN_INVOICE_STATES,
+            due_date__lt=today or timezone.localdate(),
+            amount_due__gt=0
+        )
+
+    def with_past_due(self, today=None):
+        """Annotate `past_due` so list templates don't compute it per row"""
+        return self.annotate(past_due=models.Case(
+            models.When(
+                state__in=OPEN_INVOICE_STATES,
+                due_date__lt=today or timezone.localdate(),
+                amount_due__gt=0,
+                then=models.Value(True)
+            ),
+            default=models.Value(False),
+            output_field=models.BooleanField()
+        ))
+
+
+class SalesInvoice(VersionedModel):
     """Sales Invoice for billing"""
     reference = models.CharField(max_length=50, unique=True, blank=True)
     customer = models.ForeignKey(
@@ -511,8 +544,21 @@ class SalesInvoice(BaseModel):
     
     notes = models.TextField(blank=True)
 
+    objects = SalesInvoiceQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Open invoices by due date, for the overdue sweep
+            models.Index(
+                fields=['due_date'],
+                name='sales_invoice_open_due_idx',
+                condition=models.Q(state__in=['sent', 'partial'])
+            ),
+        ]
+        permissions = [
+            ('override_price', 'Can change the price and discount of lines at checkout'),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.customer.name}"
@@ -606,3 +652,31 @@ class SalesInvoiceLine(BaseModel):
         
         super().save(*args, **kwargs)
         self.invoice.compute_totals()
+
+
+class InvoicePayment(BaseModel):
+    """A payment received against an invoice (see SalesService.record_payment)"""
+    invoice = models.ForeignKey(
+        SalesInvoice,
+        on_delete=models.CASCADE,
+        related_name='payments'
+    )
+    date = models.DateField(default=timezone.localdate)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    payment_method = models.CharField(
+        max_length=20,
+        choices=PAYMENT_METHOD_CHOICES,
+        blank=True
+    )
+    reference = models.CharField(max_length=100, blank=True)
+    source = models.CharField(
+        max_length=20,
+        choices=PAYMENT_SOURCE_CHOICES,
+        default='manual'
+    )
+
+    class Meta:
+        ordering = ['invoice', 'date', 'created_at']
+
+    def __str__(self):
+        return f"{self.invoice.reference}: {self.amount}"
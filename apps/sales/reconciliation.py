@@ -0,0 +1,232 @@
+"""
+Settlement reconciliation
+
+Matches the lines of a QRIS / e-wallet / bank settlement CSV against open
+sales invoices and posts the matches as InvoicePayments.
+
+Open invoices are loaded once, in a single streamed query, into in-memory
+hash indexes by reference and by amount due. The file is then read in chunks.
+Each chunk is matched in memory, checked for already posted transactions with
+one query, and posted with SalesService.record_payments in one transaction.
+Lines that can't be matched are reported as exceptions and never posted.
+
+Columns (case-insensitive, Indonesian names accepted): date, amount,
+reference, plus optional transaction_id and payment_method. `reference` may
+be free text; the first invoice reference (INV-00042) found in it is used.
+Lines without one are matched by amount and date when exactly one open
+invoice fits.
+"""
+import csv
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from .models import OPEN_INVOICE_STATES, PAYMENT_METHOD_CHOICES, InvoicePayment, SalesInvoice
+from .services import SalesService
+
+INVOICE_REFERENCE_RE = re.compile(r'INV-\d+', re.IGNORECASE)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M')
+PAYMENT_METHODS = {value for value, _ in PAYMENT_METHOD_CHOICES}
+
+COLUMN_ALIASES = {
+    'date': ('date', 'tanggal', 'settlement_date', 'transaction_date'),
+    'amount': ('amount', 'nominal', 'jumlah', 'net_amount'),
+    'reference': ('reference', 'ref', 'invoice', 'description', 'keterangan', 'remark'),
+    'transaction_id': ('transaction_id', 'trx_id', 'rrn', 'id'),
+    'payment_method': ('payment_method', 'method', 'channel'),
+}
+
+
+def parse_amount(value):
+    """Parse 150000, 150000.00, 150.000,00 or Rp 150,000"""
+    text = (value or '').replace('Rp', '').replace(' ', '').strip()
+    if ',' in text and '.' in text:
+        decimal_sep = ',' if text.rfind(',') > text.rfind('.') else '.'
+        text = text.replace('.' if decimal_sep == ',' else ',', '').replace(',', '.')
+    elif ',' in text:
+        text = text.replace(',', '.') if re.search(r',\d{1,2}$', text) else text.replace(',', '')
+    elif text.count('.') > 1 or re.search(r'\.\d{3}$', text):
+        text = text.replace('.', '')
+    try:
+        return Decimal(text).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'Invalid amount: {value!r}')
+
+
+def parse_date(value):
+    text = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Invalid date: {value!r}')
+
+
+class OpenInvoice:
+    __slots__ = ('pk', 'reference', 'date', 'due')
+
+    def __init__(self, pk, reference, date, due):
+        self.pk = pk
+        self.reference = reference
+        self.date = date
+        self.due = due
+
+
+class InvoiceIndex:
+    """Open invoices hashed by reference and by amount due"""
+
+    def __init__(self, invoices, date_tolerance=3):
+        self.date_tolerance = timedelta(days=date_tolerance)
+        self.by_reference = {}
+        self.by_amount = defaultdict(list)
+        for invoice in invoices:
+            self.by_reference[invoice.reference.upper()] = invoice
+            self.by_amount[invoice.due].append(invoice)
+
+    @classmethod
+    def load(cls, date_tolerance=3, chunk_size=5000):
+        rows = SalesInvoice.objects.filter(state__in=OPEN_INVOICE_STATES, amount_due__gt=0).values_list(
+            'pk', 'reference', 'date', 'amount_due'
+        ).iterator(chunk_size=chunk_size)
+        return cls((OpenInvoice(*row) for row in rows), date_tolerance)
+
+    def __len__(self):
+        return len(self.by_reference)
+
+    def match(self, date, amount, reference_text):
+        """Return the invoice a settlement line pays; raise ValueError otherwise"""
+        found = INVOICE_REFERENCE_RE.search(reference_text or '')
+        if found:
+            invoice = self.by_reference.get(found.group().upper())
+            if invoice is None:
+                raise ValueError(f'{found.group()} is not an open invoice')
+            if amount > invoice.due:
+                raise ValueError(f'Amount exceeds the {invoice.due} due on {invoice.reference}')
+            return invoice
+
+        candidates = [
+            invoice for invoice in self.by_amount.get(amount, ())
+            if invoice.due == amount and invoice.date <= date <= invoice.date + self.date_tolerance
+        ]
+        if not candidates:
+            raise ValueError('No open invoice with this reference or amount')
+        if len(candidates) > 1:
+            raise ValueError(f'Ambiguous: {len(candidates)} open invoices due {amount} around {date}')
+        return candidates[0]
+
+
+class ReconciliationResult:
+    def __init__(self):
+        self.lines = 0
+        self.matched = 0
+        self.amount = Decimal('0.00')
+        self.exceptions = []
+
+    def add_exception(self, row_number, row, reason):
+        self.exceptions.append((
+            row_number, row.get('transaction_id', ''), row.get('reference', ''),
+            row.get('amount', ''), row.get('date', ''), str(reason),
+        ))
+
+    def as_dict(self):
+        return {
+            'lines': self.lines,
+            'matched': self.matched,
+            'amount': str(self.amount),
+            'exceptions': len(self.exceptions),
+        }
+
+
+def normalized_rows(fileobj):
+    """Yield (row_number, row) with the columns renamed to their canonical names"""
+    reader = csv.DictReader(fileobj)
+    headers = {(name or '').strip().lower(): name for name in reader.fieldnames or []}
+    columns = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in headers:
+                columns[canonical] = headers[alias]
+                break
+    missing = {'date', 'amount', 'reference'} - set(columns)
+    if missing:
+        raise ValueError(f'Settlement file is missing columns: {", ".join(sorted(missing))}')
+
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, {canonical: (row.get(name) or '').strip() for canonical, name in columns.items()}
+
+
+def reconcile(fileobj, payment_method='qris', date_tolerance=3, chunk_size=2000, actor=None, dry_run=False):
+    """Match and post a settlement file; returns a ReconciliationResult"""
+    result = ReconciliationResult()
+    index = InvoiceIndex.load(date_tolerance)
+    seen = set()
+    rows = normalized_rows(fileobj)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        result.lines += len(chunk)
+
+        # Stored truncated to InvoicePayment.reference's 100 characters; compare the same way
+        transaction_ids = {row['transaction_id'][:100] for _, row in chunk if row.get('transaction_id')}
+        posted_before = set(InvoicePayment.objects.filter(
+            source='bank', reference__in=transaction_ids
+        ).values_list('reference', flat=True)) if transaction_ids else set()
+
+        payments = []
+        lines = {}
+        for row_number, row in chunk:
+            transaction_id = row.get('transaction_id', '')[:100]
+            try:
+                if transaction_id and (transaction_id in seen or transaction_id in posted_before):
+                    raise ValueError('Transaction already posted')
+                date = parse_date(row['date'])
+                amount = parse_amount(row['amount'])
+                if amount <= 0:
+                    raise ValueError('Amount must be positive')
+                invoice = index.match(date, amount, row['reference'])
+            except ValueError as e:
+                result.add_exception(row_number, row, e)
+                continue
+
+            if transaction_id:
+                seen.add(transaction_id)
+            # Reserve the amount for later lines of this chunk; given back below if the payment is rejected
+            invoice.due -= amount
+            method = row.get('payment_method', '').lower()
+            payment = InvoicePayment(
+                invoice_id=invoice.pk,
+                date=date,
+                amount=amount,
+                payment_method=method if method in PAYMENT_METHODS else payment_method,
+                reference=(transaction_id or row['reference'])[:100],
+                source='bank',
+                actor=actor,
+            )
+            payments.append(payment)
+            lines[id(payment)] = (row_number, row, invoice)
+
+        if dry_run:
+            posted, rejected = payments, []
+        else:
+            posted, rejected = SalesService.record_payments(payments)
+        for payment, reason in rejected:
+            row_number, row, invoice = lines[id(payment)]
+            invoice.due += payment.amount
+            seen.discard(row.get('transaction_id', '')[:100])
+            result.add_exception(row_number, row, reason)
+        result.matched += len(posted)
+        result.amount += sum((payment.amount for payment in posted), Decimal('0.00'))
+
+    result.exceptions.sort()
+    return result
+
+
+def write_exceptions(result, fileobj):
+    writer = csv.writer(fileobj)
+    writer.writerow(['row', 'transaction_id', 'reference', 'amount', 'date', 'reason'])
+    writer.writerows(result.exceptions)
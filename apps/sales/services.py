@@ -1,16 +1,22 @@
+from collections import defaultdict
 from decimal import Decimal
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Case, F, Value, When
 
 from .models import (
     SalesQuotation, SalesQuotationLine,
     SalesOrder, SalesOrderLine,
-    SalesInvoice, SalesInvoiceLine
+    SalesInvoice, SalesInvoiceLine, InvoicePayment
 )
 from apps.inventory.models import StockPicking, StockPickingLine, Location
 from apps.inventory.services import StockService
+from apps.manufacturing.services import KitService
+from core.metrics import instrument_service
+from core.utils import next_references
 
 
+@instrument_service
 class SalesService:
     """Service for handling sales operations"""
     
@@ -58,8 +64,23 @@ class SalesService:
         if not sales_order.source_location:
             raise ValueError("Sales order must have a source location for stock reservation")
 
+        # Kits reserve their components, all in one batch
+        kits = KitService.kit_components()
+        lines = list(sales_order.lines.select_related('product'))
+        kit_quantities = defaultdict(Decimal)
+        for line in lines:
+            if line.product_id in kits:
+                kit_quantities[line.product] += line.quantity
+        if kit_quantities:
+            StockService.reserve_stock_many(
+                sales_order.source_location,
+                KitService.explode(kit_quantities)
+            )
+
         # Reserve stock for each line
-        for line in sales_order.lines.all():
+        for line in lines:
+            if line.product_id in kits:
+                continue
             success = StockService.reserve_stock(
                 line.product,
                 sales_order.source_location,
@@ -69,19 +90,11 @@ class SalesService:
                 raise ValueError(f"Insufficient stock for {line.product.name}. Available: {StockService.get_stock_level(line.product, sales_order.source_location)['available']}")
 
         sales_order.state = 'confirmed'
-        sales_order.save()
+        sales_order.save_versioned()
     
     @staticmethod
-    @transaction.atomic
-    def mark_order_processing(sales_order: SalesOrder, user=None):
-        """Mark order as processing (being prepared) and create delivery picking"""
-        if sales_order.state != 'confirmed':
-            raise ValueError("Only confirmed orders can be marked as processing")
-
-        if sales_order.picking:
-            raise ValueError("Order already has a delivery picking")
-
-        # Get customer location (or create one)
+    def _customer_location(user=None):
+        """The location goods delivered to customers move to (created on first use)"""
         customer_location = Location.objects.filter(
             location_type='customer'
         ).first()
@@ -93,6 +106,19 @@ class SalesService:
                 location_type='customer',
                 actor=user
             )
+        return customer_location
+
+    @staticmethod
+    @transaction.atomic
+    def mark_order_processing(sales_order: SalesOrder, user=None):
+        """Mark order as processing (being prepared) and create delivery picking"""
+        if sales_order.state != 'confirmed':
+            raise ValueError("Only confirmed orders can be marked as processing")
+
+        if sales_order.picking:
+            raise ValueError("Order already has a delivery picking")
+
+        customer_location = SalesService._customer_location(user)
 
         # Create delivery picking
         picking = StockPicking.objects.create(
@@ -117,7 +143,7 @@ class SalesService:
 
         sales_order.picking = picking
         sales_order.state = 'processing'
-        sales_order.save()
+        sales_order.save_versioned()
 
         return picking
     
@@ -129,7 +155,7 @@ class SalesService:
             raise ValueError("Only processing orders can be marked as ready")
         
         sales_order.state = 'ready'
-        sales_order.save()
+        sales_order.save_versioned()
     
     @staticmethod
     @transaction.atomic
@@ -147,6 +173,10 @@ class SalesService:
         # Get customer location
         customer_location = sales_order.picking.location_dest
 
+        # Kit lines move their components, posted in one batch at the end
+        kits = KitService.kit_components()
+        kit_quantities = defaultdict(Decimal)
+
         # Process delivery - create stock moves for delivered quantities
         if delivered_quantities:
             for line_id, qty in delivered_quantities.items():
@@ -155,6 +185,12 @@ class SalesService:
                 if qty <= 0:
                     continue
 
+                if so_line.product_id in kits:
+                    kit_quantities[so_line.product] += qty
+                    so_line.quantity_delivered += qty
+                    so_line.save(update_fields=['quantity_delivered'])
+                    continue
+
                 # Create stock move for delivery
                 move = StockMove.objects.create(
                     product=so_line.product,
@@ -188,9 +224,13 @@ class SalesService:
                 )
         else:
             # Deliver all remaining quantities
-            for line in sales_order.lines.all():
+            for line in sales_order.lines.select_related('product'):
                 qty_to_deliver = line.quantity - line.quantity_delivered
-                if qty_to_deliver > 0:
+                if qty_to_deliver > 0 and line.product_id in kits:
+                    kit_quantities[line.product] += qty_to_deliver
+                    line.quantity_delivered = line.quantity
+                    line.save(update_fields=['quantity_delivered'])
+                elif qty_to_deliver > 0:
                     # Create stock move for delivery
                     move = StockMove.objects.create(
                         product=line.product,
@@ -223,6 +263,14 @@ class SalesService:
                         qty_to_deliver
                     )
 
+        if kit_quantities:
+            components = KitService.explode(kit_quantities)
+            StockService.deduct_stock(sales_order.source_location, components, reserved=True)
+            SalesService._create_delivery_moves(
+                components, sales_order.source_location, customer_location,
+                sales_order.reference, {}, user
+            )
+
         # Check if all lines are fully delivered
         fully_delivered = all(
             line.quantity_delivered >= line.quantity
@@ -234,10 +282,204 @@ class SalesService:
         else:
             sales_order.state = 'delivered'  # Still mark as delivered even if partial
 
-        sales_order.save()
+        sales_order.save_versioned()
 
         return sales_order
     
+    @staticmethod
+    def _create_delivery_moves(quantities, source_location, customer_location, origin, prices, user=None):
+        """Bulk create done outgoing moves for {Product: quantity}, priced from `prices` by product id or at cost"""
+        from apps.inventory.models import StockMove
+
+        now = timezone.now()
+        references = next_references(StockMove.objects, 'reference', 'SM-', 6, len(quantities))
+        return StockMove.objects.bulk_create([
+            StockMove(
+                reference=reference,
+                product=product,
+                location_src=source_location,
+                location_dest=customer_location,
+                quantity=quantity,
+                quantity_done=quantity,
+                unit_price=prices.get(product.pk, product.standard_price),
+                origin=origin,
+                state='done',
+                move_type='outgoing',
+                date_done=now,
+                actor=user
+            )
+            for reference, (product, quantity) in zip(references, quantities.items())
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def quick_checkout(cart, payment, customer, location, user=None) -> SalesInvoice:
+        """
+        Sell a cart over the counter in one transaction
+        
+        Creates a done SalesOrder and a paid SalesInvoice with their lines,
+        the InvoicePayment and the delivery StockMoves, and takes stockable
+        products (for kits, their components) out of `location`, without the
+        confirm/picking/deliver steps. Lines and moves are bulk inserted and
+        stock is deducted with StockService.deduct_stock, so the query count
+        doesn't grow with the cart.
+        
+        Args:
+            cart: list of dicts with either 'product' (id) or 'barcode',
+                a Decimal 'quantity', and optional 'unit_price' and
+                'discount_percent' (list price, no discount by default).
+                The overrides only apply for a user with the
+                sales.override_price permission. A packaging barcode
+                multiplies the quantity.
+            payment: dict with 'method' (PAYMENT_METHOD_CHOICES), optional
+                'reference' and optional 'tendered' amount.
+        
+        Returns:
+            The paid invoice; `invoice.change` is tendered minus total.
+        """
+        from apps.products.models import Product
+        from apps.products.services import BarcodeService
+
+        if not cart:
+            raise ValueError("Cart is empty")
+        if location is None:
+            raise ValueError("A stock location is required for checkout")
+
+        # Barcodes resolve from cache; every product is then loaded in one query
+        scanned = BarcodeService.resolve_many(
+            [item['barcode'] for item in cart if item.get('barcode')]
+        )
+        items = []
+        for item in cart:
+            quantity = item.get('quantity', Decimal('1'))
+            if quantity <= 0:
+                raise ValueError("Quantities must be positive")
+            product_id = item.get('product')
+            if item.get('barcode'):
+                entry = scanned.get(item['barcode'].strip())
+                if entry is None:
+                    raise ValueError(f"Unknown barcode {item['barcode']}")
+                product_id = entry['product_id']
+                quantity *= Decimal(str(entry['quantity']))
+            if not product_id:
+                raise ValueError("Each cart item needs a product or a barcode")
+            items.append((product_id, quantity, item))
+
+        products = Product.objects.filter(
+            pk__in={product_id for product_id, _, _ in items},
+            is_active=True,
+            can_be_sold=True
+        ).in_bulk()
+
+        overrides = any(item.get('unit_price') is not None or item.get('discount_percent') for item in cart)
+        can_override = overrides and user is not None and user.has_perm('sales.override_price')
+        today = timezone.localdate()
+        cent = Decimal('0.01')
+        lines = []
+        sold = defaultdict(Decimal)
+        for product_id, quantity, item in items:
+            product = products.get(product_id)
+            if product is None:
+                raise ValueError(f"Product {product_id} is not available for sale")
+            unit_price = item.get('unit_price') if can_override else None
+            if unit_price is None:
+                unit_price = product.list_price
+            if unit_price < 0:
+                raise ValueError("Unit prices cannot be negative")
+            discount_percent = (item.get('discount_percent') if can_override else None) or Decimal('0.00')
+            if not 0 <= discount_percent <= 100:
+                raise ValueError("Discounts must be between 0 and 100 percent")
+            base_amount = quantity * unit_price
+            subtotal = (base_amount - base_amount * (discount_percent / 100)).quantize(cent)
+            lines.append((product, quantity, unit_price, discount_percent, subtotal))
+            sold[product] += quantity
+
+        untaxed_amount = sum(line[4] for line in lines)
+        tax_amount = (untaxed_amount * Decimal('0.11')).quantize(cent)  # PPN 11%
+        total_amount = untaxed_amount + tax_amount
+
+        tendered = payment.get('tendered')
+        if tendered is None:
+            tendered = total_amount
+        if tendered < total_amount:
+            raise ValueError(f"Tendered amount is less than the total of {total_amount}")
+
+        # Kits are replaced by their components
+        deductions = KitService.explode(sold)
+        if deductions:
+            StockService.deduct_stock(location, deductions)
+
+        totals = dict(untaxed_amount=untaxed_amount, tax_amount=tax_amount, total_amount=total_amount)
+        sales_order = SalesOrder.objects.create(
+            customer=customer,
+            source_location=location,
+            state='done',
+            actor=user,
+            **totals
+        )
+        SalesOrderLine.objects.bulk_create([
+            SalesOrderLine(
+                sales_order=sales_order,
+                product=product,
+                description=product.name,
+                quantity=quantity,
+                quantity_delivered=quantity,
+                quantity_invoiced=quantity,
+                unit_price=unit_price,
+                discount_percent=discount_percent,
+                subtotal=subtotal,
+                actor=user
+            )
+            for product, quantity, unit_price, discount_percent, subtotal in lines
+        ])
+
+        invoice = SalesInvoice.objects.create(
+            customer=customer,
+            sales_order=sales_order,
+            due_date=today,
+            payment_date=today,
+            state='paid',
+            amount_paid=total_amount,
+            payment_method=payment['method'],
+            payment_reference=payment.get('reference', ''),
+            actor=user,
+            **totals
+        )
+        SalesInvoiceLine.objects.bulk_create([
+            SalesInvoiceLine(
+                invoice=invoice,
+                product=product,
+                description=product.name,
+                quantity=quantity,
+                unit_price=unit_price,
+                discount_percent=discount_percent,
+                subtotal=subtotal,
+                actor=user
+            )
+            for product, quantity, unit_price, discount_percent, subtotal in lines
+        ])
+        InvoicePayment.objects.create(
+            invoice=invoice,
+            date=today,
+            amount=total_amount,
+            payment_method=payment['method'],
+            reference=payment.get('reference', ''),
+            source='pos',
+            actor=user
+        )
+
+        if deductions:
+            prices = {}
+            for product, _, unit_price, _, _ in lines:
+                prices.setdefault(product.pk, unit_price)
+            SalesService._create_delivery_moves(
+                deductions, location, SalesService._customer_location(user),
+                sales_order.reference, prices, user
+            )
+
+        invoice.change = tendered - total_amount
+        return invoice
+    
     @staticmethod
     @transaction.atomic
     def complete_order(sales_order: SalesOrder):
@@ -246,7 +488,7 @@ class SalesService:
             raise ValueError("Only delivered orders can be marked as done")
         
         sales_order.state = 'done'
-        sales_order.save()
+        sales_order.save_versioned()
     
     @staticmethod
     @transaction.atomic
@@ -256,7 +498,7 @@ class SalesService:
             raise ValueError("Order cannot be cancelled in current state")
         
         sales_order.state = 'cancelled'
-        sales_order.save()
+        sales_order.save_versioned()
     
     @staticmethod
     @transaction.atomic
@@ -295,34 +537,125 @@ class SalesService:
                 so_line.quantity_invoiced = so_line.quantity
                 so_line.save(update_fields=['quantity_invoiced'])
         
+        # Claim the order so a concurrent request can't invoice it twice
+        sales_order.save_versioned(update_fields=['updated_at'])
+        
         return invoice
     
+    @staticmethod
+    def _apply_payment(invoice_id, amount, payment_method, payment_reference, payment_date):
+        """
+        Add `amount` to an open invoice in a single conditional UPDATE
+
+        amount_paid, amount_due and state are computed by the database from
+        the row's current values, so concurrent payments can't overwrite each
+        other. Returns False when the invoice is paid or cancelled.
+        """
+        paid = F('amount_paid') + amount
+        return SalesInvoice.objects.filter(pk=invoice_id).exclude(
+            state__in=['paid', 'cancelled']
+        ).update(
+            amount_paid=paid,
+            amount_due=Case(When(total_amount__lte=paid, then=Value(Decimal('0.00'))), default=F('total_amount') - paid),
+            state=Case(
+                When(total_amount__lte=paid, then=Value('paid')),
+                When(state='overdue', then=Value('overdue')),
+                default=Value('partial')
+            ),
+            payment_method=payment_method,
+            payment_reference=payment_reference,
+            payment_date=payment_date,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        ) == 1
+
     @staticmethod
     @transaction.atomic
     def record_payment(
         invoice: SalesInvoice, 
         amount: Decimal,
         payment_method: str,
-        payment_reference: str = ''
-    ):
+        payment_reference: str = '',
+        payment_date=None,
+        source: str = 'manual',
+        user=None
+    ) -> InvoicePayment:
         """Record a payment on an invoice"""
-        if invoice.state in ['paid', 'cancelled']:
+        if amount <= 0:
+            raise ValueError("Payment amount must be positive")
+        
+        payment_date = payment_date or timezone.localdate()
+        if not SalesService._apply_payment(invoice.pk, amount, payment_method, payment_reference, payment_date):
             raise ValueError("Invoice cannot accept payments in current state")
         
-        invoice.amount_paid += amount
-        invoice.payment_method = payment_method
-        invoice.payment_reference = payment_reference
-        invoice.payment_date = timezone.now().date()
+        payment = InvoicePayment.objects.create(
+            invoice=invoice,
+            date=payment_date,
+            amount=amount,
+            payment_method=payment_method,
+            reference=payment_reference,
+            source=source,
+            actor=user,
+        )
+        invoice.refresh_from_db(fields=[
+            'amount_paid', 'amount_due', 'state', 'payment_method',
+            'payment_reference', 'payment_date', 'version', 'updated_at',
+        ])
+        return payment
+    
+    @staticmethod
+    def mark_overdue_invoices(today=None) -> int:
+        """
+        Move unpaid sent/partial invoices past their due date to overdue
+
+        One UPDATE over the open-invoice due date index; returns the number of
+        invoices moved. Paying an overdue invoice in part keeps it overdue.
+        """
+        return SalesInvoice.objects.filter(
+            state__in=['sent', 'partial'],
+            due_date__lt=today or timezone.localdate(),
+            amount_due__gt=0
+        ).update(
+            state='overdue',
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def record_payments(payments, batch_size=1000):
+        """
+        Post many payments in one transaction, e.g. from a bank statement
         
-        # Update state based on payment
-        if invoice.amount_paid >= invoice.total_amount:
-            invoice.state = 'paid'
-            invoice.amount_due = Decimal('0.00')
-        else:
-            invoice.state = 'partial'
-            invoice.amount_due = invoice.total_amount - invoice.amount_paid
+        Args:
+            payments: unsaved InvoicePayment instances (invoice_id, amount, ...)
+            
+        Returns:
+            (posted, rejected): the posted payments, and (payment, reason)
+            pairs for those that could not be applied
+        """
+        by_invoice = defaultdict(list)
+        rejected = []
+        for payment in payments:
+            if payment.amount is None or payment.amount <= 0:
+                rejected.append((payment, "Payment amount must be positive"))
+            else:
+                by_invoice[payment.invoice_id].append(payment)
+        
+        # One UPDATE per invoice, in a fixed order so concurrent batches
+        # lock rows in the same sequence
+        posted = []
+        for invoice_id in sorted(by_invoice):
+            group = by_invoice[invoice_id]
+            last = max(reversed(group), key=lambda payment: payment.date)
+            total = sum((payment.amount for payment in group), Decimal('0.00'))
+            if SalesService._apply_payment(invoice_id, total, last.payment_method, last.reference, last.date):
+                posted.extend(group)
+            else:
+                rejected.extend((payment, "Invoice cannot accept payments in current state") for payment in group)
         
-        invoice.save()
+        InvoicePayment.objects.bulk_create(posted, batch_size=batch_size)
+        return posted, rejected
     
     @staticmethod
     @transaction.atomic
@@ -332,5 +665,5 @@ class SalesService:
             raise ValueError("Paid invoices cannot be cancelled")
         
         invoice.state = 'cancelled'
-        invoice.save()
+        invoice.save_versioned()
 
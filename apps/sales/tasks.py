@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, task
+
+from .reconciliation import reconcile, write_exceptions
+from .services import SalesService
+
+
+@task()
+def reconcile_settlement_task(path, payment_method='qris', date_tolerance=3, actor_id=None, exceptions_path=None):
+    actor = User.objects.filter(pk=actor_id).first() if actor_id else None
+    with open(path, newline='', encoding='utf-8-sig') as fileobj:
+        result = reconcile(fileobj, payment_method=payment_method, date_tolerance=date_tolerance, actor=actor)
+    if exceptions_path and result.exceptions:
+        with open(exceptions_path, 'w', newline='') as fileobj:
+            write_exceptions(result, fileobj)
+    return result.as_dict()
+
+
+@db_periodic_task(crontab(minute='5'))
+def mark_overdue_invoices_task():
+    return SalesService.mark_overdue_invoices()
@@ -22,6 +22,8 @@ urlpatterns = [
     
     # Sales Order URLs
     path('sales-orders/', views.SOListView.as_view(), name='so-list'),
+    path('sales-orders/export/', views.SOExportView.as_view(), name='so-export'),
+    path('sales-orders/export/lines/', views.SOLineExportView.as_view(), name='so-line-export'),
     path('sales-orders/<str:pk>/', views.SODetailView.as_view(), name='so-detail'),
     path('sales-orders/<str:pk>/edit/', views.SOUpdateView.as_view(), name='so-update'),
     path('sales-orders/<str:so_pk>/lines/new/', views.SOLineCreateView.as_view(), name='so-line-create'),
@@ -36,6 +38,7 @@ urlpatterns = [
     
     # Sales Invoice URLs
     path('invoices/', views.InvoiceListView.as_view(), name='invoice-list'),
+    path('invoices/export/', views.InvoiceExportView.as_view(), name='invoice-export'),
     path('invoices/new/', views.InvoiceCreateView.as_view(), name='invoice-create'),
     path('invoices/<str:pk>/', views.InvoiceDetailView.as_view(), name='invoice-detail'),
     path('invoices/<str:pk>/edit/', views.InvoiceUpdateView.as_view(), name='invoice-update'),
@@ -44,5 +47,8 @@ urlpatterns = [
     path('invoices/<str:pk>/send/', views.InvoiceSendView.as_view(), name='invoice-send'),
     path('invoices/<str:pk>/payment/', views.InvoicePaymentView.as_view(), name='invoice-payment'),
     path('invoices/<str:pk>/cancel/', views.InvoiceCancelView.as_view(), name='invoice-cancel'),
+
+    # POS
+    path('api/checkout/', views.quick_checkout, name='pos-checkout-api'),
 ]
 
@@ -1,14 +1,22 @@
-from decimal import Decimal
+import json
+from decimal import Decimal, InvalidOperation
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
 from django.views.generic import ListView, CreateView, UpdateView, DetailView, View
 from django.urls import reverse
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
 
-from core.views import LoginRequiredMixinView
+from core.exports import ExportMixin
+from core.instrumentation import query_budget
+from core.views import LoginRequiredMixinView, ReplicaReadMixin, VersionedUpdateMixin
 from apps.employees.models import EmployeeSetting
+from apps.inventory.models import Location
 from .models import (
     Customer, SalesQuotation, SalesQuotationLine,
-    SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine
+    SalesOrder, SalesOrderLine, SalesInvoice, SalesInvoiceLine,
+    PAYMENT_METHOD_CHOICES
 )
 from .forms import (
     CustomerForm, SalesQuotationForm, SalesQuotationLineForm,
@@ -28,7 +36,7 @@ class BaseContextMixin:
 
 
 # Customer Views
-class CustomerListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class CustomerListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Customer
     template_name = "sales/customer_list.html"
     context_object_name = "customers"
@@ -47,7 +55,7 @@ class CustomerListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class CustomerDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class CustomerDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = Customer
     template_name = "sales/customer_detail.html"
     context_object_name = "customer"
@@ -83,7 +91,7 @@ class CustomerUpdateView(LoginRequiredMixinView, BaseContextMixin, UpdateView):
 
 
 # Sales Quotation Views
-class QuotationListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class QuotationListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = SalesQuotation
     template_name = "sales/quotation_list.html"
     context_object_name = "quotations"
@@ -98,7 +106,7 @@ class QuotationListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class QuotationDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class QuotationDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = SalesQuotation
     template_name = "sales/quotation_detail.html"
     context_object_name = "quotation"
@@ -234,13 +242,14 @@ class QuotationCancelView(LoginRequiredMixinView, View):
 
 
 # Sales Order Views
-class SOListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class SOListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = SalesOrder
     template_name = "sales/so_list.html"
     context_object_name = "orders"
+    query_budget = 10
     
     def get_queryset(self):
-        queryset = SalesOrder.objects.select_related('customer').order_by('-created_at')
+        queryset = SalesOrder.objects.select_related('customer').prefetch_related('lines').order_by('-created_at')
         
         state = self.request.GET.get('state')
         if state:
@@ -249,7 +258,47 @@ class SOListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class SODetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class SOExportView(ExportMixin, SOListView):
+    export_filename = 'sales-orders'
+    export_fields = [
+        ('Reference', 'reference'),
+        ('Date', 'date'),
+        ('Customer', 'customer__name'),
+        ('State', 'state'),
+        ('Expected Date', 'expected_date'),
+        ('Untaxed Amount', 'untaxed_amount'),
+        ('Tax', 'tax_amount'),
+        ('Discount', 'discount_amount'),
+        ('Total', 'total_amount'),
+    ]
+
+
+class SOLineExportView(ExportMixin, SOListView):
+    """Order lines of the sales orders matching the SO list filters"""
+    export_filename = 'sales-order-lines'
+    export_fields = [
+        ('Order', 'sales_order__reference'),
+        ('Order Date', 'sales_order__date'),
+        ('Customer', 'sales_order__customer__name'),
+        ('Product Code', 'product__internal_reference'),
+        ('Product', 'product__name'),
+        ('Description', 'description'),
+        ('Quantity', 'quantity'),
+        ('Delivered', 'quantity_delivered'),
+        ('Invoiced', 'quantity_invoiced'),
+        ('Unit Price', 'unit_price'),
+        ('Discount %', 'discount_percent'),
+        ('Subtotal', 'subtotal'),
+    ]
+
+    def get_export_queryset(self):
+        orders = super().get_export_queryset()
+        return SalesOrderLine.objects.filter(
+            sales_order__in=orders.values('pk')
+        ).order_by('-sales_order__created_at', 'created_at')
+
+
+class SODetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = SalesOrder
     template_name = "sales/so_detail.html"
     context_object_name = "order"
@@ -263,7 +312,7 @@ class SODetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
 # SOCreateView removed - Sales Orders are only created from Quotations
 
 
-class SOUpdateView(LoginRequiredMixinView, BaseContextMixin, UpdateView):
+class SOUpdateView(LoginRequiredMixinView, VersionedUpdateMixin, BaseContextMixin, UpdateView):
     model = SalesOrder
     form_class = SalesOrderForm
     template_name = "sales/so_form.html"
@@ -380,22 +429,47 @@ class SOCreateInvoiceView(LoginRequiredMixinView, View):
 
 
 # Sales Invoice Views
-class InvoiceListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class InvoiceListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = SalesInvoice
     template_name = "sales/invoice_list.html"
     context_object_name = "invoices"
+    query_budget = 10
     
     def get_queryset(self):
-        queryset = SalesInvoice.objects.select_related('customer', 'sales_order').order_by('-created_at')
+        queryset = SalesInvoice.objects.select_related('customer', 'sales_order').with_past_due().order_by('-created_at')
         
         state = self.request.GET.get('state')
-        if state:
+        if state == 'overdue':
+            # Includes invoices the hourly sweep hasn't reached yet
+            queryset = queryset.past_due()
+        elif state:
             queryset = queryset.filter(state=state)
         
         return queryset
 
 
-class InvoiceDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class InvoiceExportView(ExportMixin, InvoiceListView):
+    export_filename = 'invoices'
+    export_fields = [
+        ('Reference', 'reference'),
+        ('Date', 'date'),
+        ('Due Date', 'due_date'),
+        ('Customer', 'customer__name'),
+        ('Sales Order', 'sales_order__reference'),
+        ('State', 'state'),
+        ('Untaxed Amount', 'untaxed_amount'),
+        ('Tax', 'tax_amount'),
+        ('Discount', 'discount_amount'),
+        ('Total', 'total_amount'),
+        ('Paid', 'amount_paid'),
+        ('Due', 'amount_due'),
+        ('Payment Date', 'payment_date'),
+        ('Payment Method', 'payment_method'),
+        ('Payment Reference', 'payment_reference'),
+    ]
+
+
+class InvoiceDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = SalesInvoice
     template_name = "sales/invoice_detail.html"
     context_object_name = "invoice"
@@ -403,6 +477,7 @@ class InvoiceDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['lines'] = self.object.lines.select_related('product', 'product__uom')
+        context['payments'] = self.object.payments.select_related('actor')
         context['payment_form'] = PaymentForm(initial={'amount': self.object.amount_due})
         return context
 
@@ -421,7 +496,7 @@ class InvoiceCreateView(LoginRequiredMixinView, BaseContextMixin, CreateView):
         return reverse('invoice-detail', kwargs={'pk': self.object.pk})
 
 
-class InvoiceUpdateView(LoginRequiredMixinView, BaseContextMixin, UpdateView):
+class InvoiceUpdateView(LoginRequiredMixinView, VersionedUpdateMixin, BaseContextMixin, UpdateView):
     model = SalesInvoice
     form_class = SalesInvoiceForm
     template_name = "sales/invoice_form.html"
@@ -482,7 +557,8 @@ class InvoicePaymentView(LoginRequiredMixinView, View):
                     invoice,
                     amount=form.cleaned_data['amount'],
                     payment_method=form.cleaned_data['payment_method'],
-                    payment_reference=form.cleaned_data.get('payment_reference', '')
+                    payment_reference=form.cleaned_data.get('payment_reference', ''),
+                    user=request.user
                 )
                 messages.success(request, 'Payment recorded.')
             except ValueError as e:
@@ -502,3 +578,80 @@ class InvoiceCancelView(LoginRequiredMixinView, View):
         except ValueError as e:
             messages.error(request, str(e))
         return redirect('invoice-detail', pk=pk)
+
+
+# API Views
+def _decimal(value, name):
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+    if not number.is_finite():
+        raise ValueError(f"Invalid {name}: {value}")
+    return number
+
+
+@query_budget(24)
+@require_http_methods(["POST"])
+@login_required(login_url='/login/')
+def quick_checkout(request):
+    """
+    POS checkout: order, invoice, payment and stock deduction in one call
+
+    JSON body:
+        {"customer": id, "location": id,
+         "items": [{"product": id | "barcode": code, "quantity": 2,
+                    "unit_price": 18000, "discount_percent": 0}, ...],
+         "payment": {"method": "cash", "reference": "", "tendered": 50000}}
+    """
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        items = data.get('items') or []
+        if not isinstance(items, list):
+            raise ValueError("items must be a list")
+        cart = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("Each item must be a JSON object")
+            for field in ('product', 'barcode'):
+                if item.get(field) is not None and not isinstance(item[field], str):
+                    raise ValueError(f"Invalid {field}: {item[field]}")
+            line = {
+                'product': item.get('product'),
+                'barcode': item.get('barcode'),
+                'quantity': _decimal(item.get('quantity', 1), 'quantity'),
+            }
+            for field in ('unit_price', 'discount_percent'):
+                if item.get(field) is not None:
+                    line[field] = _decimal(item[field], field)
+            cart.append(line)
+        payment = data.get('payment') or {}
+        if not isinstance(payment, dict):
+            raise ValueError("payment must be a JSON object")
+        if payment.get('method') not in dict(PAYMENT_METHOD_CHOICES):
+            raise ValueError("Invalid payment method")
+        if payment.get('tendered') is not None:
+            payment['tendered'] = _decimal(payment['tendered'], 'tendered amount')
+        customer = Customer.objects.filter(pk=data.get('customer'), is_active=True).first()
+        if customer is None:
+            raise ValueError("Customer not found")
+        location = Location.objects.filter(
+            pk=data.get('location'), location_type='internal', is_active=True
+        ).first()
+        if location is None:
+            raise ValueError("Location not found")
+
+        invoice = SalesService.quick_checkout(cart, payment, customer, location, user=request.user)
+    except (ValueError, ArithmeticError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'invoice_id': invoice.pk,
+        'invoice': invoice.reference,
+        'order_id': invoice.sales_order_id,
+        'total': float(invoice.total_amount),
+        'change': float(invoice.change),
+    }, status=201)
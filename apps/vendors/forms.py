@@ -1,4 +1,5 @@
 from django import forms
+from core.widgets import RemoteSelect
 from .models import Vendor, VendorContact, VendorProduct
 
 
@@ -131,7 +132,7 @@ class VendorProductForm(forms.ModelForm):
             'is_preferred', 'is_active'
         ]
         widgets = {
-            'product': forms.Select(attrs={
+            'product': RemoteSelect('product-autocomplete-api', params={'purchasable': '1'}, attrs={
                 'class': 'w-full px-4 py-2 border border-neutral-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500'
             }),
             'vendor_product_code': forms.TextInput(attrs={
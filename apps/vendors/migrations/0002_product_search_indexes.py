@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-19 05:54
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from core.migration_operations import AddPostgresIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        # pg_trgm is created there
+        ('products', '0002_product_search_indexes'),
+        ('vendors', '0001_initial'),
+    ]
+
+    operations = [
+        AddPostgresIndex(
+            model_name='vendorproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vendor_product_code'], name='vendorproduct_code_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
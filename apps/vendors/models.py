@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from decimal import Decimal
 
@@ -196,6 +197,10 @@ class VendorProduct(BaseModel):
     class Meta:
         unique_together = ['vendor', 'product']
         ordering = ['vendor', 'product']
+        indexes = [
+            # Product search matches vendor codes too
+            GinIndex(fields=['vendor_product_code'], opclasses=['gin_trgm_ops'], name='vendorproduct_code_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vendor.name} - {self.product.name}"
@@ -4,7 +4,7 @@ from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect
 
-from core.views import LoginRequiredMixinView
+from core.views import LoginRequiredMixinView, ReplicaReadMixin
 from apps.employees.models import EmployeeSetting
 from .models import Vendor, VendorContact, VendorProduct
 from .forms import VendorForm, VendorContactForm, VendorProductForm
@@ -20,7 +20,7 @@ class BaseContextMixin:
 
 
 # Vendor Views
-class VendorListView(LoginRequiredMixinView, BaseContextMixin, ListView):
+class VendorListView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, ListView):
     model = Vendor
     template_name = "vendors/vendor_list.html"
     context_object_name = "vendors"
@@ -45,7 +45,7 @@ class VendorListView(LoginRequiredMixinView, BaseContextMixin, ListView):
         return queryset
 
 
-class VendorDetailView(LoginRequiredMixinView, BaseContextMixin, DetailView):
+class VendorDetailView(LoginRequiredMixinView, ReplicaReadMixin, BaseContextMixin, DetailView):
     model = Vendor
     template_name = "vendors/vendor_detail.html"
     context_object_name = "vendor"
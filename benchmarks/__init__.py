@@ -0,0 +1,14 @@
+"""
+Benchmark scripts
+
+Run from the project root, e.g. `python -m benchmarks.compact_ids`.
+"""
+import os
+
+
+def setup_django():
+    """Configure Django for standalone benchmark scripts"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    django.setup()
@@ -0,0 +1,128 @@
+"""
+Compare index size and join speed of ObjectId varchar keys vs compact bigint keys
+
+Builds two scratch parent/child table pairs on PostgreSQL (one keyed by
+24-char ObjectId-like strings, one by compact bigint ids), then reports
+index sizes and the timing of a parent/child join on each.
+
+Usage:
+    python -m benchmarks.compact_ids --parents 200000 --children 1000000
+"""
+import argparse
+import time
+
+from . import setup_django
+
+SCHEMES = {
+    'objectid': {
+        'type': 'varchar',
+        # 4-byte timestamp prefix + random-looking tail, like bson.ObjectId
+        'expr': "lpad(to_hex(1735689600 + {i} / 1000), 8, '0') || substr(md5({i}::text), 1, 16)",
+    },
+    'compact': {
+        'type': 'bigint',
+        'expr': "(({i}::bigint) << 22)",
+    },
+}
+
+
+def build_tables(cursor, scheme, parents, children):
+    spec = SCHEMES[scheme]
+    parent, child = f'bench_{scheme}_parent', f'bench_{scheme}_child'
+    cursor.execute(f'DROP TABLE IF EXISTS {child}, {parent}')
+    cursor.execute(f'CREATE TABLE {parent} (id {spec["type"]} PRIMARY KEY, name varchar(50))')
+    cursor.execute(
+        f'CREATE TABLE {child} (id {spec["type"]} PRIMARY KEY, '
+        f'parent_id {spec["type"]} NOT NULL REFERENCES {parent} (id), qty numeric(12, 2))'
+    )
+    cursor.execute(
+        f"INSERT INTO {parent} SELECT {spec['expr'].format(i='g')}, 'P' || g "
+        f'FROM generate_series(1, %s) g',
+        [parents],
+    )
+    cursor.execute(
+        f"INSERT INTO {child} SELECT {spec['expr'].format(i='(g + %(parents)s)')}, "
+        f"{spec['expr'].format(i='(1 + g %% %(parents)s)')}, 1 FROM generate_series(1, %(children)s) g",
+        {'parents': parents, 'children': children},
+    )
+    cursor.execute(f'CREATE INDEX {child}_parent_idx ON {child} (parent_id)')
+    cursor.execute(f'ANALYZE {parent}')
+    cursor.execute(f'ANALYZE {child}')
+    return parent, child
+
+
+def measure(cursor, parent, child, repeat):
+    cursor.execute(
+        'SELECT pg_indexes_size(%s), pg_indexes_size(%s), pg_relation_size(%s), pg_relation_size(%s)',
+        [parent, child, parent, child],
+    )
+    parent_idx, child_idx, parent_rel, child_rel = cursor.fetchone()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(
+            f'SELECT p.name, sum(c.qty) FROM {child} c JOIN {parent} p ON p.id = c.parent_id '
+            f'GROUP BY p.name ORDER BY 2 DESC LIMIT 10'
+        )
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'index_bytes': parent_idx + child_idx,
+        'table_bytes': parent_rel + child_rel,
+        'join_best_ms': min(timings) * 1000,
+    }
+
+
+def current_index_sizes(cursor):
+    """Index sizes of the application's own tables, largest first"""
+    cursor.execute(
+        "SELECT relname, pg_indexes_size(relid) FROM pg_stat_user_tables "
+        "WHERE relname NOT LIKE 'bench_%%' ORDER BY 2 DESC LIMIT 15"
+    )
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parents', type=int, default=100000)
+    parser.add_argument('--children', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='Keep scratch tables')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        raise SystemExit('This benchmark needs PostgreSQL (pg_indexes_size)')
+
+    with connection.cursor() as cursor:
+        print('Current application tables (index bytes):')
+        for name, size in current_index_sizes(cursor):
+            print(f'  {name:40} {size:>14,}')
+
+        results = {}
+        for scheme in SCHEMES:
+            parent, child = build_tables(cursor, scheme, args.parents, args.children)
+            results[scheme] = measure(cursor, parent, child, args.repeat)
+            if not args.keep:
+                cursor.execute(f'DROP TABLE {child}, {parent}')
+
+    print(f'\n{args.parents:,} parents / {args.children:,} children')
+    print(f'{"scheme":10} {"index bytes":>14} {"table bytes":>14} {"join ms":>10}')
+    for scheme, result in results.items():
+        print(
+            f'{scheme:10} {result["index_bytes"]:>14,} {result["table_bytes"]:>14,} '
+            f'{result["join_best_ms"]:>10.1f}'
+        )
+    base, compact = results['objectid'], results['compact']
+    print(
+        f'\ncompact ids: {compact["index_bytes"] / base["index_bytes"]:.0%} of index size, '
+        f'{compact["join_best_ms"] / base["join_best_ms"]:.0%} of join time'
+    )
+
+
+if __name__ == '__main__':
+    main()
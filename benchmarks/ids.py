@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of primary key generation
+
+Compares the in-house generators in core.ids with the previous
+str(bson.ObjectId()) path (skipped when bson is not installed), including
+the cost of importing each module in a fresh interpreter.
+
+Usage:
+    python -m benchmarks.ids --number 200000
+"""
+import argparse
+import subprocess
+import sys
+import timeit
+
+
+def import_cost_ms(module, repeat=5):
+    """Best wall time of `import module` in a fresh interpreter, minus startup"""
+    def run(code):
+        best = None
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, '-c', f'import time; s = time.perf_counter(); {code}; '
+                                       'print(time.perf_counter() - s)'],
+                capture_output=True, text=True, check=True,
+            )
+            value = float(out.stdout)
+            best = value if best is None else min(best, value)
+        return best
+
+    return (run(f'import {module}') - run('pass')) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--number', type=int, default=200000, help='Ids per run')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from core.ids import generate_compact_id, generate_object_id, generate_object_ids
+
+    cases = {
+        'core.ids.generate_object_id': lambda: generate_object_id(),
+        'core.ids.generate_compact_id': lambda: generate_compact_id(),
+    }
+    try:
+        import bson
+    except ImportError:
+        bson = None
+    else:
+        cases['str(bson.ObjectId())'] = lambda: str(bson.ObjectId())
+
+    print(f'{"generator":36} {"ns/id":>10}')
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f'{name:36} {best / args.number * 1e9:>10.0f}')
+
+    batch = 1000
+    best = min(timeit.repeat(
+        lambda: generate_object_ids(batch),
+        number=args.number // batch,
+        repeat=args.repeat,
+    ))
+    print(f'{"core.ids.generate_object_ids(1000)":36} {best / args.number * 1e9:>10.0f}')
+
+    print(f'\n{"import":36} {"ms":>10}')
+    modules = ['core.ids'] + (['bson'] if bson else [])
+    for module in modules:
+        print(f'{module:36} {import_cost_ms(module):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
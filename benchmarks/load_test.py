@@ -0,0 +1,121 @@
+"""
+Request latency load test
+
+Two modes:
+
+    http     Fire concurrent GET requests at a running server and report
+             latency percentiles. Run it once per settings profile, e.g.
+             against `runserver` with core.settings and against gunicorn
+             with core.settings_production, and compare.
+
+             python -m benchmarks.load_test http http://localhost:8000/stock/ \\
+                 --requests 2000 --concurrency 16 --cookie sessionid=...
+
+    connect  In-process comparison of a fresh database connection per
+             "request" (CONN_MAX_AGE=0) with a reused, health-checked one.
+
+             python -m benchmarks.load_test connect --requests 500
+"""
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from . import setup_django
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, timings, elapsed=None):
+    ms = [t * 1000 for t in timings]
+    line = (
+        f'{label:24} n={len(ms):<6} mean={statistics.mean(ms):7.2f}ms '
+        f'p50={percentile(ms, 50):7.2f}ms p95={percentile(ms, 95):7.2f}ms '
+        f'p99={percentile(ms, 99):7.2f}ms'
+    )
+    if elapsed:
+        line += f' rps={len(ms) / elapsed:8.1f}'
+    print(line)
+
+
+def run_http(args):
+    headers = {'Cookie': args.cookie} if args.cookie else {}
+    errors = []
+
+    def fetch(_):
+        request = urllib.request.Request(args.url, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except Exception as e:
+            errors.append(e)
+        return time.perf_counter() - start
+
+    # Warm up workers and connections before measuring
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(fetch, range(args.concurrency)))
+
+    errors.clear()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        timings = list(pool.map(fetch, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    report(args.url, timings, elapsed)
+    if errors:
+        print(f'{len(errors)} failed requests, first: {errors[0]!r}')
+
+
+def run_connect(args):
+    setup_django()
+    from django.db import connection
+
+    def simulated_request(close_after):
+        start = time.perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        if close_after:
+            connection.close()
+        return time.perf_counter() - start
+
+    connection.close()
+    report('new connection', [simulated_request(True) for _ in range(args.requests)])
+
+    # Reconnect so close_at is computed from the new age (CONN_MAX_AGE=0 closes every time)
+    connection.settings_dict['CONN_MAX_AGE'] = None
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+    connection.close()
+    report('persistent connection', [simulated_request(False) for _ in range(args.requests)])
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    http = sub.add_parser('http')
+    http.add_argument('url')
+    http.add_argument('--requests', type=int, default=1000)
+    http.add_argument('--concurrency', type=int, default=8)
+    http.add_argument('--cookie', default='', help='Cookie header, e.g. sessionid=...')
+
+    connect = sub.add_parser('connect')
+    connect.add_argument('--requests', type=int, default=300)
+
+    args = parser.parse_args()
+    if args.mode == 'http':
+        run_http(args)
+    else:
+        run_connect(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Service layer benchmarks
+
+Times the stock, sales, purchasing and manufacturing hot paths and counts
+their queries at several data scales. Each scale is generated into a
+throwaway test database with `generate_load_data`; every iteration runs
+inside a transaction that is rolled back, so all iterations start from the
+same state and only the service call itself is measured. Since nothing
+commits, the "(committed)" scenarios run the on-commit refreshes of
+ProductCost and BOMAvailability explicitly after the call.
+
+    python -m benchmarks.services --scales small,medium --output results.json
+
+Query counts are deterministic, so they double as a regression gate: with
+--baseline the run fails when a scenario issues more queries than recorded
+there. Refresh the baseline after an intended change with --update-baseline.
+
+    python -m benchmarks.services --baseline benchmarks/baseline.json
+    python -m benchmarks.services --baseline benchmarks/baseline.json --update-baseline
+
+Uses the DATABASES of DJANGO_SETTINGS_MODULE (PostgreSQL in core.settings).
+For a quick local run without PostgreSQL and Redis use the SQLite stand-in:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings python -m benchmarks.services --scales small
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+from . import setup_django
+
+SCALES = {
+    'small': {
+        'products': 200, 'customers': 500, 'vendors': 10, 'warehouses': 1, 'bins': 5,
+        'orders_per_day': 20, 'purchases_per_day': 2, 'months': 1,
+    },
+    'medium': {
+        'products': 2000, 'customers': 5000, 'vendors': 50, 'warehouses': 2, 'bins': 10,
+        'orders_per_day': 200, 'purchases_per_day': 5, 'months': 3,
+    },
+    'large': {
+        'products': 20000, 'customers': 50000, 'vendors': 200, 'warehouses': 3, 'bins': 40,
+        'orders_per_day': 1000, 'purchases_per_day': 20, 'months': 6,
+    },
+}
+
+LINES_PER_DOCUMENT = 3
+
+
+class Fixtures:
+    """Rows from the generated dataset that the scenarios build on"""
+
+    def __init__(self):
+        from apps.inventory.models import Location, Warehouse
+        from apps.manufacturing.models import BillOfMaterials
+        from apps.products.models import Product
+        from apps.sales.models import Customer
+        from apps.vendors.models import VendorProduct
+
+        self.warehouse = Warehouse.objects.get(code='LD-WH01')
+        self.location = Location.objects.get(warehouse=self.warehouse, code='STOCK')
+        self.customer = Customer.objects.order_by('id').first()
+        self.products = list(
+            Product.objects.filter(can_be_sold=True, stock_quants__location=self.location).order_by('id')[:LINES_PER_DOCUMENT]
+        )
+        self.quant_product = self.products[0]
+
+        vendor_product = VendorProduct.objects.select_related('vendor').order_by('id').first()
+        self.vendor = vendor_product.vendor
+        self.vendor_products = [
+            vp.product for vp in VendorProduct.objects.filter(vendor=self.vendor).select_related('product')[:LINES_PER_DOCUMENT]
+        ]
+        self.bom = BillOfMaterials.objects.order_by('id').first()
+
+    def stock_up(self, products):
+        """Make sure every product has ample unreserved stock at the stock location"""
+        from apps.inventory.models import StockQuant
+
+        StockQuant.objects.filter(product__in=products, location=self.location).update(
+            quantity=Decimal('100000'), reserved_quantity=Decimal('0')
+        )
+
+    def draft_order(self):
+        from apps.sales.models import SalesOrder, SalesOrderLine
+
+        self.stock_up(self.products)
+        order = SalesOrder.objects.create(customer=self.customer, source_location=self.location)
+        for product in self.products:
+            SalesOrderLine.objects.create(sales_order=order, product=product, quantity=Decimal('2'))
+        return order
+
+    def processing_order(self):
+        from apps.sales.services import SalesService
+
+        order = self.draft_order()
+        SalesService.confirm_order(order)
+        SalesService.mark_order_processing(order)
+        return order
+
+    def delivered_order(self):
+        from apps.sales.services import SalesService
+
+        order = self.processing_order()
+        SalesService.deliver_order(order)
+        return order
+
+    def sent_po(self):
+        from apps.purchasing.models import POLine, PurchaseOrder
+
+        po = PurchaseOrder.objects.create(vendor=self.vendor, delivery_location=self.location, state='sent')
+        for product in self.vendor_products:
+            POLine.objects.create(purchase_order=po, product=product, quantity=Decimal('10'), unit_price=Decimal('1000'))
+        return po
+
+    def confirmed_mo(self):
+        from apps.manufacturing.services import ManufacturingService
+
+        self.stock_up([line.product for line in self.bom.lines.all()])
+        mo = ManufacturingService.create_mo_from_bom(self.bom, Decimal('5'), self.location, self.location)
+        ManufacturingService.confirm_mo(mo)
+        return mo
+
+
+def scenarios(fx):
+    """name -> setup(); setup prepares state and returns the call to measure"""
+    from apps.inventory.services import ProductCostService, StockService
+    from apps.manufacturing.services import BOMAvailabilityService, ManufacturingService
+    from apps.purchasing.services import POService
+    from apps.sales.services import SalesService
+
+    def flush_commit_hooks():
+        ProductCostService.flush()
+        BOMAvailabilityService.flush()
+
+    def committed(call):
+        # Rolled-back iterations leave their changes queued; start from none
+        flush_commit_hooks()
+
+        def call_and_flush():
+            call()
+            flush_commit_hooks()
+        return call_and_flush
+
+    def update_stock():
+        return lambda: StockService.update_stock(fx.quant_product, fx.location, Decimal('1'), unit_cost=Decimal('1000'))
+
+    def update_stock_committed():
+        return committed(update_stock())
+
+    def reserve_stock():
+        fx.stock_up([fx.quant_product])
+        return lambda: StockService.reserve_stock(fx.quant_product, fx.location, Decimal('1'))
+
+    def get_low_stock_products():
+        return lambda: list(StockService.get_low_stock_products(warehouse=fx.warehouse))
+
+    def confirm_order():
+        order = fx.draft_order()
+        return lambda: SalesService.confirm_order(order)
+
+    def deliver_order():
+        order = fx.processing_order()
+        return lambda: SalesService.deliver_order(order)
+
+    def create_invoice_from_order():
+        order = fx.delivered_order()
+        return lambda: SalesService.create_invoice_from_order(order)
+
+    def quick_checkout():
+        fx.stock_up(fx.products)
+        cart = [{'product': product.pk, 'quantity': Decimal('2')} for product in fx.products]
+        return lambda: SalesService.quick_checkout(cart, {'method': 'cash'}, fx.customer, fx.location)
+
+    def quick_checkout_committed():
+        return committed(quick_checkout())
+
+    def receive_products():
+        po = fx.sent_po()
+        quantities = {line.id: line.quantity for line in po.lines.all()}
+        return lambda: POService.receive_products(po, quantities)
+
+    def complete_production():
+        mo = fx.confirmed_mo()
+        return lambda: ManufacturingService.complete_production(mo)
+
+    return {
+        'StockService.update_stock': update_stock,
+        'StockService.update_stock (committed)': update_stock_committed,
+        'StockService.reserve_stock': reserve_stock,
+        'StockService.get_low_stock_products': get_low_stock_products,
+        'SalesService.confirm_order': confirm_order,
+        'SalesService.deliver_order': deliver_order,
+        'SalesService.create_invoice_from_order': create_invoice_from_order,
+        'SalesService.quick_checkout': quick_checkout,
+        'SalesService.quick_checkout (committed)': quick_checkout_committed,
+        'POService.receive_products': receive_products,
+        'ManufacturingService.complete_production': complete_production,
+    }
+
+
+class Rollback(Exception):
+    pass
+
+
+def measure(setup, repeat):
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        try:
+            with transaction.atomic():
+                call = setup()
+                # The query log is a bounded deque; start each capture empty
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    call()
+                    timings.append(time.perf_counter() - start)
+                queries = max(queries, len(captured))
+                raise Rollback
+        except Rollback:
+            pass
+
+    ms = [t * 1000 for t in timings]
+    return {
+        'queries': queries,
+        'min_ms': round(min(ms), 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'mean_ms': round(statistics.mean(ms), 3),
+    }
+
+
+def run_scale(name, repeat, only):
+    from django.core.management import call_command
+
+    call_command('flush', interactive=False, verbosity=0)
+    start = time.perf_counter()
+    call_command('generate_load_data', seed=42, stdout=io.StringIO(), **SCALES[name])
+    print(f'[{name}] data generated in {time.perf_counter() - start:.1f}s')
+
+    fx = Fixtures()
+    results = {}
+    for scenario, setup in scenarios(fx).items():
+        if only and not any(part in scenario for part in only):
+            continue
+        results[scenario] = measure(setup, repeat)
+        r = results[scenario]
+        print(f'  {scenario:44} {r["queries"]:>6} queries  median {r["median_ms"]:>9.2f}ms  min {r["min_ms"]:>9.2f}ms')
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose query count went above the baseline"""
+    regressions = []
+    for scale, scenarios_ in results.items():
+        for scenario, result in scenarios_.items():
+            expected = baseline.get(scale, {}).get(scenario, {}).get('queries')
+            if expected is not None and result['queries'] > expected + tolerance:
+                regressions.append(f'{scale} {scenario}: {result["queries"]} queries (baseline {expected})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scales', default='small,medium', help=f'Comma separated: {", ".join(SCALES)}')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', default='', help='Comma separated substrings of scenario names')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--baseline', help='Fail if query counts exceed this JSON baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='Rewrite --baseline from this run')
+    parser.add_argument('--query-tolerance', type=int, default=0)
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs')
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f'Unknown scales: {", ".join(sorted(unknown))}')
+    only = [part.strip() for part in args.only.split(',') if part.strip()]
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        results = {scale: run_scale(scale, args.repeat, only) for scale in scales}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+        teardown_test_environment()
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'database': connection.vendor,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fileobj:
+            json.dump(report, fileobj, indent=2)
+
+    if not args.baseline:
+        return
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fileobj:
+                baseline = json.load(fileobj)
+        for scale, scenarios_ in results.items():
+            baseline.setdefault(scale, {}).update(
+                {scenario: {'queries': r['queries']} for scenario, r in scenarios_.items()}
+            )
+        with open(args.baseline, 'w') as fileobj:
+            json.dump(baseline, fileobj, indent=2)
+            fileobj.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    with open(args.baseline) as fileobj:
+        regressions = compare(results, json.load(fileobj), args.query_tolerance)
+    if regressions:
+        print('\nQuery count regressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('\nNo query count regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+SQLite stand-in for the service benchmarks
+
+    DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings python -m benchmarks.services --scales small
+
+BaseModel.id is a CharField without max_length, which only PostgreSQL
+accepts; here it is created as plain varchar (SQLite doesn't enforce the
+length anyway). Huey runs tasks inline, so no Redis is needed. Timings are
+not comparable with PostgreSQL, but query counts are, apart from the
+PostgreSQL-only search indexes.
+"""
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+    }
+}
+
+HUEY = {'immediate': True}
+
+# CharField without max_length (fields.E120 on SQLite)
+SILENCED_SYSTEM_CHECKS = ['fields.E120']
+DatabaseWrapper.data_types = {
+    **DatabaseWrapper.data_types,
+    'CharField': lambda data: 'varchar' if data['max_length'] is None else 'varchar(%(max_length)s)' % data,
+}
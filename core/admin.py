@@ -0,0 +1,66 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'sql_count', 'sql_time_ms', 'trigger', 'actor')
+    list_filter = ('trigger', 'method', 'profiler')
+    search_fields = ('path', 'view_name')
+    exclude = ('report', 'queries')
+    readonly_fields = (
+        'method', 'path', 'view_name', 'status_code', 'trigger', 'profiler', 'actor',
+        'duration_ms', 'sql_count', 'sql_time_ms', 'created_at', 'report_link', 'query_list',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/report/',
+                self.admin_site.admin_view(self.report_view),
+                name='core_requestprofile_report',
+            ),
+        ] + super().get_urls()
+
+    def report_view(self, request, object_id):
+        profile = self.get_object(request, object_id)
+        if profile is None:
+            raise Http404
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        content_type = 'text/html' if profile.is_html else 'text/plain'
+        response = HttpResponse(profile.report, content_type=f'{content_type}; charset=utf-8')
+        # The report holds request data; its scripts run in an opaque origin
+        # without access to the admin's cookies or to the network
+        response['Content-Security-Policy'] = (
+            "sandbox allow-scripts; default-src 'none'; "
+            "script-src 'unsafe-inline'; style-src 'unsafe-inline'; img-src data:"
+        )
+        response['X-Content-Type-Options'] = 'nosniff'
+        return response
+
+    @admin.display(description='Report')
+    def report_link(self, obj):
+        url = reverse('admin:core_requestprofile_report', args=[obj.pk])
+        return format_html('<a href="{}" target="_blank">Open {} report</a>', url, obj.profiler)
+
+    @admin.display(description='SQL queries')
+    def query_list(self, obj):
+        if not obj.queries:
+            return '-'
+        rows = format_html_join(
+            '\n', '<tr><td style="white-space:nowrap">{} ms</td><td><code>{}</code></td></tr>',
+            ((query['ms'], query['sql']) for query in obj.queries),
+        )
+        return format_html('<table>{}</table>', rows)
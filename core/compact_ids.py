@@ -0,0 +1,135 @@
+"""
+Toolkit for rewriting ObjectId string primary keys into compact integer ids
+
+Workflow for a model currently on BaseModel:
+    1. `manage.py compact_ids plan app_label.Model` lists every FK column
+       that points at the model.
+    2. `manage.py compact_ids rewrite app_label.Model` rewrites the pk and all
+       referencing FK values, batch by batch, to the decimal form of a compact
+       id derived from the ObjectId timestamp (so ordering by id still follows
+       creation time). The columns stay varchar during this step.
+    3. Switch the model to CompactBaseModel and run makemigrations/migrate.
+       The AlterField casts the now-numeric varchar columns to bigint and
+       updates the referencing FK columns.
+"""
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Length
+
+from .ids import compact_id_from_parts
+
+OBJECT_ID_LENGTH = 24
+
+
+def referencing_fields(model):
+    """
+    Get every concrete FK/one-to-one field pointing at model's primary key
+
+    Returns:
+        list of (model, field) tuples, including hidden m2m through tables
+    """
+    result = []
+    for related in model._meta.get_fields(include_hidden=True):
+        if not related.is_relation or related.concrete:
+            continue
+        if not (related.one_to_many or related.one_to_one):
+            continue
+        field = related.field
+        if field.target_field != model._meta.pk:
+            continue
+        result.append((related.related_model, field))
+    return result
+
+
+def object_id_timestamp_ms(value):
+    """Timestamp (ms) stored in the first 4 bytes of an ObjectId hex string"""
+    return int(value[:8], 16) * 1000
+
+
+def _pending_ids(model, batch_size):
+    """Smallest `batch_size` primary keys still in ObjectId form"""
+    return list(
+        model._default_manager.annotate(_pk_len=Length('pk'))
+        .filter(_pk_len=OBJECT_ID_LENGTH)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+
+
+def _last_converted_id(model):
+    """Highest compact id already written by a previous (partial) run"""
+    value = (
+        model._default_manager.annotate(_pk_len=Length('pk'))
+        .filter(_pk_len__lt=OBJECT_ID_LENGTH)
+        .aggregate(last=Max(Cast('pk', BigIntegerField())))['last']
+    )
+    return value or 0
+
+
+def _update_column(table, column, mapping):
+    """UPDATE table SET column = CASE column WHEN old THEN new ... END"""
+    qn = connection.ops.quote_name
+    whens = ' '.join(['WHEN %s THEN %s'] * len(mapping))
+    placeholders = ', '.join(['%s'] * len(mapping))
+    params = []
+    for old, new in mapping:
+        params.extend([old, new])
+    params.extend(old for old, _ in mapping)
+    sql = (
+        f'UPDATE {qn(table)} SET {qn(column)} = CASE {qn(column)} {whens} END '
+        f'WHERE {qn(column)} IN ({placeholders})'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def rewrite_model_ids(model, batch_size=2000, progress=None):
+    """
+    Rewrite ObjectId primary keys of model (and every FK pointing at them)
+    into compact ids, one transaction per batch
+
+    Safe to interrupt and rerun: converted rows are skipped and new ids keep
+    increasing from the highest one already written.
+
+    Args:
+        model: Model class still using a varchar primary key
+        batch_size: Rows per transaction
+        progress: Optional callable(converted_so_far)
+
+    Returns:
+        int: Number of rows converted
+    """
+    pk_column = model._meta.pk.column
+    table = model._meta.db_table
+    references = referencing_fields(model)
+
+    last = _last_converted_id(model)
+    converted = 0
+
+    while True:
+        old_ids = _pending_ids(model, batch_size)
+        if not old_ids:
+            break
+
+        mapping = []
+        for old in old_ids:
+            try:
+                new = compact_id_from_parts(object_id_timestamp_ms(old))
+            except ValueError:
+                raise ValueError(f"{model._meta.label} id {old!r} is not an ObjectId")
+            # Keep ids unique and monotonic even inside the same second
+            new = max(new, last + 1)
+            last = new
+            mapping.append((old, str(new)))
+
+        with transaction.atomic():
+            _update_column(table, pk_column, mapping)
+            for related_model, field in references:
+                _update_column(related_model._meta.db_table, field.column, mapping)
+
+        converted += len(mapping)
+        if progress:
+            progress(converted)
+
+    return converted
@@ -0,0 +1,115 @@
+"""
+Read replica routing
+
+Reads are sent to a replica only inside `use_replica()` (entered by
+ReplicaReadMixin / read_from_replica for read-only views). Everything else,
+including writes, select_for_update and reads inside a transaction, stays on
+the primary. After a request that wrote through the ORM, an authenticated
+session is pinned to the primary for REPLICA_PIN_SECONDS so users always see
+their own changes.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_SESSION_KEY = '_pin_primary_until'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# A dict per request, so a write in a copied context (sync_to_async) still marks it
+_request_writes = ContextVar('request_writes', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block to a replica (when one is configured)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Force reads in this block to the primary"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def is_pinned_to_primary(request):
+    """True if this session wrote recently and must read its own writes"""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    return session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def pin_to_primary(request):
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session[PIN_SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def can_read_from_replica(request):
+    return (
+        bool(replica_aliases())
+        and request.method in ('GET', 'HEAD')
+        and not is_pinned_to_primary(request)
+    )
+
+
+class ReplicaRouter:
+    """Send reads to a replica inside use_replica(), everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Pin a signed-in user's session to the primary for a short window after a request that wrote"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = {'wrote': False}
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        user = getattr(request, 'user', None)
+        if writes['wrote'] and user is not None and user.is_authenticated and replica_aliases():
+            pin_to_primary(request)
+        return response
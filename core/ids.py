@@ -0,0 +1,133 @@
+"""
+Primary key generators
+"""
+import itertools
+import os
+import threading
+import time
+
+_OBJECT_ID_COUNTER_MASK = 0xFFFFFF
+
+
+class _ObjectIdState:
+    """
+    Per-process ObjectId state, reset in forked children so gunicorn
+    prefork workers never share a process id or counter
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.process_hex = os.urandom(5).hex()
+        # next() on itertools.count is atomic under the GIL
+        self.counter = itertools.count(int.from_bytes(os.urandom(3), 'big'))
+
+
+_object_id_state = _ObjectIdState()
+
+
+def generate_object_id():
+    """
+    Generate an ObjectId-compatible 24-char hex string
+
+    Layout matches bson.ObjectId: 4-byte timestamp, 5-byte per-process
+    random value, 3-byte counter, so ids stay sortable by creation time.
+    """
+    state = _object_id_state
+    return '%08x%s%06x' % (
+        int(time.time()),
+        state.process_hex,
+        next(state.counter) & _OBJECT_ID_COUNTER_MASK,
+    )
+
+
+def generate_object_ids(n):
+    """
+    Generate n ObjectId-compatible ids for bulk creators
+
+    Returns:
+        list: n unique ids sharing one timestamp
+    """
+    state = _object_id_state
+    prefix = '%08x%s' % (int(time.time()), state.process_hex)
+    counter = state.counter
+    return [
+        prefix + '%06x' % (next(counter) & _OBJECT_ID_COUNTER_MASK)
+        for _ in range(n)
+    ]
+
+
+# Custom epoch for compact ids: 2024-01-01T00:00:00Z
+COMPACT_ID_EPOCH_MS = 1704067200000
+
+COMPACT_WORKER_BITS = 10
+COMPACT_SEQUENCE_BITS = 12
+COMPACT_TIMESTAMP_SHIFT = COMPACT_WORKER_BITS + COMPACT_SEQUENCE_BITS
+
+_MAX_WORKER = (1 << COMPACT_WORKER_BITS) - 1
+_MAX_SEQUENCE = (1 << COMPACT_SEQUENCE_BITS) - 1
+
+
+class _CompactIdState:
+    """Per-process generator state, reset in forked children"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.worker = (os.getpid() ^ int.from_bytes(os.urandom(2), 'big')) & _MAX_WORKER
+        self.last_ms = -1
+        self.sequence = 0
+
+
+_compact_state = _CompactIdState()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_object_id_state.reset)
+    os.register_at_fork(after_in_child=_compact_state.reset)
+
+
+def compact_id_from_parts(timestamp_ms, worker=0, sequence=0):
+    """
+    Build a compact id from its parts
+
+    Layout (63 bits, fits a signed bigint):
+        41 bits milliseconds since COMPACT_ID_EPOCH_MS
+        10 bits worker
+        12 bits sequence
+    """
+    elapsed = max(int(timestamp_ms) - COMPACT_ID_EPOCH_MS, 0)
+    return (
+        (elapsed << COMPACT_TIMESTAMP_SHIFT)
+        | ((worker & _MAX_WORKER) << COMPACT_SEQUENCE_BITS)
+        | (sequence & _MAX_SEQUENCE)
+    )
+
+
+def compact_id_timestamp_ms(value):
+    """Return the unix timestamp (ms) embedded in a compact id"""
+    return (int(value) >> COMPACT_TIMESTAMP_SHIFT) + COMPACT_ID_EPOCH_MS
+
+
+def generate_compact_id():
+    """
+    Generate a 64-bit time-ordered integer id
+
+    Ids from the same process are strictly increasing; ids from different
+    processes are ordered by millisecond.
+    """
+    state = _compact_state
+    with state.lock:
+        now = int(time.time() * 1000)
+        if now <= state.last_ms:
+            # Same millisecond (or clock went backwards): bump the sequence
+            now = state.last_ms
+            state.sequence = (state.sequence + 1) & _MAX_SEQUENCE
+            if state.sequence == 0:
+                now += 1
+        else:
+            state.sequence = 0
+        state.last_ms = now
+        return compact_id_from_parts(now, state.worker, state.sequence)
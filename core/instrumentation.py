@@ -0,0 +1,222 @@
+"""
+Per-request instrumentation
+
+InstrumentationMiddleware records, for every request, the number and time
+of SQL queries (through connection.execute_wrapper, so it also works with
+DEBUG=False), cache hits/misses, template render time and total time. The
+numbers are sent back in a Server-Timing header and slow or repetitive
+requests are logged.
+
+Views can declare a query budget, either as a `query_budget` attribute on a
+class-based view or with the @query_budget(n) decorator. Exceeding it raises
+QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (as under `manage.py
+test`), and is logged otherwise.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = []
+        self.shapes = {}
+        self.exact = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.paused = False
+
+    def record_query(self, sql, params, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        if len(self.queries) < getattr(settings, 'INSTRUMENTATION_MAX_QUERIES', 500):
+            self.queries.append((sql, duration))
+        self.shapes[sql] = self.shapes.get(sql, 0) + 1
+        try:
+            key = (sql, repr(params))
+        except Exception:
+            return
+        self.exact[key] = self.exact.get(key, 0) + 1
+
+    @property
+    def duplicate_count(self):
+        """Queries that repeated an earlier query with the same parameters"""
+        return sum(count - 1 for count in self.exact.values() if count > 1)
+
+    def repeated_shapes(self, threshold):
+        """SQL statements run at least `threshold` times (typically an N+1)"""
+        return sorted(
+            ((sql, count) for sql, count in self.shapes.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries, {self.duplicate_count} duplicate"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+@contextmanager
+def untracked():
+    """Leave the queries run inside out of the current request's metrics"""
+    metrics = _current.get()
+    if metrics is None or metrics.paused:
+        yield
+        return
+    metrics.paused = True
+    try:
+        yield
+    finally:
+        metrics.paused = False
+
+
+def record_cache_hit():
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += 1
+
+
+def record_cache_miss():
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_misses += 1
+
+
+def cache_get(cache, key, default=None):
+    """cache.get() that counts the hit or miss for the current request"""
+    sentinel = object()
+    value = cache.get(key, sentinel)
+    if value is sentinel:
+        record_cache_miss()
+        return default
+    record_cache_hit()
+    return value
+
+
+def render_response(response):
+    """Render a TemplateResponse now, counting the time as template time"""
+    if not hasattr(response, 'render') or getattr(response, 'is_rendered', True):
+        return response
+    start = time.perf_counter()
+    response.render()
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_time += time.perf_counter() - start
+    return response
+
+
+def query_budget(limit):
+    """Declare the maximum number of queries a function view may run"""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def _view_budget(view_func):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None and hasattr(view_func, 'view_class'):
+        budget = getattr(view_func.view_class, 'query_budget', None)
+    return budget
+
+
+class QueryCollector:
+    """connection.execute_wrapper() hook feeding RequestMetrics"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.metrics.paused:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.record_query(sql, params, time.perf_counter() - start)
+
+
+class InstrumentationMiddleware:
+    """
+    Measure each request; list it first in MIDDLEWARE so the totals cover
+    the other middleware and its template rendering runs last.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        request.query_budget = None
+        token = _current.set(metrics)
+        collector = QueryCollector(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(collector))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.total_time = time.perf_counter() - metrics.start
+
+        if getattr(settings, 'SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing()
+        self.report(request, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = _view_budget(view_func)
+
+    def process_template_response(self, request, response):
+        return render_response(response)
+
+    def report(self, request, metrics):
+        threshold = getattr(settings, 'REPEATED_QUERY_THRESHOLD', 10)
+        repeated = metrics.repeated_shapes(threshold)
+        if repeated:
+            sql, count = repeated[0]
+            logger.warning(
+                '%s %s ran the same query %d times (%d queries total, %d duplicates): %s',
+                request.method, request.path, count, metrics.sql_count, metrics.duplicate_count, sql[:300],
+            )
+
+        slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 1000)
+        if metrics.total_time * 1000 >= slow_ms:
+            logger.warning(
+                '%s %s took %.0fms (%d queries, %.0fms SQL, %.0fms templates)',
+                request.method, request.path, metrics.total_time * 1000,
+                metrics.sql_count, metrics.sql_time * 1000, metrics.template_time * 1000,
+            )
+
+        budget = request.query_budget
+        if budget is not None and metrics.sql_count > budget:
+            message = f'{request.method} {request.path} ran {metrics.sql_count} queries, budget is {budget}'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.compact_ids import referencing_fields, rewrite_model_ids
+
+
+class Command(BaseCommand):
+    help = 'Plan or run the rewrite of ObjectId primary keys into compact integer ids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['plan', 'rewrite'])
+        parser.add_argument('models', nargs='+', help='Models as app_label.ModelName')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        models = []
+        for label in options['models']:
+            try:
+                models.append(apps.get_model(label))
+            except (LookupError, ValueError):
+                raise CommandError(f'Unknown model: {label}')
+
+        for model in models:
+            if options['action'] == 'plan':
+                self.plan(model)
+            else:
+                self.rewrite(model, options['batch_size'])
+
+    def plan(self, model):
+        self.stdout.write(f'{model._meta.label} ({model._meta.db_table}.{model._meta.pk.column})')
+        for related_model, field in referencing_fields(model):
+            self.stdout.write(f'  <- {related_model._meta.db_table}.{field.column}')
+
+    def rewrite(self, model, batch_size):
+        self.stdout.write(f'Rewriting {model._meta.label}...')
+
+        def progress(converted):
+            self.stdout.write(f'    {converted} rows')
+
+        total = rewrite_model_ids(model, batch_size=batch_size, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'  ✓ {total} ids rewritten'))
@@ -0,0 +1,190 @@
+"""
+Prometheus metrics
+
+Service layer latency, rows written, stock reservation failures, row lock
+waits, and huey queue depth and task duration, served on /metrics in the
+Prometheus text format.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by
+all workers (and the huey consumer, when it runs on the same host) before
+they start. Every process then writes its samples there and /metrics
+aggregates them; gunicorn.conf.py takes care of the directory.
+"""
+import functools
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_http_methods
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# OperationStats of the outermost instrumented operation running in this context
+_current_stats = ContextVar('current_stats', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+SERVICE_LATENCY = Histogram(
+    'erp_service_operation_seconds',
+    'Service layer operation latency',
+    ['service', 'operation', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+SERVICE_ROWS = Counter(
+    'erp_service_rows_written_total',
+    'Rows inserted, updated or deleted by service layer operations',
+    ['service', 'operation'],
+)
+LOCK_WAIT = Histogram(
+    'erp_service_lock_wait_seconds',
+    'Time an operation spent in SELECT ... FOR UPDATE statements',
+    ['service', 'operation'],
+    buckets=LATENCY_BUCKETS,
+)
+RESERVATION_FAILURES = Counter(
+    'erp_stock_reservation_failures_total',
+    'Stock reservations refused for lack of available quantity',
+)
+HUEY_TASK_DURATION = Histogram(
+    'erp_huey_task_seconds',
+    'huey task execution time',
+    ['task', 'outcome'],
+    buckets=LATENCY_BUCKETS + (60, 300, 900),
+)
+
+
+class OperationStats:
+    """connection.execute_wrapper() hook counting written rows and lock time"""
+
+    def __init__(self):
+        self.rows = 0
+        self.locks = 0
+        self.lock_wait = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            if 'FOR UPDATE' in sql:
+                self.locks += 1
+                self.lock_wait += time.perf_counter() - start
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            rowcount = context['cursor'].rowcount
+            if rowcount and rowcount > 0:
+                self.rows += rowcount
+        return result
+
+
+def instrument(service, operation):
+    """
+    Record latency, written rows and lock wait of one service operation
+
+    When one instrumented operation calls another, the rows and lock wait
+    are counted once, by the outermost one; latency is recorded for both.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_stats.get() is not None:
+                outcome = 'error'
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                    outcome = 'ok'
+                    return result
+                finally:
+                    SERVICE_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - start)
+
+            stats = OperationStats()
+            token = _current_stats.set(stats)
+            outcome = 'error'
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(stats):
+                    result = func(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                _current_stats.reset(token)
+                SERVICE_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - start)
+                if stats.rows:
+                    SERVICE_ROWS.labels(service, operation).inc(stats.rows)
+                if stats.locks:
+                    LOCK_WAIT.labels(service, operation).observe(stats.lock_wait)
+        return wrapper
+    return decorator
+
+
+def instrument_service(cls):
+    """Class decorator instrumenting every public staticmethod of a service"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not isinstance(attr, staticmethod):
+            continue
+        setattr(cls, name, staticmethod(instrument(cls.__name__, name)(attr.__func__)))
+    return cls
+
+
+class HueyQueueCollector:
+    """Read the huey queue depth from the broker at scrape time"""
+
+    @staticmethod
+    def _family():
+        return GaugeMetricFamily(
+            'erp_huey_queue_depth', 'Tasks waiting in the huey queue', labels=['queue', 'state']
+        )
+
+    def describe(self):
+        # Without describe() REGISTRY.register() calls collect() and hits the broker at import time
+        yield self._family()
+
+    def collect(self):
+        from huey.contrib.djhuey import HUEY
+
+        depth = self._family()
+        try:
+            depth.add_metric([HUEY.name, 'pending'], HUEY.pending_count())
+            depth.add_metric([HUEY.name, 'scheduled'], HUEY.scheduled_count())
+        except Exception:
+            logger.warning('Could not read huey queue depth', exc_info=True)
+            return
+        yield depth
+
+
+huey_queue_collector = HueyQueueCollector()
+REGISTRY.register(huey_queue_collector)
+
+
+def scrape_registry():
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(huey_queue_collector)
+    return registry
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    # With METRICS_TOKEN set Prometheus authenticates with it; without one only staff may look
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponseForbidden()
+    elif not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(scrape_registry()), content_type=CONTENT_TYPE_LATEST)
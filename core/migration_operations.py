@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex for PostgreSQL-only index types (GIN, pg_trgm opclasses,
+    tsvector expressions). The index is still recorded in the migration state
+    but not created on other databases, such as the SQLite stand-in used by
+    the benchmarks.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
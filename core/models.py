@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+from .ids import generate_compact_id
 from .utils import generate_id
 
 
@@ -13,3 +14,97 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ConcurrentUpdateError(ValueError):
+    """A versioned save lost the race to another transaction; reload and retry"""
+    retryable = True
+
+
+class VersionedModel(BaseModel):
+    """
+    BaseModel with optimistic concurrency control
+
+    save_versioned() issues `UPDATE ... WHERE id = %s AND version = %s` and
+    bumps the version, raising ConcurrentUpdateError when another transaction
+    changed the row since it was read. Plain save() never touches the
+    version, so derived updates such as compute_totals() don't conflict.
+    Edit views use core.views.VersionedUpdateMixin, which checks the version
+    the form was rendered with.
+    """
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save_versioned(self, *args, **kwargs):
+        self._expected_version = self.version
+        try:
+            self.save(*args, **kwargs)
+        finally:
+            del self._expected_version
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        values.append((version_field, None, expected + 1))
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            self.version = expected + 1
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConcurrentUpdateError(
+                f"{self._meta.verbose_name.capitalize()} {self} was changed by someone else. Reload and try again."
+            )
+        return False
+
+
+class CompactBaseModel(BaseModel):
+    """
+    BaseModel with a 64-bit time-ordered integer primary key
+
+    Opt-in replacement for BaseModel. Existing tables must have their ids
+    rewritten with `manage.py compact_ids rewrite` before switching.
+    """
+    id = models.BigIntegerField(primary_key=True, default=generate_compact_id, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+PROFILE_TRIGGER_CHOICES = (
+    ('manual', 'Requested'),
+    ('threshold', 'Slow request'),
+    ('block', 'Profiled block'),
+)
+
+
+class RequestProfile(BaseModel):
+    """Stored profiler report of one request or profiled block (core.profiling)"""
+
+    method = models.CharField(max_length=10, blank=True)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    trigger = models.CharField(max_length=20, choices=PROFILE_TRIGGER_CHOICES)
+    profiler = models.CharField(max_length=20)
+
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_time_ms = models.FloatField(default=0)
+
+    report = models.TextField(help_text='pyinstrument HTML or cProfile text report')
+    queries = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+
+    @property
+    def is_html(self):
+        return self.profiler == 'pyinstrument'
@@ -0,0 +1,70 @@
+"""
+Keyset pagination for JSON endpoints
+
+Pages are addressed by an opaque cursor holding the ordering values of the
+previous page's last row, so every page is one indexed range scan no matter
+how deep the user scrolls. `ordering` must end with a unique field (pk).
+
+    return keyset_page(request, Location.objects.filter(...), ('name', 'pk'),
+                       lambda location: {'id': location.pk, 'text': str(location)})
+"""
+import base64
+import json
+from operator import attrgetter
+
+from django.db.models import Q
+from django.http import JsonResponse
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def keyset_filter(ordering, values):
+    """Rows strictly after `values` in `ordering`"""
+    condition = Q()
+    previous = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**previous, **{f'{name}__{lookup}': value})
+        previous[name] = value
+    return condition
+
+
+def row_values(row, ordering):
+    return [attrgetter(field.lstrip('-').replace('__', '.'))(row) for field in ordering]
+
+
+def keyset_page(request, queryset, ordering, serialize):
+    """JsonResponse with one page of `queryset`; reads ?cursor= and ?limit="""
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, ordering)))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return JsonResponse({
+        'success': True,
+        'results': [serialize(row) for row in rows],
+        'next': encode_cursor(row_values(rows[-1], ordering)) if has_more else None,
+        'has_more': has_more,
+    })
@@ -0,0 +1,178 @@
+"""
+Opt-in profiling
+
+ProfilingMiddleware profiles a request when
+- a staff user asks for it with an `X-Profile: 1` header or `?_profile=1`, or
+- PROFILE_SLOW_REQUEST_MS is set, the request was sampled (PROFILE_SAMPLE_RATE)
+  and it took longer than that.
+
+pyinstrument's sampling profiler is used when installed (it is optional and
+not in requirements.txt), cProfile otherwise.
+Reports are stored as RequestProfile rows together with the request's SQL
+(collected by core.instrumentation), capped at PROFILE_MAX_STORED, and
+browsed from the admin.
+
+profile_block() does the same for code outside a request, such as a huey task
+or a shell session:
+
+    with profile_block('confirm SO-00042'):
+        SalesService.confirm_order(order)
+"""
+import cProfile
+import io
+import pstats
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import QueryCollector, RequestMetrics, current_metrics, untracked
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+_active = ContextVar('profile_active', default=False)
+
+
+class Profile:
+    def __init__(self):
+        if SamplingProfiler is not None:
+            self.profiler_name = 'pyinstrument'
+            self._profiler = SamplingProfiler(interval=getattr(settings, 'PROFILE_INTERVAL', 0.001))
+        else:
+            self.profiler_name = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if SamplingProfiler is not None:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if SamplingProfiler is not None:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def report(self):
+        if SamplingProfiler is not None:
+            return self._profiler.output_html()
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(80)
+        return stream.getvalue()
+
+
+def store_profile(profile, duration, trigger, metrics=None, **fields):
+    """Save a finished profile and drop the oldest beyond PROFILE_MAX_STORED"""
+    from .models import RequestProfile
+
+    queries = []
+    if metrics is not None:
+        queries = [{'sql': sql, 'ms': round(elapsed * 1000, 3)} for sql, elapsed in metrics.queries]
+
+    with untracked():
+        record = RequestProfile.objects.create(
+            trigger=trigger,
+            profiler=profile.profiler_name,
+            duration_ms=round(duration * 1000, 3),
+            sql_count=metrics.sql_count if metrics is not None else 0,
+            sql_time_ms=round(metrics.sql_time * 1000, 3) if metrics is not None else 0,
+            report=profile.report(),
+            queries=queries,
+            **fields,
+        )
+        limit = getattr(settings, 'PROFILE_MAX_STORED', 200)
+        stale = list(RequestProfile.objects.values_list('pk', flat=True)[limit:])
+        if stale:
+            RequestProfile.objects.filter(pk__in=stale).delete()
+    return record
+
+
+@contextmanager
+def profile_block(label, min_ms=0, actor=None):
+    """Profile the enclosed code and store it if it ran for at least min_ms"""
+    if _active.get():
+        yield
+        return
+
+    metrics = RequestMetrics()
+    collector = QueryCollector(metrics)
+    profile = Profile()
+    token = _active.set(True)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            profile.start()
+            try:
+                yield
+            finally:
+                profile.stop()
+    finally:
+        _active.reset(token)
+        duration = time.perf_counter() - start
+        if duration * 1000 >= min_ms:
+            store_profile(profile, duration, 'block', metrics, path=label[:500], actor=actor)
+
+
+class ProfilingMiddleware:
+    """
+    List after AuthenticationMiddleware (needs request.user) and after
+    core.instrumentation.InstrumentationMiddleware (supplies the SQL list).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = _active.set(True)
+        start = time.perf_counter()
+        profile.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+            _active.reset(token)
+        duration = time.perf_counter() - start
+
+        if trigger == 'threshold' and duration * 1000 < settings.PROFILE_SLOW_REQUEST_MS:
+            return response
+
+        user = getattr(request, 'user', None)
+        match = request.resolver_match
+        record = store_profile(
+            profile, duration, trigger, current_metrics(),
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=(match.view_name or '')[:200] if match else '',
+            status_code=response.status_code,
+            actor=user if user is not None and user.is_authenticated else None,
+        )
+        if trigger == 'manual':
+            response['X-Profile-Id'] = record.pk
+        return response
+
+    def get_trigger(self, request):
+        if _active.get():
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff and (
+            request.headers.get('X-Profile') == '1' or '_profile' in request.GET
+        ):
+            return 'manual'
+        threshold = getattr(settings, 'PROFILE_SLOW_REQUEST_MS', 0)
+        if threshold and random.random() < getattr(settings, 'PROFILE_SAMPLE_RATE', 0.1):
+            return 'threshold'
+        return None
@@ -0,0 +1,53 @@
+"""
+Production settings
+
+Select with DJANGO_SETTINGS_MODULE=core.settings_production.
+
+PG_CONNECTION_MODE picks how Postgres connections are managed:
+    persistent  Reuse one connection per worker thread for PG_CONN_MAX_AGE
+                seconds, health-checked before each request (default)
+    pool        Django's native psycopg 3 connection pool (PG_POOL_* sizes)
+    pgbouncer   Connect through PgBouncer in transaction pooling mode:
+                server-side cursors disabled, no client-side pool
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, SECRET_KEY
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "*").split(",")
+
+PG_CONNECTION_MODE = os.environ.get("PG_CONNECTION_MODE", "persistent")
+
+if PG_CONNECTION_MODE == "pool":
+    from psycopg_pool import ConnectionPool
+
+for _db in DATABASES.values():
+    _db["CONN_HEALTH_CHECKS"] = True
+
+    if PG_CONNECTION_MODE == "pool":
+        # The pool owns connection lifetime; Django requires CONN_MAX_AGE=0 here
+        _db["CONN_MAX_AGE"] = 0
+        _db["OPTIONS"] = {
+            **_db.get("OPTIONS", {}),
+            "pool": {
+                "min_size": int(os.environ.get("PG_POOL_MIN_SIZE", "2")),
+                "max_size": int(os.environ.get("PG_POOL_MAX_SIZE", "10")),
+                "timeout": float(os.environ.get("PG_POOL_TIMEOUT", "10")),
+                "max_idle": float(os.environ.get("PG_POOL_MAX_IDLE", "300")),
+                "check": ConnectionPool.check_connection,
+            },
+        }
+    elif PG_CONNECTION_MODE == "pgbouncer":
+        # Transaction pooling hands each transaction a different server
+        # connection, so named cursors (WITH HOLD) cannot survive between
+        # fetches. Prepared statements are already off by default in Django.
+        _db["CONN_MAX_AGE"] = int(os.environ.get("PG_CONN_MAX_AGE", "600"))
+        _db["DISABLE_SERVER_SIDE_CURSORS"] = True
+    elif PG_CONNECTION_MODE == "persistent":
+        _db["CONN_MAX_AGE"] = int(os.environ.get("PG_CONN_MAX_AGE", "600"))
+    else:
+        raise ValueError(f"Unknown PG_CONNECTION_MODE: {PG_CONNECTION_MODE}")
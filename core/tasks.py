@@ -0,0 +1,26 @@
+"""
+huey signal handlers timing every task for core.metrics
+
+The consumer imports the tasks module of each installed app, which is what
+registers these.
+"""
+import time
+
+from huey.contrib.djhuey import signal
+from huey.signals import SIGNAL_COMPLETE, SIGNAL_ERROR, SIGNAL_EXECUTING, SIGNAL_INTERRUPTED, SIGNAL_LOCKED
+
+from .metrics import HUEY_TASK_DURATION
+
+_started = {}
+
+
+@signal(SIGNAL_EXECUTING)
+def task_started(signal, task, *args):
+    _started[task.id] = time.perf_counter()
+
+
+@signal(SIGNAL_COMPLETE, SIGNAL_ERROR, SIGNAL_INTERRUPTED, SIGNAL_LOCKED)
+def task_finished(signal, task, *args):
+    start = _started.pop(task.id, None)
+    if start is not None:
+        HUEY_TASK_DURATION.labels(task.name, signal).observe(time.perf_counter() - start)
@@ -2,9 +2,11 @@ from django.contrib import admin
 from django.urls import path, include
 
 from apps import announcements
+from core.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("apps.announcements.urls")),
     path("", include("apps.employees.urls")),
     path("", include("apps.payrolls.urls")),
@@ -1,5 +1,29 @@
-import bson
+from .ids import generate_object_id, generate_object_ids
 
 
 def generate_id():
-    return str(bson.ObjectId())
+    return generate_object_id()
+
+
+def generate_ids(n):
+    return generate_object_ids(n)
+
+
+def next_references(queryset, field, prefix, width, count):
+    """
+    Allocate `count` sequential references such as PROD-00042 in one query
+
+    Continues from the highest existing `prefix`-numbered value of `field`,
+    the same way the models' save() numbers a single record.
+    """
+    last = queryset.filter(
+        **{f'{field}__startswith': prefix}
+    ).order_by(f'-{field}').values_list(field, flat=True).first()
+
+    start = 1
+    if last:
+        try:
+            start = int(last[len(prefix):]) + 1
+        except ValueError:
+            pass
+    return [f'{prefix}{number:0{width}d}' for number in range(start, start + count)]
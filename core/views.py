@@ -1,4 +1,12 @@
+from functools import wraps
+
+from django import forms
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseRedirect
+
+from .db_routers import can_read_from_replica, use_replica
+from .instrumentation import render_response
+from .models import ConcurrentUpdateError
 
 class LoginRequiredMixinView(LoginRequiredMixin):
     login_url = '/login/'
@@ -6,3 +14,57 @@ class LoginRequiredMixinView(LoginRequiredMixin):
 
     class Meta:
         abstract = True
+
+
+def _render_in_place(response):
+    # TemplateResponse renders lazily after dispatch returns; force it here so
+    # the template's queries still run inside the routing block
+    return render_response(response)
+
+
+class ReplicaReadMixin:
+    """Serve read-only GET/HEAD requests from a read replica"""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not can_read_from_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replica():
+            return _render_in_place(super().dispatch(request, *args, **kwargs))
+
+
+def read_from_replica(view_func):
+    """Function view counterpart of ReplicaReadMixin"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not can_read_from_replica(request):
+            return view_func(request, *args, **kwargs)
+        with use_replica():
+            return _render_in_place(view_func(request, *args, **kwargs))
+    return wrapper
+
+
+class VersionedUpdateMixin:
+    """
+    UpdateView mixin for VersionedModel documents
+
+    The form carries the version it was rendered with in a hidden `version`
+    field and is saved with save_versioned(), so editing a stale form can't
+    undo a state change (confirm, payment, cancel) made in the meantime;
+    the conflict is shown as a form error instead.
+    """
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields['version'] = forms.IntegerField(widget=forms.HiddenInput, initial=self.object.version)
+        return form
+
+    def form_valid(self, form):
+        self.object = form.save(commit=False)
+        self.object.version = form.cleaned_data['version']
+        try:
+            self.object.save_versioned()
+        except ConcurrentUpdateError as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
+        form.save_m2m()
+        return HttpResponseRedirect(self.get_success_url())
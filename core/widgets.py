@@ -0,0 +1,65 @@
+"""
+Remote choice widgets
+
+RemoteSelect renders a <select> holding only its selected option; the other
+options are fetched on demand from a keyset-paginated JSON endpoint (see
+core.pagination) by static/js/remote-select.js. The field keeps its queryset,
+so validation is still ModelChoiceField's single pk lookup.
+
+    widgets = {
+        'product': RemoteSelect('product-autocomplete-api', params={'purchasable': '1'}, attrs={...}),
+    }
+
+`forward` names other form fields whose current values are sent along, e.g.
+a BOM picker narrowed to the chosen product.
+"""
+from urllib.parse import urlencode
+
+from django import forms
+from django.urls import reverse
+
+
+class RemoteSelect(forms.Select):
+    def __init__(self, url_name, params=None, forward=(), placeholder='Type to search...', attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.params = dict(params or {})
+        self.forward = tuple(forward)
+        self.placeholder = placeholder
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        url = reverse(self.url_name)
+        if self.params:
+            url = f'{url}?{urlencode(self.params)}'
+        widget_attrs = context['widget']['attrs']
+        widget_attrs['data-remote-url'] = url
+        widget_attrs['data-placeholder'] = self.placeholder
+        if self.forward:
+            widget_attrs['data-forward'] = ','.join(self.forward)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        # Only the empty option and the selected instances, in one pk lookup
+        all_choices = self.choices
+        choices = []
+        field = getattr(all_choices, 'field', None)
+        if field is not None:
+            if field.empty_label is not None:
+                choices.append(('', field.empty_label))
+            selected = [pk for pk in value if pk not in ('', None)]
+            if selected:
+                choices += [all_choices.choice(obj) for obj in all_choices.queryset.filter(pk__in=selected)]
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
+class RemoteModelChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField rendered with a RemoteSelect"""
+
+    def __init__(self, queryset, url_name, params=None, forward=(), attrs=None, **kwargs):
+        kwargs.setdefault('widget', RemoteSelect(url_name, params=params, forward=forward, attrs=attrs))
+        super().__init__(queryset, **kwargs)
@@ -0,0 +1,31 @@
+"""
+gunicorn settings for production
+
+    DJANGO_SETTINGS_MODULE=core.settings_production PROMETHEUS_MULTIPROC_DIR=/tmp/erp-metrics gunicorn
+
+Each worker writes its Prometheus samples into PROMETHEUS_MULTIPROC_DIR;
+the directory is emptied on start so counters from a previous run do not
+leak into the new one.
+"""
+import os
+import shutil
+
+wsgi_app = "core.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,149 @@
+// Search-as-you-type for <select data-remote-url> rendered by core.widgets.RemoteSelect.
+// The select stays in the form (hidden) and keeps firing `change`, so page
+// scripts that listen on it keep working.
+(function () {
+    const DEBOUNCE_MS = 250;
+
+    function enhance(select) {
+        const wrapper = document.createElement('div');
+        wrapper.className = 'relative';
+        const input = document.createElement('input');
+        input.type = 'text';
+        input.autocomplete = 'off';
+        input.className = select.className;
+        input.placeholder = select.dataset.placeholder || '';
+        input.value = select.value ? select.options[select.selectedIndex].text : '';
+        const list = document.createElement('ul');
+        list.className = 'absolute left-0 z-50 w-full mt-1 bg-white border border-neutral-300 rounded-lg shadow-lg overflow-y-auto divide-y hidden';
+        list.style.maxHeight = '16rem';
+
+        select.parentNode.insertBefore(wrapper, select);
+        wrapper.appendChild(select);
+        wrapper.appendChild(input);
+        wrapper.appendChild(list);
+        select.classList.add('hidden');
+
+        let timer = null;
+        let request = 0;
+        let active = -1;
+
+        function url(cursor) {
+            const target = new URL(select.dataset.remoteUrl, window.location.origin);
+            target.searchParams.set('q', input.value.trim());
+            if (cursor) {
+                target.searchParams.set('cursor', cursor);
+            }
+            (select.dataset.forward || '').split(',').filter(Boolean).forEach(function (name) {
+                const field = select.form && select.form.elements[name];
+                if (field && field.value) {
+                    target.searchParams.set(name, field.value);
+                }
+            });
+            return target;
+        }
+
+        function close() {
+            list.classList.add('hidden');
+            active = -1;
+        }
+
+        function choose(id, text) {
+            select.innerHTML = '';
+            select.add(new Option('', ''));
+            select.add(new Option(text, id, true, true));
+            input.value = text;
+            close();
+            select.dispatchEvent(new Event('change', { bubbles: true }));
+        }
+
+        function item(text, className, onPick) {
+            const li = document.createElement('li');
+            li.className = 'px-3 py-2 text-sm cursor-pointer hover:bg-neutral-100 ' + className;
+            li.textContent = text;
+            li.addEventListener('mousedown', function (event) {
+                event.preventDefault();
+                onPick();
+            });
+            list.appendChild(li);
+            return li;
+        }
+
+        function load(cursor) {
+            const current = ++request;
+            fetch(url(cursor), { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(data => {
+                    if (current !== request || !data.success) {
+                        return;
+                    }
+                    if (!cursor) {
+                        list.innerHTML = '';
+                        active = -1;
+                    }
+                    const more = list.querySelector('[data-more]');
+                    if (more) {
+                        more.remove();
+                    }
+                    data.results.forEach(function (result) {
+                        item(result.text, '', function () { choose(result.id, result.text); }).dataset.id = result.id;
+                    });
+                    if (!list.children.length) {
+                        item('No results', 'text-neutral-400', close);
+                    }
+                    if (data.next) {
+                        item('Load more...', 'text-xs text-neutral-400', function () { load(data.next); }).dataset.more = '1';
+                    }
+                    list.classList.remove('hidden');
+                })
+                .catch(error => {
+                    console.error('Error loading options:', error);
+                });
+        }
+
+        function highlight(index) {
+            const options = list.querySelectorAll('[data-id]');
+            if (!options.length) {
+                return;
+            }
+            active = (index + options.length) % options.length;
+            options.forEach(function (option, i) {
+                option.classList.toggle('bg-blue-50', i === active);
+            });
+            options[active].scrollIntoView({ block: 'nearest' });
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () { load(null); }, DEBOUNCE_MS);
+        });
+        input.addEventListener('focus', function () {
+            input.select();
+            load(null);
+        });
+        input.addEventListener('blur', function () {
+            close();
+            if (!input.value.trim() && select.value) {
+                select.value = '';
+                select.dispatchEvent(new Event('change', { bubbles: true }));
+            } else if (select.value) {
+                input.value = select.options[select.selectedIndex].text;
+            }
+        });
+        input.addEventListener('keydown', function (event) {
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                highlight(active + (event.key === 'ArrowDown' ? 1 : -1));
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                const option = list.querySelectorAll('[data-id]')[active];
+                choose(option.dataset.id, option.textContent);
+            } else if (event.key === 'Escape') {
+                close();
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-remote-url]').forEach(enhance);
+    });
+})();